@@ -0,0 +1,93 @@
+# =====================================================
+# 🧮 aggregates.py — Incremental Per-User & Market Totals
+# =====================================================
+#
+# `user_stats` holds one row per bidder plus GLOBAL_KEY for the whole market.
+# Rows are adjusted by deltas inside the same transaction as the bid insert or
+# lot settlement that caused them, so the dashboard reads a single row instead
+# of running GROUP BY over `bids` and `lots`.
+#
+#   active_bids      bids on lots that are still open
+#   lots_won / kg_won / committed_spend   settled wins (spend = ₹/kg × kg)
+#   open_exposure    Σ over open lots of the bidder's top bid × kg
+
+from datetime import datetime
+
+from db import fetch_all_shards
+
+GLOBAL_KEY = "*"
+STAT_FIELDS = ("active_bids", "lots_won", "kg_won", "committed_spend", "open_exposure")
+
+
+def _lot_kg(conn, lot_id):
+    # Crates, boxes, ... have no weight; they add nothing to the kg totals.
+    row = conn.execute("SELECT quantity_value FROM lots WHERE id = ? AND unit = 'kg'", (lot_id,)).fetchone()
+    return (row[0] or 0.0) if row else 0.0
+
+
+def _bump(conn, bidder, active_bids=0, lots_won=0, kg_won=0.0, committed_spend=0.0, open_exposure=0.0):
+    """Add deltas to a bidder's row and to the market row."""
+    now = datetime.now().isoformat(timespec="seconds")
+    conn.executemany(
+        """
+        INSERT INTO user_stats (bidder, active_bids, lots_won, kg_won, committed_spend, open_exposure, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(bidder) DO UPDATE SET
+            active_bids = active_bids + excluded.active_bids,
+            lots_won = lots_won + excluded.lots_won,
+            kg_won = kg_won + excluded.kg_won,
+            committed_spend = committed_spend + excluded.committed_spend,
+            open_exposure = open_exposure + excluded.open_exposure,
+            updated_at = excluded.updated_at
+        """,
+        [(key, active_bids, lots_won, kg_won, committed_spend, open_exposure, now)
+         for key in (bidder, GLOBAL_KEY)],
+    )
+
+
+def record_bid(conn, lot_id, bidder, amount, bid_id):
+    """Apply a just-inserted bid. Call inside the transaction that inserted it."""
+    previous = conn.execute(
+        "SELECT MAX(bid_amount) FROM bids WHERE lot_id = ? AND COALESCE(user_phone, user_name) = ? AND id != ?",
+        (lot_id, bidder, bid_id),
+    ).fetchone()[0]
+    # Exposure tracks the bidder's top bid on the lot, so only a raise adds to it.
+    raised = max(0.0, float(amount) - (previous or 0.0))
+    _bump(conn, bidder, active_bids=1, open_exposure=raised * _lot_kg(conn, lot_id))
+
+
+def record_settlement(conn, lot_id, winner, amount):
+    """Move a lot's bids out of the open totals and credit the winner. Call inside the settling transaction."""
+    kg = _lot_kg(conn, lot_id)
+    rows = conn.execute(
+        """
+        SELECT COALESCE(user_phone, user_name), COUNT(*), MAX(bid_amount)
+        FROM bids WHERE lot_id = ? GROUP BY 1
+        """,
+        (lot_id,),
+    ).fetchall()
+    for bidder, count, top in rows:
+        if bidder is not None:
+            _bump(conn, bidder, active_bids=-count, open_exposure=-top * kg)
+    if winner is not None:
+        _bump(conn, winner, lots_won=1, kg_won=kg, committed_spend=float(amount) * kg)
+
+
+# =====================================================
+# 📖 READS
+# =====================================================
+def _row(key):
+    # One row per lot shard; the totals are their sum.
+    rows = fetch_all_shards(f"SELECT {', '.join(STAT_FIELDS)} FROM user_stats WHERE bidder = ?", (key,))
+    totals = [sum(column) for column in zip(*rows)] if rows else (0, 0, 0.0, 0.0, 0.0)
+    return dict(zip(STAT_FIELDS, totals))
+
+
+def get_user_stats(bidder) -> dict:
+    """{field: value} for one bidder; zeros if they have never bid."""
+    return _row(bidder)
+
+
+def get_global_stats() -> dict:
+    """{field: value} across the whole market."""
+    return _row(GLOBAL_KEY)
@@ -6,7 +6,6 @@ import os
 import sqlite3
 from datetime import datetime
 import streamlit as st
-from supabase import create_client
 
 # =====================================================
 # ✅ PAGE CONFIG (must be first Streamlit call)
@@ -46,12 +45,19 @@ except Exception as e:
 st.write("🔍 Supabase URL:", supabase_url)
 st.write("🔑 Key starts with:", supabase_key[:8] + "...")
 
-# --- Initialize client ---
-try:
-    supabase = create_client(supabase_url, supabase_key)
-except Exception as e:
-    st.warning(f"⚠️ Supabase client not initialized: {e}")
-    supabase = None
+# --- Client (created on first use) ---
+@st.cache_resource
+def get_supabase():
+    """
+    Shared Supabase client. The SDK pulls in gotrue, postgrest, realtime,
+    storage3 and websockets, so it is imported here rather than at startup.
+    """
+    try:
+        from supabase import create_client
+        return create_client(supabase_url, supabase_key)
+    except Exception as e:
+        st.warning(f"⚠️ Supabase client not initialized: {e}")
+        return None
 
 # =====================================================
 # 📂 SIDEBAR
@@ -73,8 +79,13 @@ except ModuleNotFoundError:
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "fruitbid.db")
 from db import  *
+from storage import get_repository
+
+bootstrap()
 
-init_db()
+# Lots/bids go through the storage repository; FRUITBID_STORAGE=postgrest
+# sends them to the Supabase project configured above.
+repo = get_repository(url=supabase_url, api_key=supabase_key)
 
 # =====================================================
 # 🏠 APP MAIN
@@ -87,7 +98,14 @@ if page == "🏠 Home":
 
 elif page == "🏪 Marketplace":
     st.header("🍉 Marketplace")
-    st.write("Live fruit lots will appear here.")
+    lots = repo.list_lots(limit=20)
+    if lots:
+        st.dataframe(
+            [{"Fruit": lot["item_name"], "Quantity": lot["quantity"], "Base Price": lot["base_price"]} for lot in lots],
+            use_container_width=True,
+        )
+    else:
+        st.write("Live fruit lots will appear here.")
 
 elif page == "💼 My Bids":
     st.header("💼 My Bids")
@@ -96,8 +114,10 @@ elif page == "💼 My Bids":
 elif page == "⚙️ Add Lot (Admin)":
     st.header("⚙️ Add New Fruit Lot")
     fruit = st.text_input("Fruit name")
+    quantity = st.text_input("Quantity", placeholder="e.g. 10 kg")
     price = st.number_input("Starting price", min_value=0.0, step=0.5)
     if st.button("Add Lot"):
+        repo.add_lot(fruit, quantity, price)
         st.success(f"✅ {fruit} added with starting price ₹{price}")
 
 # =====================================================
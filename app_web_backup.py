@@ -1,87 +1,47 @@
 # app_web.py
 import streamlit as st
-import sqlite3
-from datetime import datetime
+
+from db import bootstrap, format_epoch
+from orderbook import get_order_book
+from storage import SqliteRepository, get_repository
 
 # --------------------------
 # DATABASE SETUP
 # --------------------------
-def init_db():
-    conn = sqlite3.connect("fruitbid.db")
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            phone TEXT
-        )
-    """)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS lots (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            fruit_name TEXT,
-            quantity TEXT,
-            base_price REAL,
-            date_added TEXT
-        )
-    """)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS bids (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_name TEXT,
-            lot_id INTEGER,
-            bid_amount REAL,
-            timestamp TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
+# Schema comes from migrations (db.init_db); reads and writes go through the
+# storage repository, so FRUITBID_STORAGE can point this app at Supabase.
+repo = get_repository()
+LOTS_PER_PAGE = 20
 
 # --------------------------
 # HELPER FUNCTIONS
 # --------------------------
 def add_user(name, phone):
-    conn = sqlite3.connect("fruitbid.db")
-    c = conn.cursor()
-    c.execute("INSERT INTO users (name, phone) VALUES (?, ?)", (name, phone))
-    conn.commit()
-    conn.close()
+    repo.add_user(name, phone)
 
-def get_lots():
-    conn = sqlite3.connect("fruitbid.db")
-    c = conn.cursor()
-    c.execute("SELECT * FROM lots")
-    lots = c.fetchall()
-    conn.close()
-    return lots
+def get_lots(before_id=None):
+    """One page of lots, newest first, plus the cursor for the next page (None on the last)."""
+    lots = repo.list_lots(limit=LOTS_PER_PAGE + 1, before_id=before_id)
+    next_cursor = lots[LOTS_PER_PAGE - 1]["id"] if len(lots) > LOTS_PER_PAGE else None
+    return [
+        (lot["id"], lot["item_name"], lot["quantity"], lot["base_price"], lot["date_added"], lot["status"])
+        for lot in lots[:LOTS_PER_PAGE]
+    ], next_cursor
 
-def add_lot(fruit_name, quantity, base_price):
-    conn = sqlite3.connect("fruitbid.db")
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO lots (fruit_name, quantity, base_price, date_added) VALUES (?, ?, ?, ?)",
-        (fruit_name, quantity, base_price, datetime.now().strftime("%Y-%m-%d %H:%M"))
-    )
-    conn.commit()
-    conn.close()
+def add_lot(item_name, quantity, base_price):
+    repo.add_lot(item_name, quantity, base_price)
 
 def place_bid(user_name, lot_id, bid_amount):
-    conn = sqlite3.connect("fruitbid.db")
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO bids (user_name, lot_id, bid_amount, timestamp) VALUES (?, ?, ?, ?)",
-        (user_name, lot_id, bid_amount, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    )
-    conn.commit()
-    conn.close()
+    repo.place_bid(lot_id, None, bid_amount, user_name=user_name)
+
+def get_bids_for_lot(lot_id, is_open=True, k=3):
+    """Top bids as (bidder, amount, time): open lots from the in-memory order book, settled ones from storage."""
+    if is_open and isinstance(repo, SqliteRepository):
+        return get_order_book().top_bids(lot_id, k)
+    return [(b["user_name"], b["bid_amount"], b["timestamp"]) for b in repo.bids_for_lot(lot_id)[:k]]
 
-def get_bids_for_lot(lot_id):
-    conn = sqlite3.connect("fruitbid.db")
-    c = conn.cursor()
-    c.execute("SELECT user_name, bid_amount, timestamp FROM bids WHERE lot_id = ? ORDER BY bid_amount DESC", (lot_id,))
-    bids = c.fetchall()
-    conn.close()
-    return bids
+def get_bids_by_name(user_name):
+    return [(b["lot_id"], b["bid_amount"], b["timestamp"]) for b in repo.bids_by_name(user_name)]
 
 # --------------------------
 # MAIN APP
@@ -90,7 +50,7 @@ def main():
     st.set_page_config(page_title="🍉 FruitBid", layout="wide")
     st.title("🍉 FruitBid — Local Farmer Marketplace")
 
-    init_db()
+    bootstrap()
 
     # Sidebar navigation
     menu = ["Home", "Marketplace", "My Bids", "Add Lot (Admin)"]
@@ -118,25 +78,36 @@ def main():
     elif choice == "Marketplace":
         st.subheader("🏪 Marketplace — Active Lots")
 
-        lots = get_lots()
+        cursors = st.session_state.setdefault("lot_cursors", [None])
+        lots, next_cursor = get_lots(cursors[-1])
         if not lots:
             st.warning("No lots available yet.")
         else:
             for lot in lots:
-                lot_id, fruit_name, quantity, base_price, date_added = lot
+                lot_id, fruit_name, quantity, base_price, date_added, status = lot
                 with st.expander(f"{fruit_name} ({quantity}) — Base ₹{base_price}"):
-                    st.write(f"📅 Added: {date_added}")
+                    st.write(f"📅 Added: {format_epoch(date_added)}")
                     st.write("💬 Place your bid below:")
                     bid_amount = st.number_input("Enter your bid (₹)", min_value=base_price, key=f"bid_{lot_id}")
                     if st.button(f"Submit Bid for Lot {lot_id}"):
                         user_name = st.session_state.get("user_name", "Guest")
-                        place_bid(user_name, lot_id, bid_amount)
-                        st.success(f"✅ Bid placed successfully for ₹{bid_amount} on {fruit_name}!")
-                    bids = get_bids_for_lot(lot_id)
+                        try:
+                            place_bid(user_name, lot_id, bid_amount)
+                            st.success(f"✅ Bid placed successfully for ₹{bid_amount} on {fruit_name}!")
+                        except ValueError:
+                            st.error("⌛ Bidding on this lot has closed.")
+                    bids = get_bids_for_lot(lot_id, status == "open")
                     if bids:
                         st.write("📊 Current Top Bids:")
-                        for b in bids[:3]:
-                            st.write(f"• {b[0]} — ₹{b[1]} ({b[2]})")
+                        for b in bids:
+                            st.write(f"• {b[0]} — ₹{b[1]} ({format_epoch(b[2])})")
+            prev_col, _, next_col = st.columns([1, 4, 1])
+            if prev_col.button("⬅️ Newer", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+            if next_col.button("Older ➡️", disabled=next_cursor is None):
+                cursors.append(next_cursor)
+                st.rerun()
     
     # --------------------------
     # MY BIDS PAGE
@@ -147,17 +118,13 @@ def main():
         if not user_name:
             st.warning("Please enter your name on the Home page first.")
         else:
-            conn = sqlite3.connect("fruitbid.db")
-            c = conn.cursor()
-            c.execute("SELECT lot_id, bid_amount, timestamp FROM bids WHERE user_name = ?", (user_name,))
-            rows = c.fetchall()
-            conn.close()
+            rows = get_bids_by_name(user_name)
             if not rows:
                 st.info("No bids placed yet.")
             else:
                 for row in rows:
                     lot_id, bid_amount, timestamp = row
-                    st.write(f"Lot #{lot_id} — ₹{bid_amount} at {timestamp}")
+                    st.write(f"Lot #{lot_id} — ₹{bid_amount} at {format_epoch(timestamp)}")
 
     # --------------------------
     # ADMIN PAGE
@@ -0,0 +1,189 @@
+# =====================================================
+# ⏳ auction_scheduler.py — Deadline-Driven Lot Closing
+# =====================================================
+#
+# Open lots sit in a min-heap keyed on closes_at. One background thread sleeps
+# until the earliest deadline (or until an earlier one is scheduled), then
+# settles every lot that is due in a single write transaction: the highest bid
+# (earliest on ties) wins and the lot is marked closed. Between deadlines the
+# scheduler costs nothing — no polling, no per-rerun scans.
+
+import heapq
+import threading
+from datetime import datetime
+
+from aggregates import record_settlement
+from db import fetch_all_shards, from_epoch, get_router, on_lot_created, on_reset, to_epoch
+from orderbook import evict_settled
+
+MAX_SLEEP_SECONDS = 300  # re-check now and then in case the clock jumps
+
+
+def parse_deadline(value):
+    """Deadline as a local datetime, from stored epoch seconds, an ISO string or a datetime."""
+    if isinstance(value, (int, float)):
+        return from_epoch(value)
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class AuctionScheduler:
+    def __init__(self):
+        self._heap = []  # (closes_at datetime, lot_id)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop = False
+        self._listeners = []
+        self.loaded = False
+
+    # -------- scheduling --------
+    def load(self):
+        """Schedule every open lot that has a deadline."""
+        rows = fetch_all_shards(
+            "SELECT id, closes_at FROM lots WHERE status = 'open' AND closes_at IS NOT NULL",
+            cached=False,
+        )
+        with self._cond:
+            self._heap = [(parse_deadline(closes_at), lot_id) for lot_id, closes_at in rows]
+            heapq.heapify(self._heap)
+            self.loaded = True
+            self._cond.notify()
+
+    def reset(self):
+        """Drop every deadline; the next get_auction_scheduler() reloads them."""
+        with self._cond:
+            self._heap = []
+            self.loaded = False
+
+    def schedule(self, lot_id, closes_at):
+        """Add (or move up) a lot's deadline; wakes the thread if it is now the earliest."""
+        closes_at = parse_deadline(closes_at)
+        with self._cond:
+            heapq.heappush(self._heap, (closes_at, lot_id))
+            if self._heap[0] == (closes_at, lot_id):
+                self._cond.notify()
+
+    def next_deadline(self):
+        with self._cond:
+            return self._heap[0][0] if self._heap else None
+
+    def on_settle(self, callback):
+        """Register callback(results) run after each settlement batch."""
+        self._listeners.append(callback)
+        return callback
+
+    # -------- settlement --------
+    def _pop_due(self, now):
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[1])
+        return list(dict.fromkeys(due))
+
+    def settle(self, lot_ids, now=None):
+        """
+        Close the given lots (if still open and past deadline), one transaction per shard.
+        Returns [(lot_id, winner_bid_id, winner_phone, winning_amount)] for lots actually closed.
+        """
+        stamp = to_epoch(now or datetime.now())
+        results = []
+        router = get_router()
+        by_shard = {}
+        for lot_id in lot_ids:
+            by_shard.setdefault(router.index_for_lot(lot_id), []).append(lot_id)
+        for index, shard_lots in by_shard.items():
+            self._settle_shard(router.managers[index], shard_lots, stamp, results)
+        for callback in list(self._listeners):
+            try:
+                callback(results)
+            except Exception:
+                pass
+        return results
+
+    def _settle_shard(self, manager, lot_ids, stamp, results):
+        with manager.writer() as conn:
+            for lot_id in lot_ids:
+                winner = conn.execute(
+                    """
+                    SELECT id, COALESCE(user_phone, user_name), bid_amount FROM bids
+                    WHERE lot_id = ? ORDER BY bid_amount DESC, id ASC LIMIT 1
+                    """,
+                    (lot_id,),
+                ).fetchone() or (None, None, None)
+                # Guarded on status/deadline: stale heap entries and other
+                # worker processes settling the same lot are harmless. Status
+                # and winner change in one UPDATE so the journal's lot_closed
+                # event carries the result.
+                closed = conn.execute(
+                    """
+                    UPDATE lots SET status = 'closed', closed_at = ?,
+                        winner_bid_id = ?, winner_phone = ?, winning_amount = ?
+                    WHERE id = ? AND status = 'open' AND closes_at <= ?
+                    """,
+                    (stamp, *winner, lot_id, stamp),
+                ).rowcount
+                if not closed:
+                    continue
+                results.append((lot_id, *winner))
+                record_settlement(conn, lot_id, winner[1], winner[2])
+
+    # -------- thread --------
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stop:
+                    now = datetime.now()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    timeout = MAX_SLEEP_SECONDS
+                    if self._heap:
+                        timeout = min(timeout, (self._heap[0][0] - now).total_seconds())
+                    self._cond.wait(timeout)
+                if self._stop:
+                    return
+                due = self._pop_due(datetime.now())
+            try:
+                self.settle(due)
+            except Exception:
+                # Put them back and retry shortly (e.g. database busy).
+                with self._cond:
+                    retry_at = datetime.now()
+                    for lot_id in due:
+                        heapq.heappush(self._heap, (retry_at, lot_id))
+                    self._cond.wait(1.0)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="auction-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_auction_scheduler() -> AuctionScheduler:
+    """Shared, running AuctionScheduler for this process."""
+    global _scheduler
+    if _scheduler is None or not _scheduler.loaded:
+        with _scheduler_lock:
+            if _scheduler is None:
+                scheduler = AuctionScheduler()
+                scheduler.load()
+                scheduler.start()
+                on_lot_created(scheduler.schedule)  # however a lot is created, its deadline is queued
+                scheduler.on_settle(evict_settled)  # the order book only holds open lots
+                _scheduler = scheduler
+            elif not _scheduler.loaded:
+                _scheduler.load()
+    return _scheduler
+
+
+@on_reset
+def _reset_scheduler():
+    if _scheduler is not None:
+        _scheduler.reset()
@@ -0,0 +1,132 @@
+# =====================================================
+# 🔐 auth.py — Admin Login & Signed Session Tokens
+# =====================================================
+#
+# bcrypt runs once, at login. A successful login issues an HMAC-SHA256 signed,
+# expiring token kept in st.session_state; every later rerun only verifies the
+# signature (microseconds) instead of re-hashing the password. bcrypt itself
+# is imported on the first login, not when a page imports this module.
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+
+import streamlit as st
+
+SESSION_TTL_SECONDS = int(os.getenv("ADMIN_SESSION_TTL", str(8 * 60 * 60)))
+SESSION_KEY = "admin_token"
+
+# Tokens survive restarts only when a secret is configured.
+_SECRET = (os.getenv("FRUITBID_SESSION_SECRET") or "").encode() or secrets.token_bytes(32)
+
+
+_admin_hash = None
+_admin_hash_lock = threading.Lock()
+
+
+def _load_admin_hash() -> bytes:
+    """Read ADMIN_PASSWORD_HASH once; hash the dev default once if it is unset."""
+    global _admin_hash
+    if _admin_hash is None:
+        with _admin_hash_lock:
+            if _admin_hash is None:
+                stored = os.getenv("ADMIN_PASSWORD_HASH")
+                if stored:
+                    _admin_hash = stored.encode()
+                else:
+                    import bcrypt
+                    # Development fallback — never used when a real hash is configured.
+                    _admin_hash = bcrypt.hashpw(b"admin123", bcrypt.gensalt())
+    return _admin_hash
+
+
+# =====================================================
+# 🔑 PASSWORD CHECK (slow path — login only)
+# =====================================================
+def verify_admin_password(password: str) -> bool:
+    import bcrypt
+
+    try:
+        return bcrypt.checkpw((password or "").encode(), _load_admin_hash())
+    except ValueError:
+        return False
+
+
+# =====================================================
+# 🎟️ SESSION TOKENS (fast path — every rerun)
+# =====================================================
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64(hmac.new(_SECRET, payload.encode(), hashlib.sha256).digest())
+
+
+def issue_token(subject: str, role: str = "admin", ttl: int = SESSION_TTL_SECONDS) -> str:
+    payload = _b64(json.dumps(
+        {"sub": subject, "role": role, "exp": int(time.time()) + ttl},
+        separators=(",", ":"),
+    ).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_token(token, role: str = "admin"):
+    """Return the token's claims if it is authentic, unexpired and has `role`; else None."""
+    try:
+        payload, signature = token.split(".", 1)
+    except (AttributeError, ValueError):
+        return None
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        claims = json.loads(_unb64(payload))
+    except ValueError:
+        return None
+    if claims.get("role") != role or claims.get("exp", 0) < time.time():
+        return None
+    return claims
+
+
+def login_admin(password: str, subject: str = "admin"):
+    """Check the password (bcrypt) and return a fresh session token, or None."""
+    if not verify_admin_password(password):
+        return None
+    return issue_token(subject)
+
+
+# =====================================================
+# 🧱 STREAMLIT GATE
+# =====================================================
+def is_admin_session() -> bool:
+    return verify_token(st.session_state.get(SESSION_KEY)) is not None
+
+
+def logout_admin():
+    st.session_state.pop(SESSION_KEY, None)
+
+
+def require_admin():
+    """Render an admin login form and stop the script unless the session holds a valid token."""
+    if is_admin_session():
+        return
+    st.subheader("🔐 Admin Login")
+    with st.form("admin_login_form"):
+        password = st.text_input("Admin password", type="password")
+        submitted = st.form_submit_button("Login")
+    if submitted:
+        token = login_admin(password)
+        if token:
+            st.session_state[SESSION_KEY] = token
+            st.rerun()
+        st.error("❌ Invalid admin password")
+    st.stop()
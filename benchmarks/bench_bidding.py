@@ -0,0 +1,310 @@
+# =====================================================
+# 🏋️ benchmarks/bench_bidding.py — Concurrent Bidder Load Test
+# =====================================================
+#
+# Simulates N bidders and M admins hammering a scratch copy of the schema,
+# with threads (one ConnectionManager, shared writer lock) or processes (one
+# manager per process, so they contend on SQLite's file lock like separate
+# Streamlit workers would).
+#
+#   python benchmarks/bench_bidding.py --bidders 16 --admins 2 --duration 20
+#   python benchmarks/bench_bidding.py --mode processes --out benchmarks/results/peak.json
+#   python benchmarks/bench_bidding.py --compare benchmarks/results/<older>.json
+#
+# Per operation it reports throughput, p50/p95/p99/max latency, lock retries
+# ("database is locked/busy" caught and retried here, on top of SQLite's own
+# busy_timeout) and writes that still failed. Results are saved as JSON under
+# benchmarks/results/ tagged with the git commit, for comparison across commits.
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dal  # noqa: E402
+import db  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+ITEMS = ["Apple", "Banana", "Mango", "Kiwi", "Papaya", "Sapota", "Pineapple", "Grapes"]
+MAX_RETRIES = 5
+RETRY_BACKOFF = 0.01
+
+
+# =====================================================
+# 🧪 SCRATCH DATABASE
+# =====================================================
+def prepare_database(path, lots, bids, profile, shards=1):
+    """Fresh schema at `path` (plus shard files) with `lots` open lots and `bids` seed bids. Returns the lot ids."""
+    for index in range(shards):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db.shard_path(path, index) + suffix):
+                os.remove(db.shard_path(path, index) + suffix)
+    db.configure(path=path, profile=profile, shards=shards)
+    db.init_db()
+    closes_at = datetime.now() + timedelta(days=1)
+    rng = random.Random(0)
+    lot_ids = [
+        db.insert_lot(rng.choice(ITEMS), f"{rng.randint(5, 500)} kg", rng.randint(20, 200), datetime.now(), closes_at)
+        for _ in range(lots)
+    ]
+    by_lot = {}
+    for _ in range(bids):
+        lot_id = rng.choice(lot_ids)
+        by_lot.setdefault(lot_id, []).append(
+            (lot_id, f"90000{rng.randint(0, 999):05d}", rng.randint(20, 300), db.now_epoch())
+        )
+    for lot_id, rows in by_lot.items():
+        with db.lot_write_connection(lot_id) as conn:
+            conn.executemany(
+                "INSERT INTO bids (lot_id, user_phone, bid_amount, timestamp) VALUES (?, ?, ?, ?)", rows
+            )
+    return lot_ids
+
+
+# =====================================================
+# 🎭 OPERATIONS
+# =====================================================
+# Each op mirrors a page-level helper: (name, weight, fn(rng, ctx)).
+def op_place_bid(rng, ctx):
+    # My Bids → insert_bid → OrderBook.place_bid
+    ctx["book"].place_bid(rng.choice(ctx["lot_ids"]), ctx["phone"], rng.randint(20, 400))
+
+
+def op_user_bids(rng, ctx):
+    # My Bids → get_user_bids
+    ctx["book"].bids_by(ctx["phone"])
+
+
+def op_available_lots(rng, ctx):
+    # My Bids → get_available_lots
+    dal.open_lots()
+
+
+def op_lots_page(rng, ctx):
+    # Marketplace → dal.lots_page, sometimes deep or filtered
+    before = rng.choice(ctx["lot_ids"]) if rng.random() < 0.3 else None
+    item = rng.choice(ITEMS) if rng.random() < 0.2 else None
+    dal.lots_page(before_id=before, page_size=20, item=item)
+
+
+def op_add_lot(rng, ctx):
+    # Add Lot → add_lot
+    closes_at = datetime.now() + timedelta(days=1)
+    db.insert_lot(rng.choice(ITEMS), f"{rng.randint(5, 500)} kg", rng.randint(20, 200), datetime.now(), closes_at)
+
+
+def op_row_counts(rng, ctx):
+    # Admin Dashboard → overview
+    db.fetch_all_shards("SELECT table_name, row_count FROM table_stats")
+
+
+def op_browse_bids(rng, ctx):
+    # Admin Dashboard → inspect panel
+    db.fetch_all("SELECT rowid, * FROM bids WHERE rowid > ? ORDER BY rowid LIMIT 50", (rng.randint(0, len(ctx["lot_ids"])),))
+
+
+BIDDER_MIX = [("place_bid", 4, op_place_bid), ("user_bids", 2, op_user_bids),
+              ("available_lots", 2, op_available_lots), ("lots_page", 3, op_lots_page)]
+ADMIN_MIX = [("add_lot", 1, op_add_lot), ("row_counts", 2, op_row_counts), ("browse_bids", 2, op_browse_bids)]
+WRITE_OPS = {"place_bid", "add_lot"}
+
+
+def _is_lock_error(e):
+    message = str(e).lower()
+    return "locked" in message or "busy" in message
+
+
+def run_worker(role, worker_id, config, shared_manager=True):
+    """Run one simulated user until the deadline. Returns {op: record}."""
+    if not shared_manager:
+        # A separate process: its own connections, order book and caches.
+        db.configure(path=config["db"], profile=config["profile"], shards=config["shards"])
+    from orderbook import get_order_book
+
+    rng = random.Random(config["seed"] * 1000 + worker_id)
+    ctx = {"book": get_order_book(), "lot_ids": config["lot_ids"], "phone": f"9{worker_id:09d}"}
+    mix = BIDDER_MIX if role == "bidder" else ADMIN_MIX
+    names = [name for name, _, _ in mix]
+    weights = [weight for _, weight, _ in mix]
+    funcs = {name: fn for name, _, fn in mix}
+    records = {name: {"latencies": [], "retries": 0, "failed": 0} for name in names}
+
+    deadline = time.perf_counter() + config["duration"]
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        record = records[name]
+        for attempt in range(MAX_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                funcs[name](rng, ctx)
+            except sqlite3.OperationalError as e:
+                if _is_lock_error(e) and attempt < MAX_RETRIES:
+                    record["retries"] += 1
+                    time.sleep(RETRY_BACKOFF * (2 ** attempt))
+                    continue
+                record["failed"] += 1
+                break
+            except (sqlite3.Error, ValueError):
+                record["failed"] += 1
+                break
+            record["latencies"].append(time.perf_counter() - start)
+            break
+        if config["think_ms"]:
+            time.sleep(rng.uniform(0, config["think_ms"] / 1000))
+    return records
+
+
+def _process_worker(args):
+    role, worker_id, config = args
+    return run_worker(role, worker_id, config, shared_manager=False)
+
+
+# =====================================================
+# 📊 REPORTING
+# =====================================================
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))  # nearest rank
+    return sorted_values[rank]
+
+
+def summarize(all_records, wall_seconds):
+    merged = {}
+    for records in all_records:
+        for name, record in records.items():
+            into = merged.setdefault(name, {"latencies": [], "retries": 0, "failed": 0})
+            into["latencies"].extend(record["latencies"])
+            into["retries"] += record["retries"]
+            into["failed"] += record["failed"]
+
+    summary = {}
+    for name, record in sorted(merged.items()):
+        lat = sorted(record["latencies"])
+        ms = lambda v: None if v is None else round(v * 1000, 3)  # noqa: E731
+        summary[name] = {
+            "kind": "write" if name in WRITE_OPS else "read",
+            "ops": len(lat),
+            "ops_per_sec": round(len(lat) / wall_seconds, 1),
+            "p50_ms": ms(percentile(lat, 50)),
+            "p95_ms": ms(percentile(lat, 95)),
+            "p99_ms": ms(percentile(lat, 99)),
+            "max_ms": ms(lat[-1] if lat else None),
+            "lock_retries": record["retries"],
+            "failed": record["failed"],
+        }
+    return summary
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(summary, baseline=None):
+    header = f"{'operation':<16}{'ops/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'retries':>9}{'failed':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, row in summary.items():
+        fmt = lambda v: "—" if v is None else f"{v:.2f}"  # noqa: E731
+        line = (f"{name:<16}{row['ops_per_sec']:>9.1f}{fmt(row['p50_ms']):>9}{fmt(row['p95_ms']):>9}"
+                f"{fmt(row['p99_ms']):>9}{fmt(row['max_ms']):>9}{row['lock_retries']:>9}{row['failed']:>8}")
+        old = (baseline or {}).get(name)
+        if old and old.get("p95_ms") and row["p95_ms"] is not None and old.get("ops_per_sec"):
+            line += (f"   Δp95 {100 * (row['p95_ms'] / old['p95_ms'] - 1):+.0f}%"
+                     f"  Δops/s {100 * (row['ops_per_sec'] / old['ops_per_sec'] - 1):+.0f}%")
+        print(line)
+    print("(latencies in ms)")
+
+
+# =====================================================
+# 🚀 MAIN
+# =====================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FruitBid concurrent bidder benchmark")
+    parser.add_argument("--bidders", type=int, default=8)
+    parser.add_argument("--admins", type=int, default=1)
+    parser.add_argument("--mode", choices=("threads", "processes"), default="threads")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per worker")
+    parser.add_argument("--lots", type=int, default=500)
+    parser.add_argument("--seed-bids", type=int, default=5000)
+    parser.add_argument("--shards", type=int, default=1, help="lot shard files (see db.ShardRouter)")
+    parser.add_argument("--profile", choices=sorted(db.PRAGMA_PROFILES), default=db.DB_PROFILE)
+    parser.add_argument("--think-ms", type=float, default=0.0, help="max random pause between ops")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", help="scratch database path (default: a temp file)")
+    parser.add_argument("--out", help="results JSON path (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    args = parser.parse_args(argv)
+
+    scratch = args.db or os.path.join(tempfile.mkdtemp(prefix="fruitbid-bench-"), "bench.db")
+    if os.path.abspath(scratch) == os.path.abspath(os.path.join(ROOT, "fruitbid.db")):
+        parser.error("refusing to benchmark against the live fruitbid.db")
+    lot_ids = prepare_database(scratch, args.lots, args.seed_bids, args.profile, args.shards)
+
+    config = {"db": scratch, "profile": args.profile, "shards": args.shards, "lot_ids": lot_ids,
+              "duration": args.duration,
+              "think_ms": args.think_ms, "seed": args.seed}
+    jobs = [("bidder", i, config) for i in range(args.bidders)]
+    jobs += [("admin", args.bidders + i, config) for i in range(args.admins)]
+
+    print(f"🏋️ {args.bidders} bidders + {args.admins} admins, {args.mode}, {args.shards} shard(s), "
+          f"{args.duration:g}s on {scratch}")
+    started = time.perf_counter()
+    if args.mode == "threads":
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            all_records = list(pool.map(lambda job: run_worker(*job), jobs))
+    else:
+        with multiprocessing.get_context("spawn").Pool(len(jobs)) as pool:
+            all_records = pool.map(_process_worker, jobs)
+    wall = time.perf_counter() - started
+
+    summary = summarize(all_records, wall)
+    result = {
+        "commit": _git_commit(),
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "db")},
+        "wall_seconds": round(wall, 3),
+        "operations": summary,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f).get("operations")
+    print_table(summary, baseline)
+
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(RESULTS_DIR, f"{stamp}-{result['commit'] or 'nogit'}.json")
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"📄 results written to {out}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# =====================================================
+# ⏱️ benchmarks/profile_startup.py — Cold-Start Import Profile
+# =====================================================
+#
+# Runs one page script in a fresh interpreter under `python -X importtime`
+# (Streamlit bare mode, scratch database) and reports what its first render
+# imported and how long each module took:
+#
+#   python benchmarks/profile_startup.py                       # Marketplace
+#   python benchmarks/profile_startup.py app_web.py --top 40
+#   python benchmarks/profile_startup.py "pages/1_🍇_FruitBid_Dashboard.py" --json out.json
+#
+# HEAVY_STACKS lists the dependency families that should only load on the
+# pages that use them; the report says which of them this page pulled in.
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SCRIPT = os.path.join("pages", "2_🏪_Marketplace.py")
+
+HEAVY_STACKS = {
+    "pandas": ("pandas", "numpy"),
+    "pyarrow": ("pyarrow",),
+    "supabase": ("supabase", "gotrue", "postgrest", "realtime", "storage3", "supafunc", "websockets"),
+    "http": ("httpx", "httpcore", "h2", "requests"),
+    "sms": ("sms_queue", "twilio"),
+    "bcrypt": ("bcrypt",),
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+# Executed in the child; the page's own output goes to stdout, timings to stderr.
+_RUNNER = """
+import json, logging, runpy, sys, time
+logging.disable(logging.WARNING)  # bare-mode "missing ScriptRunContext" noise
+started = time.perf_counter()
+try:
+    runpy.run_path(sys.argv[1], run_name="__main__")
+except BaseException as e:  # st.stop() and friends end a bare run early
+    print(f"page stopped: {type(e).__name__}: {e}", file=sys.stderr)
+print("@render " + json.dumps(time.perf_counter() - started), file=sys.stderr)
+"""
+
+
+def parse_importtime(text):
+    """[(module, self_us, cumulative_us, depth)] from `-X importtime` output, in import order."""
+    rows = []
+    for line in text.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def profile_script(script, scratch_dir):
+    """Import rows and render seconds for one cold run of `script`."""
+    env = dict(
+        os.environ,
+        FRUITBID_DB_PATH=os.path.join(scratch_dir, "profile.db"),
+        FRUITBID_SNAPSHOT_DIR=os.path.join(scratch_dir, "snapshots"),
+        FRUITBID_NUTRITION_PATH=os.path.join(scratch_dir, "nutrition.arrow"),
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _RUNNER, script],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    render = None
+    for line in completed.stderr.splitlines():
+        if line.startswith("@render "):
+            render = json.loads(line[len("@render "):])
+        elif line.startswith("page stopped:"):
+            print(f"⚠️ {line}")
+    return parse_importtime(completed.stderr), render
+
+
+def summarize(rows, render, top):
+    by_package = defaultdict(int)
+    for module, self_us, _, _ in rows:
+        by_package[module.split(".")[0]] += self_us
+    loaded = {module.split(".")[0] for module, *_ in rows}
+    stacks = {
+        name: round(sum(by_package.get(package, 0) for package in packages) / 1000, 2)
+        for name, packages in HEAVY_STACKS.items()
+        if loaded.intersection(packages)
+    }
+    return {
+        "modules": len(rows),
+        "import_ms": round(sum(row[1] for row in rows) / 1000, 2),
+        "render_ms": round(render * 1000, 2) if render is not None else None,
+        "heavy_stacks_ms": stacks,
+        "slowest_packages": [
+            {"package": package, "self_ms": round(us / 1000, 2)}
+            for package, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]
+        ],
+        "slowest_modules": [
+            {"module": module, "self_ms": round(self_us / 1000, 2), "cumulative_ms": round(cum_us / 1000, 2)}
+            for module, self_us, cum_us, _ in sorted(rows, key=lambda row: -row[1])[:top]
+        ],
+    }
+
+
+def print_report(script, summary):
+    print(f"⏱️ {script}: {summary['modules']} modules, {summary['import_ms']:.1f} ms importing, "
+          f"first render {summary['render_ms'] if summary['render_ms'] is not None else '—'} ms")
+    print()
+    print(f"{'package':<28}{'self ms':>10}")
+    print("-" * 38)
+    for row in summary["slowest_packages"]:
+        print(f"{row['package']:<28}{row['self_ms']:>10.2f}")
+    print()
+    print(f"{'module':<44}{'self ms':>10}{'cum ms':>10}")
+    print("-" * 64)
+    for row in summary["slowest_modules"]:
+        print(f"{row['module'][:43]:<44}{row['self_ms']:>10.2f}{row['cumulative_ms']:>10.2f}")
+    print()
+    for name in HEAVY_STACKS:
+        cost = summary["heavy_stacks_ms"].get(name)
+        print(f"{name:<10}{'not loaded' if cost is None else f'loaded ({cost:.1f} ms)'}")
+
+
+# =====================================================
+# 🚀 CLI
+# =====================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FruitBid cold-start import profile")
+    parser.add_argument("script", nargs="?", default=DEFAULT_SCRIPT, help="page script, relative to the repo root")
+    parser.add_argument("--top", type=int, default=20, help="rows per table")
+    parser.add_argument("--json", dest="json_out", help="also write the summary as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="fruitbid-profile-") as scratch_dir:
+        rows, render = profile_script(args.script, scratch_dir)
+    if not rows:
+        print("❌ no import timings captured — does the script path exist?")
+        return 1
+    summary = summarize(rows, render, args.top)
+    print_report(args.script, summary)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"script": args.script, **summary}, f, indent=2)
+        print(f"📄 summary written to {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# =====================================================
+# 📡 components/live_bids.py — Live Bid Board (WebSocket)
+# =====================================================
+
+import json
+import os
+
+import streamlit.components.v1 as components
+
+from live_bids import LIVE_PATH, get_live_hub
+
+# Where browsers reach the push service; defaults to the page's host.
+LIVE_PUBLIC_URL = os.getenv("FRUITBID_LIVE_PUBLIC_URL", "")
+
+_TEMPLATE = """
+<style>
+  body { font-family: sans-serif; margin: 0; font-size: 14px; }
+  table { width: 100%; border-collapse: collapse; }
+  td { padding: 4px 8px; border-bottom: 1px solid #eee; }
+  td.num { text-align: right; font-variant-numeric: tabular-nums; }
+  tr.flash { animation: flash 1.2s; }
+  @keyframes flash { from { background: #fff3b0; } to { background: transparent; } }
+  #state { color: #888; font-size: 12px; }
+</style>
+<div id="state">📡 connecting…</div>
+<table id="board"></table>
+<script>
+const lots = __LOTS__;
+const board = document.getElementById("board");
+const state = document.getElementById("state");
+const rows = {};
+for (const [id, name] of lots) {
+  const tr = board.insertRow();
+  tr.insertCell().textContent = `${name} #${id}`;
+  tr.insertCell().className = "num";
+  tr.insertCell().className = "num";
+  tr.cells[1].textContent = "—";
+  rows[id] = tr;
+}
+function render(ev) {
+  const tr = rows[ev.lot_id];
+  if (!tr) return;
+  const closed = ev.type === "closed";
+  tr.cells[1].textContent = ev.high == null ? "no bids" : `₹${ev.high}/kg · ${ev.bidder}`;
+  tr.cells[2].textContent = closed ? "🏁 closed" : `${ev.depth} bid(s)`;
+  if (ev.type !== "snapshot") { tr.classList.remove("flash"); void tr.offsetWidth; tr.classList.add("flash"); }
+}
+function url() {
+  if (__PUBLIC_URL__) return __PUBLIC_URL__ + "__PATH__";
+  let host = "localhost";
+  try { host = window.parent.location.hostname || host; } catch (e) {}
+  const scheme = location.protocol === "https:" ? "wss" : "ws";
+  return `${scheme}://${host}:__PORT____PATH__`;
+}
+let delay = 1000;
+function connect() {
+  const ws = new WebSocket(url());
+  ws.onopen = () => { delay = 1000; state.textContent = "📡 live"; ws.send(JSON.stringify({subscribe: lots.map(l => l[0])})); };
+  ws.onmessage = (m) => render(JSON.parse(m.data));
+  ws.onclose = () => { state.textContent = "📡 reconnecting…"; setTimeout(connect, delay); delay = Math.min(delay * 2, 30000); };
+}
+connect();
+</script>
+"""
+
+
+def render_live_bids(lots, height=None):
+    """
+    One live board for the given [(lot_id, name)] over a single WebSocket.
+    Updates arrive as push messages; the Streamlit script does not rerun.
+    """
+    hub = get_live_hub()
+    if not hub.available or not lots:
+        return
+    html = (
+        _TEMPLATE.replace("__LOTS__", json.dumps([[int(i), str(n)] for i, n in lots]).replace("</", "<\\/"))
+        .replace("__PUBLIC_URL__", json.dumps(LIVE_PUBLIC_URL.rstrip("/")))
+        .replace("__PORT__", str(hub.port))
+        .replace("__PATH__", LIVE_PATH)
+    )
+    components.html(html, height=height or 40 + 30 * len(lots))
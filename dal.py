@@ -0,0 +1,215 @@
+# =====================================================
+# 🧾 dal.py — Named Queries & Lot/Bid/User Records
+# =====================================================
+#
+# Every lot/bid/user read the pages and the SQLite repository make is a named,
+# constant statement below. The same SQL text on every call lets each pooled
+# connection compile a statement once and reuse it from sqlite3's statement
+# cache (db.STATEMENT_CACHE_SIZE). Id lists are bound as one JSON array via
+# json_each, so a batch of 3 ids and a batch of 300 share one statement.
+#
+# Rows are built directly into Lot / Bid / User records by the cursor's
+# row_factory, and the query cache keeps the built records. They are
+# namedtuples: no per-row __dict__, fields by name, still unpackable.
+# Times are epoch seconds (db.format_epoch renders them).
+
+import itertools
+import json
+from collections import namedtuple
+
+from db import fetch_all_shards, fetch_one, write_connection
+
+LOT_COLUMNS = ("id", "item_name", "quantity", "base_price", "date_added",
+               "closes_at", "status", "winner_phone", "winning_amount", "quantity_value", "unit")
+BID_COLUMNS = ("id", "lot_id", "user_phone", "user_name", "bid_amount", "timestamp")
+USER_COLUMNS = ("id", "name", "phone", "verified")
+
+
+# =====================================================
+# 🧱 RECORDS
+# =====================================================
+class _Record:
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """sqlite3 row_factory."""
+        return cls._make(row)
+
+
+class Lot(_Record, namedtuple("Lot", LOT_COLUMNS)):
+    __slots__ = ()
+
+    @property
+    def is_open(self):
+        return self.status == "open"
+
+    @property
+    def quantity_label(self):
+        """'10 kg' / '2 crate' from the parsed columns; the raw text if it did not parse."""
+        if self.quantity_value is None:
+            return self.quantity or "—"
+        return f"{self.quantity_value:g} {self.unit}"
+
+
+class Bid(_Record, namedtuple("Bid", BID_COLUMNS)):
+    __slots__ = ()
+
+    @property
+    def bidder(self):
+        """Phone if known, else name — the key the order book and aggregates use."""
+        return self.user_phone if self.user_phone is not None else self.user_name
+
+
+class User(_Record, namedtuple("User", USER_COLUMNS)):
+    __slots__ = ()
+
+
+# =====================================================
+# 📜 QUERIES
+# =====================================================
+_LOTS = f"SELECT {', '.join(LOT_COLUMNS)} FROM lots"
+_BIDS = f"SELECT {', '.join(BID_COLUMNS)} FROM bids"
+_USERS = f"SELECT {', '.join(USER_COLUMNS)} FROM users"
+
+QUERIES = {
+    "lots.any": "SELECT 1 FROM lots LIMIT 1",
+    "lots.by_ids": f"{_LOTS} WHERE id IN (SELECT value FROM json_each(?))",
+    "lots.open_by_deadline": f"{_LOTS} WHERE status = 'open' ORDER BY closes_at IS NULL, closes_at, id DESC LIMIT ?",
+    "lots.names": "SELECT id, item_name FROM lots",
+    "bids.for_lots": f"{_BIDS} WHERE lot_id IN (SELECT value FROM json_each(?)) ORDER BY bid_amount DESC, id ASC",
+    "bids.by_phone": f"{_BIDS} WHERE user_phone = ? ORDER BY timestamp DESC, id DESC",
+    "bids.by_name": f"{_BIDS} WHERE user_name = ? ORDER BY timestamp DESC, id DESC",
+    "users.by_phone": f"{_USERS} WHERE phone = ?",
+    # An explicit existence check rather than ON CONFLICT, which needs a
+    # UNIQUE(phone) that legacy users tables don't have.
+    "users.add_new": """
+        INSERT INTO users (name, phone, verified) SELECT ?, ?, ?
+        WHERE NOT EXISTS (SELECT 1 FROM users WHERE phone = ?)
+    """,
+}
+
+# Keyset page of lots, newest first: one fixed statement per combination of
+# filters in use (before_id, item, min_price, max_price, min_kg), never built
+# per call.
+_PAGE_FILTERS = ("id < ?", "item_name LIKE ?", "base_price >= ?", "base_price <= ?",
+                 "unit = 'kg' AND quantity_value >= ?")
+for _flags in itertools.product((False, True), repeat=len(_PAGE_FILTERS)):
+    _clauses = [clause for clause, used in zip(_PAGE_FILTERS, _flags) if used]
+    _where = f" WHERE {' AND '.join(_clauses)}" if _clauses else ""
+    QUERIES["lots.page" + "".join("1" if used else "0" for used in _flags)] = (
+        f"{_LOTS}{_where} ORDER BY id DESC LIMIT ?"
+    )
+del _flags, _clauses, _where
+
+NO_LIMIT = -1  # SQLite's LIMIT for "all rows"
+
+
+def _ids(values):
+    return json.dumps(list(dict.fromkeys(int(v) for v in values)))
+
+
+def _newest_first(record):
+    return record.id
+
+
+def _placed_order(bid):
+    return (bid.timestamp or 0, bid.id)
+
+
+def _deadline_order(lot):
+    return (lot.closes_at is None, lot.closes_at or 0, -lot.id)
+
+
+# =====================================================
+# 🍎 LOTS
+# =====================================================
+def has_lots(cached=True) -> bool:
+    return bool(fetch_all_shards(QUERIES["lots.any"], cached=cached))
+
+
+def lots_page(before_id=None, page_size=20, item=None, min_price=None, max_price=None, min_kg=None):
+    """
+    One page of lots, newest first, seeking on id instead of OFFSET so every
+    page costs the same no matter how deep it is.
+    Returns ([Lot], next_before_id); next_before_id is None on the last page.
+    page_size=None returns every remaining lot.
+    """
+    filters = (before_id, f"%{item}%" if item else None, min_price, max_price, min_kg)
+    name = "lots.page" + "".join("0" if value is None else "1" for value in filters)
+    params = [value for value in filters if value is not None]
+
+    # Ask for one extra row to learn whether another page exists. Each shard
+    # returns its newest page_size + 1; merging on id gives the global page.
+    fetch = NO_LIMIT if page_size is None else page_size + 1
+    lots = fetch_all_shards(
+        QUERIES[name], (*params, fetch),
+        key=_newest_first, reverse=True, limit=None if page_size is None else fetch,
+        row_factory=Lot.from_row,
+    )
+    if page_size is not None and len(lots) > page_size:
+        lots = lots[:page_size]
+        return lots, lots[-1].id
+    return lots, None
+
+
+def newest_lots(limit=None, before_id=None):
+    """[Lot] newest first; every lot when limit is None."""
+    return lots_page(before_id=before_id, page_size=limit)[0]
+
+
+def open_lots(limit=None):
+    """[Lot] still open for bidding, soonest closing first (no deadline last)."""
+    return fetch_all_shards(
+        QUERIES["lots.open_by_deadline"], (NO_LIMIT if limit is None else limit,),
+        key=_deadline_order, limit=limit, row_factory=Lot.from_row,
+    )
+
+
+def lots_by_ids(lot_ids) -> dict:
+    """{lot_id: Lot} for the ids that exist."""
+    lots = fetch_all_shards(QUERIES["lots.by_ids"], (_ids(lot_ids),), row_factory=Lot.from_row)
+    return {lot.id: lot for lot in lots}
+
+
+def lot_names_by_id() -> dict:
+    """{lot_id: item_name} for every lot."""
+    return dict(fetch_all_shards(QUERIES["lots.names"]))
+
+
+# =====================================================
+# 💰 BIDS
+# =====================================================
+def bids_for_lots(lot_ids) -> dict:
+    """{lot_id: [Bid] best first} — one statement per shard however many lots."""
+    grouped = {}
+    for bid in fetch_all_shards(QUERIES["bids.for_lots"], (_ids(lot_ids),), row_factory=Bid.from_row):
+        grouped.setdefault(bid.lot_id, []).append(bid)
+    return grouped
+
+
+def bids_by_phone(user_phone):
+    """[Bid] placed from one phone number, newest first across shards."""
+    return fetch_all_shards(
+        QUERIES["bids.by_phone"], (user_phone,), key=_placed_order, reverse=True, row_factory=Bid.from_row
+    )
+
+
+def bids_by_name(user_name):
+    """[Bid] placed under one name, newest first across shards."""
+    return fetch_all_shards(
+        QUERIES["bids.by_name"], (user_name,), key=_placed_order, reverse=True, row_factory=Bid.from_row
+    )
+
+
+# =====================================================
+# 👤 USERS
+# =====================================================
+def get_user(phone):
+    return fetch_one(QUERIES["users.by_phone"], (phone,), row_factory=User.from_row)
+
+
+def add_users(rows):
+    """Insert (name, phone, verified) rows whose phone isn't registered yet, in one transaction."""
+    with write_connection() as conn:
+        conn.executemany(QUERIES["users.add_new"], [(name, phone, verified, phone) for name, phone, verified in rows])
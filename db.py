@@ -1,15 +1,601 @@
 # db.py
+import heapq
+import itertools
+import os
+import queue
+import re
 import sqlite3
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 import time
 
-DB_PATH = "fruitbid.db"
+DB_PATH = os.getenv("FRUITBID_DB_PATH", "fruitbid.db")
+
+# --------------------------
+# Connection Profiles
+# --------------------------
+# synchronous / cache_size (negative = KiB) / mmap_size (bytes) per profile.
+# "balanced" is the default: WAL + NORMAL is durable against app crashes and
+# only loses the last commits on power loss.
+PRAGMA_PROFILES = {
+    "safe": {"synchronous": "FULL", "cache_size": -8000, "mmap_size": 0},
+    "balanced": {"synchronous": "NORMAL", "cache_size": -16000, "mmap_size": 64 * 1024 * 1024},
+    "fast": {"synchronous": "OFF", "cache_size": -64000, "mmap_size": 256 * 1024 * 1024},
+}
+
+DB_PROFILE = os.getenv("FRUITBID_DB_PROFILE", "balanced")
+READER_POOL_SIZE = int(os.getenv("FRUITBID_DB_READERS", "4"))
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256  # prepared statements kept per connection (sqlite3 default: 128)
+QUERY_CACHE_MB = float(os.getenv("FRUITBID_QUERY_CACHE_MB", "32"))
+QUERY_CACHE_ENTRIES = int(os.getenv("FRUITBID_QUERY_CACHE_ENTRIES", "512"))
+SHARD_COUNT = int(os.getenv("FRUITBID_SHARDS", "1"))
+DEFAULT_AUCTION_HOURS = 24  # deadline for lots created without one
+
+
+# --------------------------
+# Query Result Cache
+# --------------------------
+def _approx_size(rows):
+    """Rough in-memory size of a result set (list of tuples of scalars)."""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row)
+    return size
+
+
+class QueryCache:
+    """
+    LRU cache of read results shared by every session in the process.
+    Entries belong to one database "generation"; any commit (ours, counted by
+    the writer, or another process's, seen via PRAGMA data_version) starts a
+    new generation and drops the whole cache.
+    """
+
+    def __init__(self, max_bytes, max_entries):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (sql, params) -> (rows, size)
+        self._bytes = 0
+        self._generation = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, generation):
+        with self._lock:
+            if generation != self._generation:
+                self._reset(generation)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, generation, rows):
+        size = _approx_size(rows)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return  # a write landed while the query ran; don't cache stale rows
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (rows, size)
+            self._bytes += size
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def _reset(self, generation):
+        self._entries.clear()
+        self._bytes = 0
+        self._generation = generation
+
+    def clear(self):
+        with self._lock:
+            self._reset(None)
+
+
+# --------------------------
+# Connection Manager
+# --------------------------
+class ConnectionManager:
+    """
+    Process-wide SQLite access: one writer connection behind a lock and a
+    pool of read-only connections, all in WAL mode so readers never block
+    the writer (or each other).
+    """
+
+    def __init__(self, path=DB_PATH, profile=DB_PROFILE, readers=READER_POOL_SIZE):
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Unknown DB profile '{profile}'. Choose from {sorted(PRAGMA_PROFILES)}")
+        self.path = path
+        self.profile = profile
+        self.pool_size = max(1, readers)
+        self._pragmas = PRAGMA_PROFILES[profile]
+        self._writer = None
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        self._readers = queue.LifoQueue(maxsize=self.pool_size)
+        self._opened_readers = 0
+        self._open_lock = threading.Lock()
+        self._closed = False
+        self._write_count = 0
+        self._probe = None
+        self._probe_lock = threading.Lock()
+        self.cache = QueryCache(int(QUERY_CACHE_MB * 1024 * 1024), QUERY_CACHE_ENTRIES)
+
+    def _apply_pragmas(self, conn):
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA cache_size = {int(self._pragmas['cache_size'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(self._pragmas['mmap_size'])}")
+        conn.execute("PRAGMA foreign_keys = ON")
+
+    def _writer_conn(self):
+        """Open the single writer lazily; it also creates the file and enables WAL."""
+        if self._writer is None:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection manager is closed")
+            conn = sqlite3.connect(
+                self.path,
+                timeout=BUSY_TIMEOUT_MS / 1000,
+                check_same_thread=False,
+                isolation_level=None,
+                cached_statements=STATEMENT_CACHE_SIZE,
+            )
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(f"PRAGMA synchronous = {self._pragmas['synchronous']}")
+            self._apply_pragmas(conn)
+            self._writer = conn
+        return self._writer
+
+    def _open_reader(self):
+        uri = f"file:{os.path.abspath(self.path)}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        self._apply_pragmas(conn)
+        return conn
+
+    def _checkout_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._open_lock:
+            if self._opened_readers < self.pool_size:
+                # Make sure the file exists and is in WAL mode before opening read-only.
+                with self._write_lock:
+                    self._writer_conn()
+                conn = self._open_reader()
+                self._opened_readers += 1
+                return conn
+        try:
+            return self._readers.get(timeout=BUSY_TIMEOUT_MS / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError("No reader connection available (pool exhausted)")
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection from the pool."""
+        conn = self._checkout_reader()
+        try:
+            yield conn
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                self._readers.put(conn)
+
+    @contextmanager
+    def writer(self):
+        """
+        Hold the writer inside one IMMEDIATE transaction.
+        Commits on success, rolls back on error. Nested use joins the outer transaction.
+        """
+        with self._write_lock:
+            conn = self._writer_conn()
+            if self._write_depth:
+                self._write_depth += 1
+                try:
+                    yield conn
+                finally:
+                    self._write_depth -= 1
+                return
+
+            conn.execute("BEGIN IMMEDIATE")
+            self._write_depth = 1
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+                self._write_count += 1
+            finally:
+                self._write_depth = 0
+
+    def generation(self):
+        """
+        Token that changes whenever the database may have changed:
+        our own commits bump the write counter, and a dedicated read-only
+        probe's PRAGMA data_version moves on any other connection's commit.
+        """
+        with self._probe_lock:
+            if self._probe is None:
+                with self._write_lock:
+                    self._writer_conn()
+                self._probe = self._open_reader()
+            data_version = self._probe.execute("PRAGMA data_version").fetchone()[0]
+        return self._write_count, data_version
+
+    @contextmanager
+    def maintenance(self):
+        """
+        Hold the writer with foreign keys off (no transaction) for table rebuilds.
+        Use writer() inside it for the actual transactions.
+        """
+        with self._write_lock:
+            conn = self._writer_conn()
+            conn.execute("PRAGMA foreign_keys = OFF")
+            try:
+                yield conn
+            finally:
+                conn.execute("PRAGMA foreign_keys = ON")
+
+    def close(self):
+        """Close every pooled connection (used on reset/reconfigure)."""
+        self._closed = True
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._probe_lock:
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
+        self.cache.clear()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager():
+    """Return the shared ConnectionManager, creating it on first use."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ConnectionManager()
+    return _manager
+
+
+# Modules that keep state derived from the database (the order book, the
+# scheduler heap, the settings snapshot, ...) register here and drop or mark
+# it stale whenever configure()/reset_database() points at a different file.
+_reset_hooks = []
+
+
+def on_reset(callback):
+    """Register callback() run after the shared database is swapped or reset."""
+    _reset_hooks.append(callback)
+    return callback
+
+
+def configure(path=None, profile=None, readers=None, shards=None):
+    """Swap the shared manager for one with a different file/profile/pool size/shard count."""
+    global _manager, _router, DB_PATH, SHARD_COUNT
+    with _once_lock:
+        _once_done.clear()  # a different database has to be bootstrapped again
+    with _manager_lock:
+        old, old_router = _manager, _router
+        if path is not None:
+            DB_PATH = path
+        if shards is not None:
+            SHARD_COUNT = shards
+        _manager = ConnectionManager(
+            path=DB_PATH,
+            profile=profile or (old.profile if old else DB_PROFILE),
+            readers=readers or (old.pool_size if old else READER_POOL_SIZE),
+        )
+        _router = None
+    if old_router is not None:
+        old_router.close()
+    elif old is not None:
+        old.close()
+    for callback in list(_reset_hooks):
+        callback()
+    return _manager
+
+
+def read_connection():
+    """Context manager yielding a pooled read-only connection."""
+    return get_manager().reader()
+
+
+def write_connection():
+    """Context manager yielding the writer inside a transaction."""
+    return get_manager().writer()
+
+
+def maintenance_connection():
+    """Context manager holding the writer with foreign keys disabled (migrations)."""
+    return get_manager().maintenance()
+
+
+# --------------------------
+# Stored Formats (times & quantities)
+# --------------------------
+# Times are stored as integer Unix epoch seconds, so range filters and
+# ORDER BY on them are plain integer index scans. Lot quantities are parsed
+# once, on write, into quantity_value + unit; the text as entered is kept
+# in `quantity` for display.
+def now_epoch():
+    return int(time.time())
+
+
+def to_epoch(value):
+    """Epoch seconds for a datetime, an ISO-8601 string or a number; None stays None."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp())
+
+
+def from_epoch(seconds):
+    """Local datetime for stored epoch seconds (None stays None)."""
+    return None if seconds is None else datetime.fromtimestamp(seconds)
+
+
+def format_epoch(seconds, fmt="%Y-%m-%d %H:%M", missing="—"):
+    return missing if seconds is None else datetime.fromtimestamp(seconds).strftime(fmt)
+
+
+# word -> (stored unit, factor); mass is normalised to kg.
+QUANTITY_UNITS = {
+    **dict.fromkeys(("kg", "kgs", "kilo", "kilos", "kilogram", "kilograms"), ("kg", 1.0)),
+    **dict.fromkeys(("g", "gm", "gms", "gram", "grams"), ("kg", 0.001)),
+    **dict.fromkeys(("q", "qtl", "quintal", "quintals"), ("kg", 100.0)),
+    **dict.fromkeys(("t", "ton", "tons", "tonne", "tonnes"), ("kg", 1000.0)),
+    **dict.fromkeys(("crate", "crates"), ("crate", 1.0)),
+    **dict.fromkeys(("box", "boxes"), ("box", 1.0)),
+    **dict.fromkeys(("dozen", "dozens"), ("dozen", 1.0)),
+    **dict.fromkeys(("pc", "pcs", "piece", "pieces"), ("piece", 1.0)),
+}
+_QUANTITY = re.compile(r"^\s*(\d+(?:\.\d+)?)(?![.,]?\d)\s*([a-z]*)", re.IGNORECASE)
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+
+
+def parse_quantity(text):
+    """
+    (quantity_value, unit) for free-text quantities: '10 kg' -> (10.0, 'kg'),
+    '500 g' -> (0.5, 'kg'), '1,000 kg' -> (1000.0, 'kg'), '1 crate' -> (1.0, 'crate').
+    A bare number is kg; text that does not start with a whole number
+    (e.g. '1,5 kg') gives (None, None).
+    """
+    if text is None:
+        return None, None
+    if isinstance(text, (int, float)):
+        return float(text), "kg"
+    match = _QUANTITY.match(_THOUSANDS.sub("", text))
+    if not match:
+        return None, None
+    value, word = float(match.group(1)), match.group(2).lower()
+    unit, factor = QUANTITY_UNITS.get(word, (word, 1.0)) if word else ("kg", 1.0)
+    return value * factor, unit
+
+
+# --------------------------
+# Storage Router (lot shards)
+# --------------------------
+def shard_path(base_path, index):
+    """File for shard `index`; shard 0 is the main database itself."""
+    if index == 0:
+        return base_path
+    root, ext = os.path.splitext(base_path)
+    return f"{root}.shard{index}{ext or '.db'}"
+
+
+# Tables whose rows are split across shards; every other table is only
+# used in shard 0 (the other shards carry it empty, from the shared schema).
+SHARDED_TABLES = ("lots", "bids", "bid_events", "user_stats")
+
+
+class ShardRouter:
+    """
+    Lots and their bids are partitioned across SHARD_COUNT SQLite files, each
+    with its own writer, so bids on different shards never queue on one lock.
+    Everything else (users, settings, OTPs, ...) stays in shard 0, the main file.
+
+    A lot lives in shard `lot_id % count`: new lots are given an id from their
+    shard's residue class, so any lot id routes without a lookup. Which shard
+    a new lot goes to is a stable hash of its market/region key, or round-robin.
+    """
+
+    def __init__(self, main, count=SHARD_COUNT):
+        self.count = max(1, count)
+        self.managers = [main] + [
+            ConnectionManager(path=shard_path(main.path, i), profile=main.profile, readers=main.pool_size)
+            for i in range(1, self.count)
+        ]
+        self._next = itertools.count()
+
+    # -------- routing --------
+    def index_for_lot(self, lot_id):
+        return int(lot_id) % self.count
+
+    def for_lot(self, lot_id) -> ConnectionManager:
+        return self.managers[self.index_for_lot(lot_id)]
+
+    def index_for_key(self, key=None):
+        """Shard for a new lot: crc32 of its market/region key, else round-robin."""
+        if self.count == 1:
+            return 0
+        if key is None:
+            return next(self._next) % self.count
+        return zlib.crc32(str(key).encode()) % self.count
+
+    def allocate_lot_id(self, conn, index):
+        """Next free lot id in shard `index`'s residue class (call inside its writer)."""
+        if self.count == 1:
+            return None  # plain AUTOINCREMENT
+        top = conn.execute("SELECT COALESCE(MAX(id), 0) FROM lots").fetchone()[0]
+        candidate = top + 1
+        return candidate + (index - candidate) % self.count
+
+    # -------- fan-out --------
+    def fetch_each(self, query, params=(), cached=True, row_factory=None):
+        """Run a read on every shard; returns one row list per shard."""
+        return [_fetch(manager, query, params, cached, row_factory) for manager in self.managers]
+
+    def fetch_merged(self, query, params=(), key=None, reverse=False, limit=None, cached=True, row_factory=None):
+        """
+        Run a read on every shard and merge the results. Each shard's rows must
+        already be ordered by `key` (with `reverse` matching the SQL ORDER BY).
+        """
+        parts = self.fetch_each(query, params, cached, row_factory)
+        if key is None:
+            merged = itertools.chain.from_iterable(parts)
+        else:
+            merged = heapq.merge(*parts, key=key, reverse=reverse)
+        return list(itertools.islice(merged, limit))
+
+    def rebalance(self):
+        """
+        Move lots (and their bids) whose id routes elsewhere — e.g. rows created
+        before sharding was enabled. Returns the number of lots moved.
+        """
+        moved = 0
+        if self.count == 1:
+            return moved
+        for index, manager in enumerate(self.managers):
+            with manager.writer() as source:
+                stray = source.execute(
+                    "SELECT * FROM lots WHERE id % ? != ?", (self.count, index)
+                ).fetchall()
+                if not stray:
+                    continue
+                lot_cols = [d[0] for d in source.execute("SELECT * FROM lots LIMIT 0").description]
+                bid_cols = [d[0] for d in source.execute("SELECT * FROM bids LIMIT 0").description]
+                for lot in stray:
+                    lot_id = lot[0]
+                    bids = source.execute("SELECT * FROM bids WHERE lot_id = ?", (lot_id,)).fetchall()
+                    with self.for_lot(lot_id).writer() as target:
+                        target.execute(
+                            f"INSERT INTO lots ({', '.join(lot_cols)}) VALUES ({', '.join('?' * len(lot_cols))})",
+                            lot,
+                        )
+                        target.executemany(
+                            f"INSERT INTO bids ({', '.join(bid_cols[1:])}) VALUES ({', '.join('?' * (len(bid_cols) - 1))})",
+                            [bid[1:] for bid in bids],
+                        )
+                    source.execute("DELETE FROM bids WHERE lot_id = ?", (lot_id,))
+                    source.execute("DELETE FROM lots WHERE id = ?", (lot_id,))
+                    moved += 1
+        return moved
+
+    def close(self):
+        for manager in self.managers:
+            manager.close()
+
+
+_router = None
+
+
+def get_router() -> ShardRouter:
+    """Return the shared ShardRouter (shard 0 is the main manager)."""
+    global _router
+    if _router is None:
+        main = get_manager()
+        with _manager_lock:
+            if _router is None:
+                _router = ShardRouter(main, SHARD_COUNT)
+    return _router
+
+
+def lot_read_connection(lot_id):
+    """Pooled read-only connection on the shard that holds `lot_id`."""
+    return get_router().for_lot(lot_id).reader()
+
+
+def lot_write_connection(lot_id):
+    """Writer transaction on the shard that holds `lot_id`."""
+    return get_router().for_lot(lot_id).writer()
+
+
+def fetch_all_shards(query, params=(), key=None, reverse=False, limit=None, cached=True, row_factory=None):
+    """Read-only fan-out over every lot shard, merged (see ShardRouter.fetch_merged)."""
+    return get_router().fetch_merged(query, params, key=key, reverse=reverse, limit=limit,
+                                     cached=cached, row_factory=row_factory)
+
+
+_lot_listeners = []
+
+
+def on_lot_created(callback):
+    """Register callback(lot_id, closes_at epoch) run after each insert_lot() commits."""
+    _lot_listeners.append(callback)
+    return callback
+
+
+def insert_lot(item_name, quantity, base_price, date_added, closes_at=None, market=None):
+    """
+    Create a lot on the shard chosen for `market` and return its id.
+    date_added/closes_at may be datetimes, ISO strings or epoch seconds;
+    without closes_at the auction runs DEFAULT_AUCTION_HOURS from now.
+    """
+    router = get_router()
+    index = router.index_for_key(market)
+    quantity_value, unit = parse_quantity(quantity)
+    closes_at = to_epoch(closes_at)
+    if closes_at is None:
+        closes_at = now_epoch() + DEFAULT_AUCTION_HOURS * 3600
+    with router.managers[index].writer() as conn:
+        lot_id = router.allocate_lot_id(conn, index)
+        lot_id = conn.execute(
+            """
+            INSERT INTO lots (id, item_name, quantity, quantity_value, unit, base_price, date_added, closes_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (lot_id, item_name, None if quantity is None else str(quantity), quantity_value, unit,
+             base_price, to_epoch(date_added), closes_at),
+        ).lastrowid
+    for callback in list(_lot_listeners):
+        callback(lot_id, closes_at)
+    return lot_id
+
 
 # --------------------------
 # Safe Connection Handler
 # --------------------------
 def get_db_connection(retries=3, delay=0.2):
-    """Get SQLite connection with retry for busy DB."""
+    """
+    Standalone SQLite connection with retry for busy DB.
+    Only for one-off scripts — app code should use read_connection/write_connection.
+    """
     for _ in range(retries):
         try:
             conn = sqlite3.connect(DB_PATH, timeout=5, check_same_thread=False)
@@ -22,109 +608,155 @@ def get_db_connection(retries=3, delay=0.2):
                 raise
     raise Exception("Database connection failed after retries")
 
+
+def reset_database():
+    """Close pooled connections and delete the database and shard files (plus WAL/SHM)."""
+    router = get_router()
+    router.close()
+    for manager in router.managers:
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(manager.path + suffix)
+            except FileNotFoundError:
+                pass
+    configure()
+
 # --------------------------
 # Schema Initialization
 # --------------------------
 def init_db():
-    """Create all required tables if they don't exist."""
-    conn = get_db_connection()
-    c = conn.cursor()
+    """Create all required tables and bring the schema up to date (see migrations.py)."""
+    from migrations import migrate, record_fingerprint, schema_fingerprint
 
     try:
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                phone TEXT UNIQUE
-            )
-        """)
-
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS lots (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_name TEXT NOT NULL,
-                quantity TEXT,
-                base_price REAL NOT NULL,
-                date_added TEXT
-            )
-        """)
-
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS bids (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                lot_id INTEGER NOT NULL,
-                bid_amount REAL NOT NULL,
-                timestamp TEXT,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY (lot_id) REFERENCES lots(id) ON DELETE CASCADE
-            )
-        """)
-
-        # Optional meta table for version tracking
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS meta (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        """)
-
-        conn.commit()
+        # Every shard carries the full schema, so lot/bid triggers and
+        # aggregates work the same wherever a lot lives.
+        router = get_router()
+        for manager in router.managers:
+            migrate(manager=manager)
+        router.rebalance()
+        fingerprint = schema_fingerprint(router.count)
+        for manager in router.managers:
+            with manager.writer() as conn:
+                record_fingerprint(conn, fingerprint)
     except Exception as e:
-        conn.rollback()
         raise Exception(f"Error creating tables: {str(e)}")
-    finally:
-        conn.close()
+
+
+def _schema_is_current():
+    """True when every shard's stored fingerprint matches — reads only, no writer lock."""
+    from migrations import read_fingerprint, schema_fingerprint
+
+    router = get_router()
+    expected = schema_fingerprint(router.count)
+    try:
+        for manager in router.managers:
+            with manager.reader() as conn:
+                if read_fingerprint(conn) != expected:
+                    return False
+    except sqlite3.Error:  # e.g. a shard file that does not exist yet
+        return False
+    return True
+
+
+def _bootstrap_schema():
+    if not _schema_is_current():
+        init_db()
+
+
+def bootstrap():
+    """
+    Page-level schema setup: the first call in a process checks the stored
+    fingerprints and migrates only if they are stale; later reruns return at once.
+    """
+    run_once("schema", _bootstrap_schema)
+
+
+# --------------------------
+# Once-per-process Setup
+# --------------------------
+_once_done = set()
+_once_lock = threading.RLock()
+
+
+def run_once(key, fn):
+    """
+    Call fn() the first time `key` is seen in this process (or since the last
+    configure()). Returns True if it ran. A failing fn() is retried next call.
+    """
+    if key in _once_done:
+        return False
+    with _once_lock:
+        if key in _once_done:
+            return False
+        fn()
+        _once_done.add(key)
+        return True
 
 # --------------------------
 # Insert Sample Lots
 # --------------------------
 def initialize_items():
     """Insert sample lots if table is empty."""
-    conn = get_db_connection()
-    c = conn.cursor()
-
     try:
-        c.execute("SELECT COUNT(*) FROM lots")
-        count = c.fetchone()[0]
-
-        if count == 0:
-            now = datetime.now().strftime("%Y-%m-%d %H:%M")
+        if not fetch_all_shards("SELECT 1 FROM lots LIMIT 1", cached=False):
+            now = now_epoch()
             sample_data = [
                 ("Mango", "10 kg", 50, now),
                 ("Banana", "20 kg", 30, now),
                 ("Papaya", "15 kg", 40, now),
             ]
-            c.executemany(
-                """
-                INSERT INTO lots (item_name, quantity, base_price, date_added)
-                VALUES (?, ?, ?, ?)
-                """,
-                sample_data
-            )
-            conn.commit()
+            for row in sample_data:
+                insert_lot(*row)
     except Exception as e:
-        conn.rollback()
         raise Exception(f"Error inserting items: {str(e)}")
-    finally:
-        conn.close()
 
 # --------------------------
 # Utility for Clean Queries
 # --------------------------
-def fetch_all(query, params=()):
-    """Fetch multiple rows safely."""
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute(query, params)
-    rows = c.fetchall()
-    conn.close()
-    return rows
+def _execute(manager, query, params, row_factory):
+    with manager.reader() as conn:
+        if row_factory is None:
+            return conn.execute(query, params).fetchall()
+        cursor = conn.cursor()
+        cursor.row_factory = row_factory
+        return cursor.execute(query, params).fetchall()
+
+
+def _fetch(manager, query, params=(), cached=True, row_factory=None):
+    if not cached:
+        return _execute(manager, query, params, row_factory)
+
+    # Rows are cached already built, so a repeat read does no per-row work.
+    key = (query, tuple(params), row_factory)
+    generation = manager.generation()
+    rows = manager.cache.get(key, generation)
+    if rows is None:
+        rows = _execute(manager, query, params, row_factory)
+        manager.cache.put(key, generation, rows)
+    return list(rows)
+
+
+def fetch_all(query, params=(), cached=True, row_factory=None):
+    """
+    Fetch multiple rows safely.
+    Results are served from the shared query cache until the next write;
+    pass cached=False for queries that depend on the clock (e.g. 'now').
+    `row_factory(cursor, row)` builds each row, as with sqlite3.
+    """
+    return _fetch(get_manager(), query, params, cached, row_factory)
+
+def fetch_one(query, params=(), cached=True, row_factory=None):
+    """Fetch a single row (or None)."""
+    rows = fetch_all(query, params, cached=cached, row_factory=row_factory)
+    return rows[0] if rows else None
 
 def execute_query(query, params=()):
-    """Execute INSERT/UPDATE safely."""
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute(query, params)
-    conn.commit()
-    conn.close()
+    """Execute INSERT/UPDATE safely. Returns the last inserted rowid."""
+    with write_connection() as conn:
+        return conn.execute(query, params).lastrowid
+
+def execute_many(query, seq_of_params):
+    """Execute one statement for many parameter tuples in a single transaction."""
+    with write_connection() as conn:
+        conn.executemany(query, seq_of_params)
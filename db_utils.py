@@ -0,0 +1,164 @@
+# =====================================================
+# ⚙️ db_utils.py — Cached Settings Store
+# =====================================================
+#
+# Settings live in the `settings` table as (key, value, type). The whole table
+# is loaded once into an in-process snapshot; get_setting() is a dict lookup
+# and never touches SQLite. Only set_setting()/delete_setting() invalidate,
+# by bumping meta('settings_version') and swapping in a new snapshot.
+
+import json
+import threading
+from datetime import datetime
+
+from db import fetch_all, fetch_one, on_reset, write_connection
+
+SETTINGS_VERSION_KEY = "settings_version"
+
+_DECODERS = {
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": lambda v: v in ("1", "true", "True"),
+    "json": json.loads,
+}
+
+
+def _encode(value):
+    """Return (text, type) for storing a Python value."""
+    if isinstance(value, bool):
+        return ("1" if value else "0"), "bool"
+    if isinstance(value, int):
+        return str(value), "int"
+    if isinstance(value, float):
+        return repr(value), "float"
+    if isinstance(value, str):
+        return value, "str"
+    return json.dumps(value), "json"
+
+
+def _decode(text, kind):
+    if text is None:
+        return None
+    return _DECODERS.get(kind, str)(text)
+
+
+# =====================================================
+# 🗃️ SNAPSHOT
+# =====================================================
+_snapshot = None
+_version = None
+_lock = threading.RLock()
+_subscribers = []
+
+
+def _stored_version():
+    row = fetch_one("SELECT value FROM meta WHERE key = ?", (SETTINGS_VERSION_KEY,), cached=False)
+    return int(row[0]) if row else 0
+
+
+def reload_settings():
+    """(Re)load every setting from SQLite into the snapshot."""
+    global _snapshot, _version
+    with _lock:
+        rows = fetch_all("SELECT key, value, type FROM settings", cached=False)
+        _snapshot = {key: _decode(value, kind) for key, value, kind in rows}
+        _version = _stored_version()
+    return dict(_snapshot)
+
+
+def refresh_if_stale():
+    """
+    Reload only if another process changed settings since our snapshot.
+    One indexed meta lookup; call it from admin views, not hot paths.
+    """
+    if _snapshot is None or _stored_version() != _version:
+        reload_settings()
+
+
+def _settings():
+    if _snapshot is None:
+        reload_settings()
+    return _snapshot
+
+
+@on_reset
+def _drop_snapshot():
+    global _snapshot, _version
+    with _lock:
+        _snapshot, _version = None, None
+
+
+# =====================================================
+# 🔑 PUBLIC API
+# =====================================================
+def get_setting(key, default=None):
+    """✅ O(1) typed lookup from the in-process snapshot."""
+    return _settings().get(key, default)
+
+
+def all_settings() -> dict:
+    return dict(_settings())
+
+
+def settings_version() -> int:
+    _settings()
+    return _version
+
+
+def subscribe(callback):
+    """Register callback(key, value) to run after a setting changes (value None = deleted)."""
+    with _lock:
+        _subscribers.append(callback)
+    return callback
+
+
+def _bump_version(conn):
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, '1') "
+        "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+        (SETTINGS_VERSION_KEY,),
+    )
+    return int(conn.execute("SELECT value FROM meta WHERE key = ?", (SETTINGS_VERSION_KEY,)).fetchone()[0])
+
+
+def _publish(key, value, new_version):
+    global _snapshot, _version
+    with _lock:
+        snapshot = dict(_settings())
+        if value is None:
+            snapshot.pop(key, None)
+        else:
+            snapshot[key] = value
+        # Swap, don't mutate: readers holding the old dict stay consistent.
+        _snapshot = snapshot
+        _version = new_version
+        callbacks = list(_subscribers)
+    for callback in callbacks:
+        try:
+            callback(key, value)
+        except Exception:
+            pass
+
+
+def set_setting(key, value):
+    """Persist a typed setting and publish it to this process's snapshot."""
+    text, kind = _encode(value)
+    with write_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO settings (key, value, type, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                value = excluded.value, type = excluded.type, updated_at = excluded.updated_at
+            """,
+            (key, text, kind, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        )
+        new_version = _bump_version(conn)
+    _publish(key, _decode(text, kind), new_version)
+
+
+def delete_setting(key):
+    with write_connection() as conn:
+        conn.execute("DELETE FROM settings WHERE key = ?", (key,))
+        new_version = _bump_version(conn)
+    _publish(key, None, new_version)
@@ -0,0 +1,284 @@
+# =====================================================
+# 📜 event_log.py — Bid Event Journal, Snapshots & Replay
+# =====================================================
+#
+# `bid_events` is append-only: triggers on `lots` and `bids` (see
+# migrations.install_event_triggers) add lot_created / bid_placed / lot_closed /
+# lot_deleted rows with a strictly increasing `seq`, in the same transaction as
+# the change.
+#
+# LotProjection folds those events into a fixed-size summary per lot (status,
+# high bid, depth, winner); individual bids stay in `bids`. Each lot shard has
+# its own journal, so each gets its own projection. Every SNAPSHOT_EVERY
+# events a projection is written to its snapshot directory as
+# `lots-<seq>.json`; a cold start loads the newest snapshot and replays only
+# the events after it, so recovery cost tracks the tail, not the whole bid
+# history. OrderBook.warm then loads bids for the open lots only.
+#
+# Snapshots carry meta('database_id') of the shard they describe, so one left
+# over from a reset or swapped database is never loaded.
+
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from db import get_manager, get_router, on_reset
+
+SNAPSHOT_DIR = os.getenv("FRUITBID_SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_EVERY = int(os.getenv("FRUITBID_SNAPSHOT_EVERY", "5000"))
+SNAPSHOTS_KEPT = 3
+REPLAY_CHUNK = 5000
+
+LOT_CREATED, BID_PLACED, LOT_CLOSED, LOT_DELETED = "lot_created", "bid_placed", "lot_closed", "lot_deleted"
+DATABASE_ID_KEY = "database_id"
+
+
+def _read(manager, query, params=()):
+    with (manager or get_manager()).reader() as conn:
+        return conn.execute(query, params).fetchall()
+
+
+def read_events(after_seq=0, chunk_size=REPLAY_CHUNK, manager=None):
+    """Yield (seq, kind, lot_id, payload dict) for every event after `after_seq`, in order."""
+    while True:
+        rows = _read(
+            manager,
+            "SELECT seq, kind, lot_id, payload FROM bid_events WHERE seq > ? ORDER BY seq LIMIT ?",
+            (after_seq, chunk_size),
+        )
+        for seq, kind, lot_id, payload in rows:
+            yield seq, kind, lot_id, json.loads(payload)
+        if len(rows) < chunk_size:
+            return
+        after_seq = rows[-1][0]
+
+
+def latest_seq(manager=None):
+    return _read(manager, "SELECT MAX(seq) FROM bid_events")[0][0] or 0
+
+
+def database_id(manager=None):
+    """Random id stamped into a shard's meta on first use; a new or reset file gets a new one."""
+    rows = _read(manager, "SELECT value FROM meta WHERE key = ?", (DATABASE_ID_KEY,))
+    if rows:
+        return rows[0][0]
+    with (manager or get_manager()).writer() as conn:
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)", (DATABASE_ID_KEY, uuid.uuid4().hex))
+        return conn.execute("SELECT value FROM meta WHERE key = ?", (DATABASE_ID_KEY,)).fetchone()[0]
+
+
+# =====================================================
+# 🧮 PROJECTION
+# =====================================================
+class LotProjection:
+    """Per-lot state derived purely from the journal."""
+
+    def __init__(self, lots=None, seq=0, database_id=None):
+        self.lots = lots or {}  # lot_id -> dict
+        self.seq = seq
+        self.database_id = database_id
+
+    def apply(self, seq, kind, lot_id, payload):
+        if kind == LOT_CREATED:
+            self.lots[lot_id] = {
+                "item_name": payload.get("item_name"), "status": "open",
+                "closes_at": payload.get("closes_at"), "high": None, "high_bid_id": None,
+                "bidder": None, "depth": 0, "winner": None, "amount": None,
+            }
+        elif kind == BID_PLACED and lot_id in self.lots:
+            lot = self.lots[lot_id]
+            lot["depth"] += 1
+            # Highest amount wins; on a tie the earlier bid keeps the lead.
+            if lot["high"] is None or payload["amount"] > lot["high"]:
+                lot["high"], lot["high_bid_id"], lot["bidder"] = payload["amount"], payload["bid_id"], payload["bidder"]
+        elif kind == LOT_CLOSED and lot_id in self.lots:
+            self.lots[lot_id].update(status="closed", winner=payload.get("winner"), amount=payload.get("amount"))
+        elif kind == LOT_DELETED:
+            self.lots.pop(lot_id, None)
+        self.seq = seq
+
+    def replay(self, events):
+        applied = 0
+        for event in events:
+            self.apply(*event)
+            applied += 1
+        return applied
+
+    def to_dict(self):
+        return {"seq": self.seq, "database_id": self.database_id,
+                "written_at": datetime.now().isoformat(timespec="seconds"),
+                "lots": {str(lot_id): lot for lot_id, lot in self.lots.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        lots = {int(lot_id): lot for lot_id, lot in data["lots"].items()}
+        for lot in lots.values():
+            lot.pop("bids", None)  # older snapshots embedded every bid
+        return cls(lots, data["seq"], data["database_id"])
+
+
+# =====================================================
+# 📸 SNAPSHOTS
+# =====================================================
+def snapshot_dir(directory=None, shard=0):
+    """Snapshot directory for one lot shard; shard 0 uses the base directory itself."""
+    directory = directory or SNAPSHOT_DIR
+    return directory if shard == 0 else os.path.join(directory, f"shard{shard}")
+
+
+def _snapshot_files(directory):
+    try:
+        names = [n for n in os.listdir(directory) if n.startswith("lots-") and n.endswith(".json")]
+    except FileNotFoundError:
+        return []
+    return sorted(names, reverse=True)  # zero-padded seq, so newest first
+
+
+def save_snapshot(projection, directory=None):
+    """Write the projection atomically and prune old snapshots. Returns the path."""
+    directory = directory or SNAPSHOT_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"lots-{projection.seq:012d}.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(projection.to_dict(), f)
+    os.replace(tmp_path, path)
+    for name in _snapshot_files(directory)[SNAPSHOTS_KEPT:]:
+        os.remove(os.path.join(directory, name))
+    return path
+
+
+def load_latest_snapshot(directory=None, manager=None):
+    """
+    Newest readable snapshot of this database's journal as a LotProjection, or
+    None. Snapshots of another database (a different database_id, or a seq the
+    journal has not reached) are skipped.
+    """
+    directory = directory or SNAPSHOT_DIR
+    expected, head = database_id(manager), latest_seq(manager)
+    for name in _snapshot_files(directory):
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                projection = LotProjection.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            continue  # half-written, corrupt or pre-dates database ids; try an older one
+        if projection.database_id == expected and projection.seq <= head:
+            return projection
+    return None
+
+
+def recover(directory=None, shard=0):
+    """One lot shard's latest snapshot plus its journal tail. Returns (projection, events_replayed)."""
+    manager = get_router().managers[shard]
+    directory = snapshot_dir(directory, shard)
+    projection = load_latest_snapshot(directory, manager) or LotProjection(database_id=database_id(manager))
+    replayed = projection.replay(read_events(projection.seq, manager=manager))
+    return projection, replayed
+
+
+def recover_lots(directory=None, snapshot_every=SNAPSHOT_EVERY):
+    """
+    {lot_id: projected lot} across every shard. A shard whose tail was at
+    least `snapshot_every` events long is snapshotted, so the next cold start
+    replays less.
+    """
+    router = get_router()
+    lots = {}
+    for shard in range(router.count):
+        projection, replayed = recover(directory, shard)
+        if replayed >= snapshot_every:
+            save_snapshot(projection, snapshot_dir(directory, shard))
+        # A lot moved by ShardRouter.rebalance() is still in its old shard's journal.
+        lots.update((lot_id, lot) for lot_id, lot in projection.lots.items()
+                    if router.index_for_lot(lot_id) == shard)
+    return lots
+
+
+# =====================================================
+# 🔁 LIVE PROJECTION
+# =====================================================
+class EventJournal:
+    """Process-wide projections, one per lot shard, kept current by tailing each journal."""
+
+    def __init__(self, directory=None, snapshot_every=SNAPSHOT_EVERY):
+        self.directory = directory or SNAPSHOT_DIR
+        self.snapshot_every = snapshot_every
+        self._lock = threading.RLock()
+        self._router = get_router()
+        self.projections, self.snapshot_seqs, self.replayed_at_start = [], [], 0
+        for shard, manager in enumerate(self._router.managers):
+            snapshot = load_latest_snapshot(snapshot_dir(self.directory, shard), manager)
+            projection = snapshot or LotProjection(database_id=database_id(manager))
+            self.replayed_at_start += projection.replay(read_events(projection.seq, manager=manager))
+            self.projections.append(projection)
+            self.snapshot_seqs.append(snapshot.seq if snapshot else 0)
+        self._maybe_snapshot()
+
+    def _maybe_snapshot(self):
+        for shard, projection in enumerate(self.projections):
+            if projection.seq - self.snapshot_seqs[shard] >= self.snapshot_every:
+                self._snapshot_shard(shard)
+
+    def _snapshot_shard(self, shard):
+        path = save_snapshot(self.projections[shard], snapshot_dir(self.directory, shard))
+        self.snapshot_seqs[shard] = self.projections[shard].seq
+        return path
+
+    @property
+    def seq(self):
+        """Events applied, summed over shards."""
+        return sum(projection.seq for projection in self.projections)
+
+    @property
+    def snapshot_seq(self):
+        return sum(self.snapshot_seqs)
+
+    def refresh(self):
+        """Apply events committed since the last call. Returns how many were applied."""
+        with self._lock:
+            applied = sum(
+                projection.replay(read_events(projection.seq, manager=self._router.managers[shard]))
+                for shard, projection in enumerate(self.projections)
+            )
+            self._maybe_snapshot()
+            return applied
+
+    def snapshot(self):
+        """Snapshot every shard now. Returns the snapshot paths."""
+        with self._lock:
+            return [self._snapshot_shard(shard) for shard in range(len(self.projections))]
+
+    def lots(self):
+        """{lot_id: projected lot} across shards."""
+        self.refresh()
+        with self._lock:
+            return {lot_id: lot for shard, projection in enumerate(self.projections)
+                    for lot_id, lot in projection.lots.items() if self._router.index_for_lot(lot_id) == shard}
+
+    def lot(self, lot_id):
+        self.refresh()
+        lot = self.projections[self._router.index_for_lot(lot_id)].lots.get(lot_id)
+        return dict(lot) if lot else None
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_event_journal() -> EventJournal:
+    """Shared EventJournal for this process, recovered from the latest snapshot."""
+    global _journal
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                _journal = EventJournal()
+    return _journal
+
+
+@on_reset
+def _drop_journal():
+    global _journal
+    with _journal_lock:
+        _journal = None
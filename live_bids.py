@@ -0,0 +1,190 @@
+# =====================================================
+# 📡 live_bids.py — WebSocket Push of Per-Lot Bid Events
+# =====================================================
+#
+# A Tornado server on a background thread fans out lot events to browsers:
+#
+#   client → {"subscribe": [1, 2, 3]}       (replaces the previous set)
+#   server → {"type": "snapshot" | "bid" | "closed", "lot_id": 1,
+#             "high": 120.0, "bidder": "99…", "depth": 4, ...}
+#
+# Events come from the in-process OrderBook and AuctionScheduler listeners.
+# Each event is encoded once and written to every subscriber of that lot, so a
+# new high bid costs one small message per watcher instead of a full page
+# rerun plus queries.
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import tornado.web
+import tornado.websocket
+
+from auction_scheduler import get_auction_scheduler
+from orderbook import get_order_book
+
+LIVE_HOST = os.getenv("FRUITBID_LIVE_HOST", "127.0.0.1")
+LIVE_PORT = int(os.getenv("FRUITBID_LIVE_PORT", "8767"))
+# Extra page origins (e.g. "https://fruitbid.example") allowed to subscribe;
+# the app's own host is always allowed.
+LIVE_ORIGINS = {o.strip().rstrip("/") for o in os.getenv("FRUITBID_LIVE_ORIGINS", "").split(",") if o.strip()}
+LIVE_PATH = "/ws/lots"
+MAX_SUBSCRIPTIONS = 200
+
+log = logging.getLogger(__name__)
+
+
+def _mask(bidder):
+    """Phone numbers are shown to other bidders only by their last digits."""
+    bidder = str(bidder or "")
+    return f"…{bidder[-4:]}" if len(bidder) > 4 else bidder
+
+
+def lot_event(kind, lot_id, book):
+    high = book.high_bid(lot_id)
+    return {
+        "type": kind,
+        "lot_id": lot_id,
+        "high": high[1] if high else None,
+        "bidder": _mask(high[0]) if high else None,
+        "depth": book.depth(lot_id),
+    }
+
+
+# =====================================================
+# 🔌 SOCKET HANDLER
+# =====================================================
+class LotSocket(tornado.websocket.WebSocketHandler):
+    def initialize(self, hub):
+        self.hub = hub
+        self.lots = set()
+
+    def check_origin(self, origin):
+        # The page is served by Streamlit on another port of the same host, so
+        # match the hostname only; anything else must be listed explicitly.
+        if origin.rstrip("/") in LIVE_ORIGINS:
+            return True
+        return urlparse(origin).hostname == self.request.host_name
+
+    def on_message(self, message):
+        try:
+            wanted = json.loads(message).get("subscribe", [])
+            lots = {int(lot_id) for lot_id in wanted[:MAX_SUBSCRIPTIONS]}
+        except (ValueError, TypeError, AttributeError):
+            return
+        self.hub.subscribe(self, lots)
+
+    def on_close(self):
+        self.hub.subscribe(self, set())
+
+
+# =====================================================
+# 📣 HUB
+# =====================================================
+class LiveBidHub:
+    """
+    Owns the Tornado IOLoop thread and the lot → sockets index.
+    The index is only touched on the IOLoop thread; publish() may be called
+    from any thread.
+    """
+
+    def __init__(self, host=LIVE_HOST, port=LIVE_PORT, book=None):
+        self.host = host
+        self.port = port
+        self.book = book
+        self._subscribers = defaultdict(set)
+        self._loop = None
+        self._server = None
+        self._ready = threading.Event()
+        self.available = False
+
+    # -------- IOLoop side --------
+    def subscribe(self, socket, lots):
+        for lot_id in socket.lots - lots:
+            watchers = self._subscribers.get(lot_id)
+            if watchers:
+                watchers.discard(socket)
+                if not watchers:
+                    del self._subscribers[lot_id]
+        added = lots - socket.lots
+        socket.lots = lots
+        for lot_id in added:
+            self._subscribers[lot_id].add(socket)
+            if self.book is not None:
+                socket.write_message(json.dumps(lot_event("snapshot", lot_id, self.book)))
+
+    def _fanout(self, lot_id, payload):
+        for socket in list(self._subscribers.get(lot_id, ())):
+            try:
+                socket.write_message(payload)
+            except tornado.websocket.WebSocketClosedError:
+                self.subscribe(socket, set())
+
+    # -------- any thread --------
+    def publish(self, event):
+        """Queue an event dict (with a lot_id) for every subscriber of that lot."""
+        if not self.available:
+            return
+        payload = json.dumps(event)
+        self._loop.call_soon_threadsafe(self._fanout, event["lot_id"], payload)
+
+    def watchers(self, lot_id):
+        return len(self._subscribers.get(lot_id, ()))
+
+    # -------- lifecycle --------
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        app = tornado.web.Application([(LIVE_PATH, LotSocket, {"hub": self})])
+        try:
+            self._server = app.listen(self.port, address=self.host)
+            self.available = True
+        except OSError as e:
+            # Another worker already serves the port; this process just won't push.
+            log.warning("live bids disabled: cannot listen on %s:%s (%s)", self.host, self.port, e)
+        finally:
+            self._ready.set()
+        if self.available:
+            self._loop.run_forever()
+
+    def start(self):
+        thread = threading.Thread(target=self._run, name="live-bids", daemon=True)
+        thread.start()
+        self._ready.wait(5)
+
+    def stop(self):
+        if self.available:
+            self.available = False
+            self._loop.call_soon_threadsafe(self._server.stop)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_live_hub() -> LiveBidHub:
+    """Shared, running LiveBidHub wired to the order book and auction scheduler."""
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                book = get_order_book()
+                hub = LiveBidHub(book=book)
+                hub.start()
+                book.on_bid(lambda lot_id, b: hub.publish(lot_event("bid", lot_id, b)))
+
+                @get_auction_scheduler().on_settle
+                def _closed(results):
+                    # From the settlement itself: the order book has already evicted the lot.
+                    for lot_id, _, winner, amount in results:
+                        hub.publish({"type": "closed", "lot_id": lot_id, "high": amount,
+                                     "bidder": _mask(winner) if winner else None, "depth": None,
+                                     "winner": _mask(winner), "amount": amount})
+
+                _hub = hub
+    return _hub
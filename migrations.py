@@ -0,0 +1,702 @@
+# =====================================================
+# 🗂️ migrations.py — Versioned Schema Migrations
+# =====================================================
+#
+# The schema version lives in meta('schema_version'). Each migration runs in
+# its own IMMEDIATE transaction together with the version bump, so a failure
+# leaves the database at the last fully applied version.
+#
+# To change the schema, append a new (version, description, function) entry to
+# MIGRATIONS — never edit one that has already shipped.
+#
+# meta('schema_fingerprint') records which migration set (and shard count) a
+# file was last brought up to, so db.bootstrap() can confirm a database is
+# current with one read instead of taking the writer.
+
+import hashlib
+import sqlite3
+
+from db import get_manager, parse_quantity
+
+SCHEMA_VERSION_KEY = "schema_version"
+SCHEMA_FINGERPRINT_KEY = "schema_fingerprint"
+
+
+# =====================================================
+# 🧱 CANONICAL TABLE LAYOUTS
+# =====================================================
+USERS_DDL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        phone TEXT UNIQUE,
+        verified INTEGER DEFAULT 0
+    )
+"""
+
+LOTS_DDL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_name TEXT NOT NULL,
+        quantity TEXT,
+        base_price REAL NOT NULL,
+        date_added TEXT
+    )
+"""
+
+# Bidders are identified by phone (what the session knows); user_name is kept
+# for rows written by the old name-only flow.
+BIDS_DDL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        lot_id INTEGER REFERENCES lots(id) ON DELETE CASCADE,
+        user_phone TEXT,
+        user_name TEXT,
+        bid_amount REAL NOT NULL,
+        timestamp TEXT
+    )
+"""
+
+OTPS_DDL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        mobile_email TEXT NOT NULL,
+        otp TEXT NOT NULL,
+        expiration TEXT NOT NULL
+    )
+"""
+
+
+# =====================================================
+# 🔧 HELPERS
+# =====================================================
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _pick(cols, *candidates, default="NULL"):
+    """First candidate whose source column exists, as a SQL expression."""
+    for column, expr in candidates:
+        if column in cols:
+            return expr
+    return default
+
+
+def _rebuild(conn, table, ddl, exprs, source_alias="src", where=None):
+    """
+    Recreate `table` in its canonical layout, copying rows through `exprs`
+    (target column -> SQL expression over the old table aliased as `source_alias`),
+    optionally only those matching `where`.
+    Follows SQLite's create-copy-drop-rename recipe; foreign keys must be off.
+    """
+    new_table = f"{table}__new"
+    conn.execute(ddl.format(name=new_table))
+    targets = ", ".join(exprs)
+    sources = ", ".join(exprs.values())
+    condition = f" WHERE {where}" if where else ""
+    conn.execute(
+        f"INSERT INTO {new_table} ({targets}) SELECT {sources} FROM {table} AS {source_alias}{condition}"
+    )
+    journaled = _is_journaled(conn, table)
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+    # Dropping the old table took its row-counter and journal triggers with it.
+    if _is_counted(conn, table):
+        install_row_counter(conn, table)
+    if journaled:
+        install_event_triggers(conn, table)
+
+
+def _is_unique(conn, table, column):
+    """True if `table` has a UNIQUE constraint or index on exactly `column`."""
+    for _, index, unique, *_ in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        if unique and [row[2] for row in conn.execute(f"PRAGMA index_info({index})")] == [column]:
+            return True
+    return False
+
+
+def _is_counted(conn, table):
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'table_stats'").fetchone():
+        return False
+    return conn.execute("SELECT 1 FROM table_stats WHERE table_name = ?", (table,)).fetchone() is not None
+
+
+def install_row_counter(conn, table):
+    """
+    Seed table_stats with an exact COUNT(*) (one scan, at install time) and add
+    insert/delete triggers that keep it exact from then on.
+    """
+    count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    conn.execute(
+        """
+        INSERT INTO table_stats (table_name, row_count, updated_at) VALUES (?, ?, datetime('now'))
+        ON CONFLICT(table_name) DO UPDATE SET row_count = excluded.row_count, updated_at = excluded.updated_at
+        """,
+        (table, count),
+    )
+    for event, delta in (("insert", "+ 1"), ("delete", "- 1")):
+        conn.execute(f"DROP TRIGGER IF EXISTS {table}_row_count_{event}")
+        conn.execute(f"""
+            CREATE TRIGGER {table}_row_count_{event} AFTER {event.upper()} ON {table}
+            BEGIN
+                UPDATE table_stats SET row_count = row_count {delta}, updated_at = datetime('now')
+                WHERE table_name = '{table}';
+            END
+        """)
+
+
+# Journal triggers per table: (name, timing/event, WHEN clause, kind, lot_id, payload).
+EVENT_TRIGGERS = {
+    "lots": [
+        ("lot_created", "AFTER INSERT", "", "NEW.id",
+         "json_object('item_name', NEW.item_name, 'quantity', NEW.quantity, "
+         "'base_price', NEW.base_price, 'closes_at', NEW.closes_at)"),
+        ("lot_closed", "AFTER UPDATE OF status",
+         "WHEN NEW.status = 'closed' AND OLD.status IS NOT 'closed'", "NEW.id",
+         "json_object('winner_bid_id', NEW.winner_bid_id, 'winner', NEW.winner_phone, "
+         "'amount', NEW.winning_amount, 'closed_at', NEW.closed_at)"),
+        # Its bids go with it (ON DELETE CASCADE), so this one event covers them too.
+        ("lot_deleted", "AFTER DELETE", "", "OLD.id", "json_object('item_name', OLD.item_name)"),
+    ],
+    "bids": [
+        ("bid_placed", "AFTER INSERT", "", "NEW.lot_id",
+         "json_object('bid_id', NEW.id, 'bidder', COALESCE(NEW.user_phone, NEW.user_name), "
+         "'amount', NEW.bid_amount, 'ts', NEW.timestamp)"),
+    ],
+}
+
+
+def _is_journaled(conn, table):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ? AND name LIKE ?",
+        (table, f"{table}_event_%"),
+    ).fetchone() is not None
+
+
+def install_event_triggers(conn, table):
+    """Append a bid_events row for every journaled change to `table`."""
+    for kind, timing, when, lot_id, payload in EVENT_TRIGGERS[table]:
+        conn.execute(f"DROP TRIGGER IF EXISTS {table}_event_{kind}")
+        conn.execute(f"""
+            CREATE TRIGGER {table}_event_{kind} {timing} ON {table} {when}
+            BEGIN
+                INSERT INTO bid_events (kind, lot_id, payload, recorded_at)
+                VALUES ('{kind}', {lot_id}, {payload}, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'));
+            END
+        """)
+
+
+# =====================================================
+# 📜 MIGRATIONS
+# =====================================================
+def _m001_base_tables(conn):
+    for table, ddl in (("users", USERS_DDL), ("lots", LOTS_DDL), ("bids", BIDS_DDL), ("otps", OTPS_DDL)):
+        conn.execute(ddl.format(name=table))
+
+
+def _m002_reconcile_layouts(conn):
+    """Bring lots/bids/users written by older app versions to the canonical layout."""
+    user_cols = _columns(conn, "users")
+    if "verified" not in user_cols:
+        conn.execute("ALTER TABLE users ADD COLUMN verified INTEGER DEFAULT 0")
+
+    lot_cols = _columns(conn, "lots")
+    if lot_cols != ["id", "item_name", "quantity", "base_price", "date_added"]:
+        _rebuild(conn, "lots", LOTS_DDL, {
+            "id": "src.id",
+            "item_name": "COALESCE(" + _pick(
+                lot_cols, ("item_name", "src.item_name"), ("fruit_name", "src.fruit_name")
+            ) + ", 'Unknown')",
+            "quantity": _pick(
+                lot_cols,
+                ("quantity", "src.quantity"),
+                ("quantity_kg", "CAST(src.quantity_kg AS TEXT) || ' kg'"),
+            ),
+            "base_price": "COALESCE(" + _pick(lot_cols, ("base_price", "src.base_price")) + ", 0)",
+            "date_added": _pick(lot_cols, ("date_added", "src.date_added")),
+        })
+
+    bid_cols = _columns(conn, "bids")
+    if bid_cols != ["id", "lot_id", "user_phone", "user_name", "bid_amount", "timestamp"]:
+        _rebuild(conn, "bids", BIDS_DDL, {
+            "id": "src.id",
+            "lot_id": _pick(
+                bid_cols,
+                ("lot_id", "src.lot_id"),
+                ("item_name", "(SELECT l.id FROM lots l WHERE l.item_name = src.item_name "
+                              "ORDER BY l.id DESC LIMIT 1)"),
+            ),
+            "user_phone": _pick(
+                bid_cols,
+                ("user_phone", "src.user_phone"),
+                ("user_id", "(SELECT u.phone FROM users u WHERE u.id = src.user_id)"),
+            ),
+            "user_name": _pick(
+                bid_cols,
+                ("user_name", "src.user_name"),
+                ("user_id", "(SELECT u.name FROM users u WHERE u.id = src.user_id)"),
+            ),
+            "bid_amount": "COALESCE(" + _pick(
+                bid_cols, ("bid_amount", "src.bid_amount"), ("bid_price", "src.bid_price")
+            ) + ", 0)",
+            "timestamp": _pick(
+                bid_cols, ("timestamp", "src.timestamp"), ("bid_time", "src.bid_time")
+            ),
+        })
+        # Old layouts had no FK on lot_id; detach bids that point at deleted lots.
+        conn.execute("UPDATE bids SET lot_id = NULL WHERE lot_id NOT IN (SELECT id FROM lots)")
+
+
+def _m003_hot_path_indexes(conn):
+    # lots(id DESC) is intentionally absent: id is the rowid, so
+    # ORDER BY id DESC is already a reverse walk of the table B-tree.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bids_lot_amount ON bids (lot_id, bid_amount DESC)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bids_phone_id ON bids (user_phone, id DESC)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_otps_contact_id ON otps (mobile_email, id DESC)")
+
+
+def _m004_settings(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            type TEXT NOT NULL DEFAULT 'str',
+            updated_at TEXT
+        )
+    """)
+    cols = _columns(conn, "settings")
+    if "type" not in cols:
+        conn.execute("ALTER TABLE settings ADD COLUMN type TEXT NOT NULL DEFAULT 'str'")
+    if "updated_at" not in cols:
+        conn.execute("ALTER TABLE settings ADD COLUMN updated_at TEXT")
+    conn.execute(
+        "INSERT OR IGNORE INTO settings (key, value, type) VALUES ('discount_pct', '20', 'float')"
+    )
+
+
+def _m005_otp_expiry_index(conn):
+    # Expirations are ISO-8601 strings of one format, so they sort by time.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_otps_expiration ON otps (expiration)")
+
+
+def _m006_outbound_messages(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbound_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            to_number TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TEXT NOT NULL,
+            provider_id TEXT,
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT
+        )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_outbound_due ON outbound_messages (status, next_attempt_at)"
+    )
+
+
+def _m007_nutrition(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS nutrition (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_name TEXT NOT NULL UNIQUE,
+            calories REAL,
+            fiber REAL,
+            vit_c REAL,
+            potassium REAL,
+            notes TEXT
+        )
+    """)
+    # Any change to the source rows bumps meta('nutrition_version'), which is
+    # how the memory-mapped catalog (nutrition.py) knows to rebuild.
+    conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('nutrition_version', '0')")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS nutrition_version_{event.lower()}
+            AFTER {event} ON nutrition
+            BEGIN
+                UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'nutrition_version';
+            END
+        """)
+
+
+# Tables shown on the Admin Dashboard overview.
+COUNTED_TABLES = ("users", "lots", "bids", "settings", "otps", "nutrition", "items", "lucky_dip")
+
+
+def _m008_table_stats(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_stats (
+            table_name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL,
+            updated_at TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_stats_samples (
+            table_name TEXT NOT NULL,
+            sampled_at TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            PRIMARY KEY (table_name, sampled_at)
+        )
+    """)
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for table in COUNTED_TABLES:
+        if table in existing:
+            install_row_counter(conn, table)
+
+
+DEFAULT_AUCTION_HOURS = 24
+
+
+def _m009_auction_deadlines(conn):
+    cols = _columns(conn, "lots")
+    for column, decl in (
+        ("closes_at", "TEXT"),
+        ("status", "TEXT NOT NULL DEFAULT 'open'"),
+        ("winner_bid_id", "INTEGER"),
+        ("winner_phone", "TEXT"),
+        ("winning_amount", "REAL"),
+        ("closed_at", "TEXT"),
+    ):
+        if column not in cols:
+            conn.execute(f"ALTER TABLE lots ADD COLUMN {column} {decl}")
+    # Existing lots get a default deadline counted from now.
+    conn.execute(
+        "UPDATE lots SET closes_at = strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime', ?) "
+        "WHERE closes_at IS NULL AND status = 'open'",
+        (f"+{DEFAULT_AUCTION_HOURS} hours",),
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_lots_open_deadline ON lots (status, closes_at)")
+
+
+def _backfill_user_stats(conn, kg):
+    """Recompute every user_stats row from lots/bids; `kg` is a lot's kg as SQL over alias `l`."""
+    conn.execute("DELETE FROM user_stats")
+    conn.execute(f"""
+        INSERT INTO user_stats (bidder, active_bids, lots_won, kg_won, committed_spend, open_exposure, updated_at)
+        SELECT bidder, SUM(active), SUM(won), SUM(kg), SUM(spend), SUM(exposure),
+               strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')
+        FROM (
+            SELECT COALESCE(b.user_phone, b.user_name) AS bidder, COUNT(*) AS active,
+                   0 AS won, 0 AS kg, 0 AS spend, 0 AS exposure
+            FROM bids b JOIN lots l ON l.id = b.lot_id
+            WHERE l.status = 'open'
+            GROUP BY bidder
+            UNION ALL
+            SELECT m.bidder, 0, 0, 0, 0, SUM(m.top * {kg})
+            FROM (
+                SELECT COALESCE(user_phone, user_name) AS bidder, lot_id, MAX(bid_amount) AS top
+                FROM bids GROUP BY bidder, lot_id
+            ) m JOIN lots l ON l.id = m.lot_id
+            WHERE l.status = 'open'
+            GROUP BY m.bidder
+            UNION ALL
+            SELECT winner_phone, 0, COUNT(*), SUM({kg}), SUM(winning_amount * {kg}), 0
+            FROM lots l
+            WHERE status = 'closed' AND winner_phone IS NOT NULL
+            GROUP BY winner_phone
+        )
+        WHERE bidder IS NOT NULL
+        GROUP BY bidder
+    """)
+    conn.execute("""
+        INSERT INTO user_stats (bidder, active_bids, lots_won, kg_won, committed_spend, open_exposure, updated_at)
+        SELECT '*', COALESCE(SUM(active_bids), 0), COALESCE(SUM(lots_won), 0), COALESCE(SUM(kg_won), 0),
+               COALESCE(SUM(committed_spend), 0), COALESCE(SUM(open_exposure), 0),
+               strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')
+        FROM user_stats
+    """)
+
+
+def _m010_user_stats(conn):
+    # One row per bidder plus a '*' row for the whole market, kept current by
+    # aggregates.record_bid / record_settlement. Quantities are "10 kg"-style
+    # text; CAST keeps the leading number.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_stats (
+            bidder TEXT PRIMARY KEY,
+            active_bids INTEGER NOT NULL DEFAULT 0,
+            lots_won INTEGER NOT NULL DEFAULT 0,
+            kg_won REAL NOT NULL DEFAULT 0,
+            committed_spend REAL NOT NULL DEFAULT 0,
+            open_exposure REAL NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )
+    """)
+    _backfill_user_stats(conn, "CAST(l.quantity AS REAL)")
+
+
+def _m011_bid_events(conn):
+    # AUTOINCREMENT: sequence numbers only ever grow, even if rows are pruned.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bid_events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            lot_id INTEGER,
+            payload TEXT NOT NULL,
+            recorded_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bid_events_lot ON bid_events (lot_id, seq)")
+    # Seed the journal with today's state so a replay from zero rebuilds it.
+    if conn.execute("SELECT 1 FROM bid_events LIMIT 1").fetchone() is None:
+        for table, index, where, order in (
+            ("lots", 0, "", "NEW.id"),
+            ("bids", 0, "", "NEW.id"),
+            ("lots", 1, "WHERE NEW.status = 'closed'", "NEW.closed_at, NEW.id"),
+        ):
+            kind, _, _, lot_id, payload = EVENT_TRIGGERS[table][index]
+            conn.execute(f"""
+                INSERT INTO bid_events (kind, lot_id, payload, recorded_at)
+                SELECT '{kind}', {lot_id}, {payload}, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')
+                FROM {table} AS NEW {where} ORDER BY {order}
+            """)
+    for table in EVENT_TRIGGERS:
+        install_event_triggers(conn, table)
+
+
+# Lots/bids/otps from migration 12 on: quantities parsed into value + unit,
+# every time an INTEGER of Unix epoch seconds.
+LOTS_V12_DDL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_name TEXT NOT NULL,
+        quantity TEXT,
+        quantity_value REAL,
+        unit TEXT,
+        base_price REAL NOT NULL,
+        date_added INTEGER,
+        closes_at INTEGER,
+        status TEXT NOT NULL DEFAULT 'open',
+        winner_bid_id INTEGER,
+        winner_phone TEXT,
+        winning_amount REAL,
+        closed_at INTEGER
+    )
+"""
+
+BIDS_V12_DDL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        lot_id INTEGER REFERENCES lots(id) ON DELETE CASCADE,
+        user_phone TEXT,
+        user_name TEXT,
+        bid_amount REAL NOT NULL,
+        timestamp INTEGER
+    )
+"""
+
+OTPS_V12_DDL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        mobile_email TEXT NOT NULL,
+        otp TEXT NOT NULL,
+        expiration INTEGER NOT NULL
+    )
+"""
+
+# A rebuild drops the old table's indexes; these are the full sets afterwards.
+V12_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_lots_open_deadline ON lots (status, closes_at)",
+    "CREATE INDEX IF NOT EXISTS idx_lots_date_added ON lots (date_added)",
+    "CREATE INDEX IF NOT EXISTS idx_lots_unit_quantity ON lots (unit, quantity_value)",
+    "CREATE INDEX IF NOT EXISTS idx_bids_lot_amount ON bids (lot_id, bid_amount DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_bids_phone_id ON bids (user_phone, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_bids_timestamp ON bids (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_otps_contact_id ON otps (mobile_email, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_otps_expiration ON otps (expiration)",
+)
+
+
+def _epoch(column):
+    # Stored strings are naive local times ('2025-10-08', '... 12:30', ISO with
+    # 'T' and optional fractions); 'utc' converts them from local time.
+    # Unparseable text becomes NULL.
+    return f"CAST(strftime('%s', src.{column}, 'utc') AS INTEGER)"
+
+
+def _copy(*columns):
+    return {column: f"src.{column}" for column in columns}
+
+
+def _m012_typed_quantities_and_epoch_times(conn):
+    _rebuild(conn, "lots", LOTS_V12_DDL, {
+        **_copy("id", "item_name", "quantity", "base_price"),
+        "date_added": _epoch("date_added"),
+        "closes_at": _epoch("closes_at"),
+        **_copy("status", "winner_bid_id", "winner_phone", "winning_amount"),
+        "closed_at": _epoch("closed_at"),
+    })
+    _rebuild(conn, "bids", BIDS_V12_DDL, {
+        **_copy("id", "lot_id", "user_phone", "user_name", "bid_amount"),
+        "timestamp": _epoch("timestamp"),
+    })
+    _rebuild(conn, "otps", OTPS_V12_DDL, {
+        **_copy("id", "mobile_email", "otp"),
+        "expiration": f"COALESCE({_epoch('expiration')}, 0)",
+    })
+    # Same parser as db.insert_lot, so old and new rows agree.
+    conn.executemany(
+        "UPDATE lots SET quantity_value = ?, unit = ? WHERE id = ?",
+        [(*parse_quantity(quantity), lot_id) for lot_id, quantity in conn.execute("SELECT id, quantity FROM lots")],
+    )
+    for ddl in V12_INDEXES:
+        conn.execute(ddl)
+    # Aggregates now read quantity_value ('500 g' is 0.5 kg, not 500).
+    _backfill_user_stats(conn, "COALESCE(l.quantity_value, 0)")
+
+
+def _m013_bids_by_name_index(conn):
+    # Bids placed by name only (no phone), newest first, without a table scan.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bids_name_time ON bids (user_name, timestamp DESC, id DESC)")
+
+
+def _m014_bids_by_phone_time_index(conn):
+    # "My bids" merges shards on (timestamp, id); ids alone aren't global order.
+    conn.execute("DROP INDEX IF EXISTS idx_bids_phone_id")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bids_phone_time ON bids (user_phone, timestamp DESC, id DESC)")
+
+
+def _m015_users_keyed_on_phone(conn):
+    # Legacy users tables have a plain phone column; the canonical layout
+    # (and every "is this phone registered" lookup) keys on it. Duplicates keep
+    # the earliest row, verified if any copy was.
+    if _is_unique(conn, "users", "phone"):
+        return
+    _rebuild(conn, "users", USERS_DDL, {
+        "id": "src.id",
+        "name": "COALESCE(src.name, '')",
+        "phone": "src.phone",
+        "verified": "COALESCE((SELECT MAX(u.verified) FROM users u WHERE u.phone = src.phone), src.verified, 0)",
+    }, where="src.phone IS NULL OR src.id = (SELECT MIN(u.id) FROM users u WHERE u.phone = src.phone)")
+
+
+def _m016_journal_lot_deletes(conn):
+    # Deleted lots (and their cascaded bids) used to vanish from `bids` without
+    # a journal entry, so projections and a warmed order book kept them.
+    install_event_triggers(conn, "lots")
+
+
+def _m017_kg_only_user_stats(conn):
+    # Migration 12's backfill counted every lot's quantity_value as kg, so
+    # '1 crate' added 1 kg; aggregates._lot_kg counts kg lots only.
+    _backfill_user_stats(conn, "CASE WHEN l.unit = 'kg' THEN COALESCE(l.quantity_value, 0) ELSE 0 END")
+
+
+def _m018_default_deadlines(conn):
+    # Lots added outside the Add Lot page (storage.Repository.add_lot, seeds)
+    # were stored with no deadline and never closed; new lots now always get
+    # one (db.insert_lot), and these get the same default counted from now.
+    conn.execute(
+        "UPDATE lots SET closes_at = CAST(strftime('%s', 'now') AS INTEGER) + ? "
+        "WHERE closes_at IS NULL AND status = 'open'",
+        (DEFAULT_AUCTION_HOURS * 3600,),
+    )
+
+
+MIGRATIONS = [
+    (1, "base tables", _m001_base_tables),
+    (2, "reconcile legacy lots/bids/users layouts", _m002_reconcile_layouts),
+    (3, "hot-path indexes", _m003_hot_path_indexes),
+    (4, "typed settings table", _m004_settings),
+    (5, "otp expiry index", _m005_otp_expiry_index),
+    (6, "outbound sms queue", _m006_outbound_messages),
+    (7, "nutrition table with change-version triggers", _m007_nutrition),
+    (8, "trigger-maintained table row counts", _m008_table_stats),
+    (9, "auction deadlines and winners on lots", _m009_auction_deadlines),
+    (10, "incrementally maintained user/global bid aggregates", _m010_user_stats),
+    (11, "append-only bid event journal", _m011_bid_events),
+    (12, "typed lot quantities and epoch-second timestamps", _m012_typed_quantities_and_epoch_times),
+    (13, "bids-by-name index", _m013_bids_by_name_index),
+    (14, "bids-by-phone index in placement order", _m014_bids_by_phone_time_index),
+    (15, "users keyed on unique phone", _m015_users_keyed_on_phone),
+    (16, "journal lot deletions", _m016_journal_lot_deletes),
+    (17, "user/global bid aggregates over kg lots only", _m017_kg_only_user_stats),
+    (18, "default deadlines for open lots without one", _m018_default_deadlines),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# =====================================================
+# 🚀 RUNNER
+# =====================================================
+def _ensure_meta(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+
+
+def get_schema_version(conn):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (SCHEMA_VERSION_KEY,)).fetchone()
+    return int(row[0]) if row else 0
+
+
+def _set_schema_version(conn, version):
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (SCHEMA_VERSION_KEY, str(version)),
+    )
+
+
+def schema_fingerprint(shards=1):
+    """Digest of the migration list and shard layout; changes whenever either does."""
+    spec = "\n".join(f"{number}:{description}" for number, description, _ in MIGRATIONS)
+    return hashlib.sha256(f"{spec}\nshards={shards}".encode()).hexdigest()[:16]
+
+
+def read_fingerprint(conn):
+    """The stored fingerprint, or None on a database that has never been bootstrapped."""
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (SCHEMA_FINGERPRINT_KEY,)).fetchone()
+    except sqlite3.OperationalError:  # no meta table yet
+        return None
+    return row[0] if row else None
+
+
+def record_fingerprint(conn, fingerprint):
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (SCHEMA_FINGERPRINT_KEY, fingerprint),
+    )
+
+
+def migrate(target=None, manager=None):
+    """
+    Apply every pending migration up to `target` (default: latest) to one
+    database (default: the main file; pass a shard's manager for the others).
+    Returns the resulting schema version.
+    """
+    target = LATEST_VERSION if target is None else target
+    manager = manager or get_manager()
+    with manager.maintenance():
+        with manager.writer() as conn:
+            _ensure_meta(conn)
+            version = get_schema_version(conn)
+
+        for number, description, apply in MIGRATIONS:
+            if number <= version or number > target:
+                continue
+            try:
+                with manager.writer() as conn:
+                    apply(conn)
+                    problems = conn.execute("PRAGMA foreign_key_check").fetchall()
+                    if problems:
+                        raise sqlite3.IntegrityError(
+                            f"foreign key violations after migration: {problems[:5]}"
+                        )
+                    _set_schema_version(conn, number)
+            except sqlite3.Error as e:
+                raise Exception(f"Migration {number} ({description}) failed: {e}") from e
+            version = number
+    return version
@@ -1,7 +1,24 @@
+# =====================================================
+# 🥗 nutrition.py — Nutrition Catalog (memory-mapped Arrow)
+# =====================================================
+#
+# The `nutrition` table is the source of truth. A snapshot of it is written to
+# an uncompressed Arrow IPC file and opened through a memory map, so every
+# session shares the same pages with no per-call copy or pickling. The file is
+# tagged with meta('nutrition_version') (bumped by triggers on any row change)
+# and is only rebuilt when that version moves.
+
+import os
 import sqlite3
-import streamlit as stimport 
-import pandas as pd
-from db import get_db_connection
+import threading
+
+import pyarrow as pa
+import streamlit as st
+
+from db import fetch_all, fetch_one, execute_many, on_reset
+
+NUTRITION_ARROW_PATH = os.getenv("FRUITBID_NUTRITION_PATH", "nutrition.arrow")
+VERSION_METADATA_KEY = b"nutrition_version"
 
 # Initial nutritional data
 INITIAL_NUTRITION = [
@@ -14,42 +31,118 @@ INITIAL_NUTRITION = [
     ('Pineapple', 45, 0.9, 40, 107, 'Contains bromelain for anti-inflammation.'),
     ('Custard Apple', 101, 4.4, 36, 382, 'Supports heart health with potassium.'),
     ('Sapota', 83, 5.3, 15, 193, 'High fiber for digestive health.')]
+
+SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("item_name", pa.string()),
+    ("calories", pa.float64()),
+    ("fiber", pa.float64()),
+    ("vit_c", pa.float64()),
+    ("potassium", pa.float64()),
+    ("notes", pa.string()),
+])
+
+
 def initialize_nutrition():
     """Initialize nutritional data in the database."""
-    conn = get_db_connection()
-    if conn is None:
-    
-    return
     try:
-    
-    c = conn.cursor()
-    
-    c.execute("SELECT COUNT(*) FROM nutrition")
-    
-    if c.fetchone()[0] == 0:
-    
-    
-    c.executemany("INSERT INTO nutrition (item_name, calories, fiber, vit_c, potassium, notes) VALUES (?, ?, ?, ?, ?, ?)", INITIAL_NUTRITION)
-    
-    
-    conn.commit()
-    
-    get_nutrition_data.clear()
+        if fetch_one("SELECT 1 FROM nutrition LIMIT 1", cached=False) is None:
+            execute_many(
+                "INSERT INTO nutrition (item_name, calories, fiber, vit_c, potassium, notes) VALUES (?, ?, ?, ?, ?, ?)",
+                INITIAL_NUTRITION,
+            )
     except sqlite3.Error as e:
-    
-    st.error(f"Error initializing nutrition: {str(e)}")
-@st.cache_data(ttl=300)
+        st.error(f"Error initializing nutrition: {str(e)}")
+
+
+# =====================================================
+# 🗺️ ARROW SNAPSHOT
+# =====================================================
+_table = None
+_frame = None
+_loaded_version = None
+_file_trusted = True  # False after a reset: the file may describe the old database
+_lock = threading.Lock()
+
+
+def _source_version():
+    row = fetch_one("SELECT value FROM meta WHERE key = 'nutrition_version'")
+    return row[0] if row else "0"
+
+
+def _file_version(path):
+    try:
+        with pa.memory_map(path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    value = metadata.get(VERSION_METADATA_KEY)
+    return value.decode() if value else None
+
+
+def _write_snapshot(path, version):
+    """Dump the nutrition table to an uncompressed Arrow file, atomically."""
+    rows = fetch_all(
+        "SELECT id, item_name, calories, fiber, vit_c, potassium, notes FROM nutrition ORDER BY id",
+        cached=False,
+    )
+    columns = list(zip(*rows)) if rows else [[] for _ in SCHEMA]
+    schema = SCHEMA.with_metadata({VERSION_METADATA_KEY: str(version).encode()})
+    table = pa.Table.from_arrays([pa.array(col, type=field.type) for col, field in zip(columns, SCHEMA)],
+                                 schema=schema)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def get_nutrition_table(path=None) -> pa.Table:
+    """
+    Shared, read-only Arrow table backed by a memory-mapped file.
+    Rebuilds the file only when the source rows have changed.
+    """
+    global _table, _frame, _loaded_version, _file_trusted
+    path = path or NUTRITION_ARROW_PATH
+    version = _source_version()
+    if _table is not None and _loaded_version == version:
+        return _table
+    with _lock:
+        if _table is None or _loaded_version != version:
+            if not _file_trusted or _file_version(path) != version:
+                _write_snapshot(path, version)
+                _file_trusted = True
+            # read_all() over a memory map references the mapped pages — no copy.
+            _table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+            _frame = None
+            _loaded_version = version
+    return _table
+
+
+@on_reset
+def _drop_table():
+    # A fresh database restarts nutrition_version, so the version alone can't tell.
+    global _table, _frame, _loaded_version, _file_trusted
+    with _lock:
+        _table, _frame, _loaded_version, _file_trusted = None, None, None, False
+
+
 def get_nutrition_data():
-    """Fetch nutritional data from database."""
-    conn = get_db_connection()
-    if conn is None:
-    
-        return pd.DataFrame()
+    """
+    Fetch nutritional data as a DataFrame.
+    One frame per catalog version is shared by every session — treat it as read-only.
+    """
+    global _frame
     try:
-    
-        return pd.read_sql_query("SELECT * FROM nutrition", conn)
-    except sqlite3.Error as e:
-    
+        get_nutrition_table()
+        frame = _frame
+        if frame is None:
+            with _lock:
+                if _frame is None:
+                    _frame = _table.to_pandas()
+                frame = _frame
+        return frame
+    except (sqlite3.Error, OSError, pa.ArrowException) as e:
         st.error(f"Error fetching nutrition: {str(e)}")
-    
-        return pd.DataFrame()
\ No newline at end of file
+        import pandas as pd
+
+        return pd.DataFrame()
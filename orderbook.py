@@ -0,0 +1,218 @@
+# =====================================================
+# 📈 orderbook.py — In-Memory Per-Lot Order Book
+# =====================================================
+
+import json
+import threading
+from bisect import insort
+from collections import defaultdict
+
+from aggregates import record_bid
+from dal import QUERIES, Bid
+from db import fetch_all_shards, get_router, lot_write_connection, now_epoch, on_reset
+from event_log import recover_lots
+
+
+# =====================================================
+# 🧾 PER-LOT BOOK
+# =====================================================
+class LotBook:
+    """
+    Bids for one lot, kept sorted best-first.
+    Entries are (-bid_amount, bid_id, bidder, timestamp) so the highest
+    amount sorts first and, on ties, the earlier bid wins.
+    """
+
+    __slots__ = ("_entries",)
+
+    def __init__(self):
+        self._entries = []
+
+    def add(self, bid_id, bidder, amount, timestamp):
+        insort(self._entries, (-float(amount), bid_id, bidder, timestamp))
+
+    def best(self):
+        """Current high bid as (bidder, amount, timestamp), or None. O(1)."""
+        if not self._entries:
+            return None
+        neg_amount, _, bidder, ts = self._entries[0]
+        return bidder, -neg_amount, ts
+
+    def bidders(self):
+        return {bidder for _, _, bidder, _ in self._entries}
+
+    def top(self, k=3):
+        """Top-k bids as (bidder, amount, timestamp) tuples. O(k)."""
+        return [(bidder, -neg, ts) for neg, _, bidder, ts in self._entries[:k]]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# =====================================================
+# 📚 ORDER BOOK ENGINE
+# =====================================================
+class OrderBook:
+    """
+    Process-wide bid books keyed by open lot_id, plus a per-bidder index.
+    Settled lots are evicted, so memory tracks the open market, not history.
+    Warmed with the open lots' bids (the journal snapshot + tail says which
+    lots those are), so readers never need SQL.
+    place_bid holds only its shard's lock across the SQLite write, so bids on
+    different shards commit in parallel; the book lock just guards memory.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._shard_locks = defaultdict(threading.Lock)
+        self._books = defaultdict(LotBook)
+        self._by_bidder = defaultdict(list)
+        self._listeners = []
+        self.warmed = False
+
+    # -------- loading --------
+    def warm(self):
+        """
+        (Re)load the bids of every open lot. Which lots are open (and have
+        bids) comes from each shard's latest journal snapshot plus the events
+        after it (see event_log); their bids are then one indexed read per
+        shard, so settled history is never loaded.
+        """
+        # Hold every shard lock so no bid commits between the read and the swap.
+        locks = [self._shard_lock(shard) for shard in range(get_router().count)]
+        for lock in locks:
+            lock.acquire()
+        try:
+            open_lots = [lot_id for lot_id, lot in recover_lots().items() if lot["status"] == "open" and lot["depth"]]
+            bids = fetch_all_shards(
+                QUERIES["bids.for_lots"], (json.dumps(open_lots),), cached=False, row_factory=Bid.from_row
+            )
+            bids.sort(key=lambda bid: (bid.timestamp or 0, bid.id))  # oldest first across shards
+            with self._lock:
+                self._books.clear()
+                self._by_bidder.clear()
+                for bid in bids:
+                    self._add(bid.id, bid.lot_id, bid.bidder, bid.bid_amount, bid.timestamp)
+                self.warmed = True
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _shard_lock(self, shard):
+        with self._lock:
+            return self._shard_locks[shard]
+
+    def reset(self):
+        """Forget every bid; the next get_order_book() re-warms from the current database."""
+        with self._lock:
+            self._books.clear()
+            self._by_bidder.clear()
+            self.warmed = False
+
+    def evict(self, lot_ids):
+        """Drop settled lots' books and their bidder-index entries."""
+        router = get_router()
+        for lot_id in set(lot_ids):
+            # The shard lock orders this after any bid on the lot still being applied.
+            with self._shard_lock(router.index_for_lot(lot_id)), self._lock:
+                book = self._books.pop(lot_id, None)
+                for bidder in book.bidders() if book else ():
+                    kept = [entry for entry in self._by_bidder[bidder] if entry[1] != lot_id]
+                    if kept:
+                        self._by_bidder[bidder] = kept
+                    else:
+                        del self._by_bidder[bidder]
+
+    def _add(self, bid_id, lot_id, bidder, amount, ts):
+        self._books[lot_id].add(bid_id, bidder, amount, ts)
+        self._by_bidder[bidder].append((bid_id, lot_id, float(amount), ts))
+
+    # -------- writes --------
+    def place_bid(self, lot_id, user_phone, bid_amount, user_name=None):
+        """
+        Persist a bid and apply it to the in-memory book. Returns the new bid id.
+        Raises ValueError if the lot is closed or its deadline has passed.
+        """
+        ts = now_epoch()
+        with self._shard_lock(get_router().index_for_lot(lot_id)):
+            with lot_write_connection(lot_id) as conn:
+                # The open/deadline check and the insert are one statement, so a
+                # bid can never land after the scheduler has settled the lot.
+                cursor = conn.execute(
+                    """
+                    INSERT INTO bids (lot_id, user_phone, user_name, bid_amount, timestamp)
+                    SELECT ?, ?, ?, ?, ? WHERE EXISTS (
+                        SELECT 1 FROM lots WHERE id = ? AND status = 'open'
+                        AND (closes_at IS NULL OR closes_at > ?)
+                    )
+                    """,
+                    (lot_id, user_phone, user_name, bid_amount, ts, lot_id, ts),
+                )
+                if not cursor.rowcount:
+                    raise ValueError(f"Lot {lot_id} is closed for bidding")
+                bid_id = cursor.lastrowid
+                bidder = user_phone if user_phone is not None else user_name
+                record_bid(conn, lot_id, bidder, bid_amount, bid_id)
+            with self._lock:
+                self._add(bid_id, lot_id, bidder, bid_amount, ts)
+        for callback in list(self._listeners):
+            try:
+                callback(lot_id, self)
+            except Exception:
+                pass
+        return bid_id
+
+    def on_bid(self, callback):
+        """Register callback(lot_id, book) run after each accepted bid."""
+        self._listeners.append(callback)
+        return callback
+
+    # -------- reads --------
+    def high_bid(self, lot_id):
+        """Current high bid for a lot as (bidder, amount, timestamp), or None."""
+        book = self._books.get(lot_id)
+        return book.best() if book else None
+
+    def top_bids(self, lot_id, k=3):
+        book = self._books.get(lot_id)
+        return book.top(k) if book else []
+
+    def depth(self, lot_id):
+        """Number of bids on a lot."""
+        book = self._books.get(lot_id)
+        return len(book) if book else 0
+
+    def bids_by(self, bidder):
+        """A bidder's bids on open lots, newest first, as (bid_id, lot_id, amount, timestamp)."""
+        with self._lock:
+            return list(reversed(self._by_bidder.get(bidder, ())))
+
+
+_book = None
+_book_lock = threading.Lock()
+
+
+def get_order_book():
+    """Shared, warmed OrderBook for this process."""
+    global _book
+    if _book is None or not _book.warmed:
+        with _book_lock:
+            if _book is None:
+                book = OrderBook()
+                book.warm()
+                _book = book
+            elif not _book.warmed:
+                _book.warm()  # same object, so on_bid listeners survive a reset
+    return _book
+
+
+def evict_settled(results):
+    """AuctionScheduler.on_settle listener: settled lots leave the book."""
+    if _book is not None:
+        _book.evict(lot_id for lot_id, *_ in results)
+
+
+@on_reset
+def _reset_order_book():
+    if _book is not None:
+        _book.reset()
@@ -1,5 +1,200 @@
-import streamlit as stfrom twilio.rest import Clientfrom datetime import datetime, timedeltaimport randomimport osfrom db import get_db_connection
-Twilio credentials from environment
-TWILIO_SID = os.getenv('TWILIO_SID')TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')TWILIO_PHONE = os.getenv('TWILIO_PHONE')
-def send_otp(mobile_email, reg_type):    """Send OTP via Twilio for mobile or placeholder for email."""    if reg_type == 'Mobile':        if not all([TWILIO_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE]):            st.error("Twilio credentials not configured.")            return False        otp = str(random.randint(1000, 9999))        expiration = datetime.now() + timedelta(minutes=5)        try:            client = Client(TWILIO_SID, TWILIO_AUTH_TOKEN)            message = client.messages.create(                body=f"Your FruitBid OTP is {otp}. Valid for 5 minutes.",                from_=TWILIO_PHONE,                to=mobile_email            )            conn = get_db_connection()            if conn:                c = conn.cursor()                c.execute("INSERT INTO otps (mobile_email, otp, expiration) VALUES (?, ?, ?)",                          (mobile_email, otp, expiration.isoformat()))                conn.commit()            return True        except Exception as e:            st.error(f"OTP sending error: {str(e)}")            return False    else:        st.warning("Email OTP not implemented yet.")        return False
-def verify_otp(mobile_email, otp_input):    """Verify OTP from database."""    conn = get_db_connection()    if conn is None:        return False    try:        c = conn.cursor()        c.execute("SELECT otp, expiration FROM otps WHERE mobile_email=? ORDER BY id DESC LIMIT 1", (mobile_email,))        row = c.fetchone()        if row:            otp, exp = row            if datetime.fromisoformat(exp) > datetime.now() and otp == otp_input:                c.execute("DELETE FROM otps WHERE mobile_email=?", (mobile_email,))                conn.commit()                return True        return False    except sqlite3.Error as e:        st.error(f"OTP verification error: {str(e)}")        return False
\ No newline at end of file
+# =====================================================
+# 🔢 otp.py — OTP Issue & Verification
+# =====================================================
+#
+# Live OTPs are kept in an in-process map (contact -> code, expiry) and written
+# through to the `otps` table so they survive a restart. A background sweeper
+# drops expired entries from memory and deletes expired rows in small batches.
+
+import random
+import sqlite3
+import threading
+import os
+from datetime import timedelta
+
+import streamlit as st
+
+from db import fetch_all, now_epoch, on_reset, write_connection
+
+# Twilio credentials from environment
+TWILIO_SID = os.getenv('TWILIO_SID')
+TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
+TWILIO_PHONE = os.getenv('TWILIO_PHONE')
+
+OTP_TTL = timedelta(minutes=5)
+SWEEP_INTERVAL_SECONDS = int(os.getenv("OTP_SWEEP_INTERVAL", "60"))
+SWEEP_BATCH_SIZE = 500
+
+
+# =====================================================
+# 🗃️ OTP STORE
+# =====================================================
+class OtpStore:
+    """In-memory TTL map of the latest OTP per contact, written through to SQLite."""
+
+    def __init__(self):
+        self._codes = {}  # mobile_email -> (otp, expiration epoch seconds)
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self._stop = threading.Event()
+
+    def load(self):
+        """Rebuild the map from unexpired rows (latest row per contact wins)."""
+        rows = fetch_all(
+            "SELECT mobile_email, otp, expiration FROM otps WHERE expiration > ? ORDER BY id",
+            (now_epoch(),),
+            cached=False,
+        )
+        with self._lock:
+            self._codes = {contact: (code, exp) for contact, code, exp in rows}
+
+    def clear(self):
+        """Forget cached codes; lookups fall back to the (new) database."""
+        with self._lock:
+            self._codes = {}
+
+    def issue(self, mobile_email, otp, ttl=OTP_TTL):
+        expiration = now_epoch() + int(ttl.total_seconds())
+        with write_connection() as conn:
+            conn.execute(
+                "INSERT INTO otps (mobile_email, otp, expiration) VALUES (?, ?, ?)",
+                (mobile_email, otp, expiration),
+            )
+        with self._lock:
+            self._codes[mobile_email] = (otp, expiration)
+
+    def _lookup(self, mobile_email, fresh=False):
+        if not fresh:
+            with self._lock:
+                entry = self._codes.get(mobile_email)
+            if entry is not None:
+                return entry
+        # Issued by another worker process? One indexed lookup, then cache it.
+        rows = fetch_all(
+            "SELECT otp, expiration FROM otps WHERE mobile_email = ? ORDER BY id DESC LIMIT 1",
+            (mobile_email,),
+            cached=False,
+        )
+        if not rows:
+            return None
+        entry = rows[0]
+        with self._lock:
+            self._codes[mobile_email] = entry
+        return entry
+
+    @staticmethod
+    def _matches(entry, otp_input):
+        otp, expiration = entry
+        return expiration > now_epoch() and otp == otp_input
+
+    def verify(self, mobile_email, otp_input):
+        """Check a code against the latest live OTP; consume it on success."""
+        entry = self._lookup(mobile_email)
+        if entry is not None and not self._matches(entry, otp_input):
+            # The cached code may predate one issued by another worker; re-read before rejecting.
+            entry = self._lookup(mobile_email, fresh=True)
+        if entry is None or not self._matches(entry, otp_input):
+            return False
+        with self._lock:
+            self._codes.pop(mobile_email, None)
+        with write_connection() as conn:
+            consumed = conn.execute("DELETE FROM otps WHERE mobile_email=?", (mobile_email,)).rowcount
+        return consumed > 0  # 0: another worker already accepted this code
+
+    # -------- expiry sweeper --------
+    def sweep(self, batch_size=SWEEP_BATCH_SIZE):
+        """Drop expired OTPs from memory and SQLite. Returns rows deleted."""
+        now = now_epoch()
+        with self._lock:
+            for contact in [c for c, (_, exp) in self._codes.items() if exp <= now]:
+                del self._codes[contact]
+
+        deleted = 0
+        while True:
+            # Small batches keep each write-lock hold short.
+            with write_connection() as conn:
+                count = conn.execute(
+                    """
+                    DELETE FROM otps WHERE id IN (
+                        SELECT id FROM otps WHERE expiration <= ? LIMIT ?
+                    )
+                    """,
+                    (now, batch_size),
+                ).rowcount
+            deleted += count
+            if count < batch_size:
+                return deleted
+
+    def start_sweeper(self, interval=SWEEP_INTERVAL_SECONDS):
+        if self._sweeper is not None:
+            return
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.sweep()
+                except sqlite3.Error:
+                    pass  # try again next interval
+
+        self._sweeper = threading.Thread(target=run, name="otp-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_otp_store():
+    """Shared OtpStore, loaded once and swept in the background."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = OtpStore()
+                store.load()
+                store.start_sweeper()
+                _store = store
+    return _store
+
+
+@on_reset
+def _reset_otp_store():
+    if _store is not None:
+        _store.clear()
+
+
+# =====================================================
+# 📲 SEND / VERIFY
+# =====================================================
+def send_otp(mobile_email, reg_type):
+    """
+    Issue an OTP and queue it for SMS delivery (mobile) — returns at once.
+    Returns a MessageHandle (truthy) whose .status() tracks delivery, or False.
+    """
+    if reg_type == 'Mobile':
+        if not all([TWILIO_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE]):
+            st.error("Twilio credentials not configured.")
+            return False
+        otp = str(random.randint(1000, 9999))
+        try:
+            from sms_queue import enqueue_sms  # SMS stack loads on the first send
+
+            get_otp_store().issue(mobile_email, otp)
+            return enqueue_sms(mobile_email, f"Your FruitBid OTP is {otp}. Valid for 5 minutes.")
+        except Exception as e:
+            st.error(f"OTP sending error: {str(e)}")
+            return False
+    else:
+        st.warning("Email OTP not implemented yet.")
+        return False
+
+
+def verify_otp(mobile_email, otp_input):
+    """Verify OTP against the in-memory store (O(1) per check)."""
+    try:
+        return get_otp_store().verify(mobile_email, otp_input)
+    except sqlite3.Error as e:
+        st.error(f"OTP verification error: {str(e)}")
+        return False
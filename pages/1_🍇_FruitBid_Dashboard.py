@@ -4,6 +4,12 @@
 
 import streamlit as st
 
+from db import bootstrap, now_epoch
+from dal import open_lots
+from orderbook import get_order_book
+from auction_scheduler import get_auction_scheduler
+from aggregates import get_user_stats, get_global_stats
+
 # ⚙️ PAGE CONFIG — must be FIRST Streamlit command
 
 # Try importing sidebar safely
@@ -14,6 +20,8 @@ except ModuleNotFoundError:
     def render_sidebar():
         return "🏠 Home"
 
+bootstrap()
+
 # =====================================================
 # 🔒 Developer Login (TEMPORARILY DISABLED)
 # =====================================================
@@ -37,10 +45,19 @@ st.markdown("---")
 # =====================================================
 # 📊 Dashboard Metrics
 # =====================================================
-col1, col2, col3 = st.columns(3)
-col1.metric("Active Bids", "3", "↑ 1")
-col2.metric("Fruits Won", "12 kg", "🍎 +2")
-col3.metric("Wallet Balance", "₹ 2,450", "💰")
+# One pre-aggregated row each — no GROUP BY over bids/lots per rerun.
+mine = get_user_stats(st.session_state.phone)
+market = get_global_stats()
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Active Bids", mine["active_bids"])
+col2.metric("Fruits Won", f"{mine['kg_won']:g} kg", f"🍎 {mine['lots_won']} lot(s)", delta_color="off")
+col3.metric("Committed Spend", f"₹ {mine['committed_spend']:,.0f}")
+col4.metric("Open Exposure", f"₹ {mine['open_exposure']:,.0f}")
+st.caption(
+    f"🌍 Market: {market['active_bids']} active bid(s) · {market['lots_won']} lot(s) won · "
+    f"₹ {market['committed_spend']:,.0f} settled · ₹ {market['open_exposure']:,.0f} open"
+)
 
 st.markdown("---")
 
@@ -49,13 +66,39 @@ st.markdown("---")
 # =====================================================
 st.subheader("🛍️ Current Fruit Lots")
 
-lots = [
-    {"Fruit": "Mango (Alphonso)", "Current Bid": "₹ 120/kg", "Time Left": "10 min"},
-    {"Fruit": "Banana (Robusta)", "Current Bid": "₹ 45/kg", "Time Left": "30 min"},
-    {"Fruit": "Apple (Shimla)", "Current Bid": "₹ 150/kg", "Time Left": "5 min"},
-]
+order_book = get_order_book()
+get_auction_scheduler()  # closes lots as their deadlines pass
+
+
+def time_left(closes_at):
+    if not closes_at:
+        return "—"
+    seconds = closes_at - now_epoch()
+    if seconds <= 0:
+        return "closing…"
+    hours, rem = divmod(seconds, 3600)
+    return f"{hours}h {rem // 60}m" if hours else f"{rem // 60} min"
+
+
+def current_bid(lot_id, base_price):
+    high = order_book.high_bid(lot_id)
+    return f"₹ {high[1]:g}/kg" if high else f"₹ {base_price:g}/kg (base)"
+
+
+# Soonest-closing open lots first, merged across lot shards.
+closing_soon = open_lots(limit=10)
 
-st.dataframe(lots, use_container_width=True)
+if closing_soon:
+    st.dataframe(
+        [
+            {"Fruit": lot.item_name, "Current Bid": current_bid(lot.id, lot.base_price),
+             "Time Left": time_left(lot.closes_at)}
+            for lot in closing_soon
+        ],
+        use_container_width=True,
+    )
+else:
+    st.info("No open lots right now.")
 
 st.markdown("---")
 st.caption("📈 More analytics, charts, and price insights coming soon!")
@@ -2,8 +2,16 @@
 # 🏪 FruitBid Marketplace Page
 # =====================================================
 
+import os
 import streamlit as st
 import sqlite3
+from datetime import datetime, timedelta
+from db import DEFAULT_AUCTION_HOURS, bootstrap, run_once, insert_lot, from_epoch, format_epoch
+from dal import has_lots, lots_page
+from orderbook import get_order_book
+from auction_scheduler import get_auction_scheduler
+from components.live_bids import render_live_bids
+from utils import monitor_price_table
 
 # =====================================================
 # ⚙️ Session State Initialization
@@ -29,7 +37,7 @@ except ModuleNotFoundError:
         st.sidebar.write("🏠 Home")
         return None
 
-DB_PATH = "fruitbid.db"
+bootstrap()  # Migrates once per process; later reruns skip it
 
 # =====================================================
 # 🔒 Developer Login (temporary bypass)
@@ -52,62 +60,37 @@ st.write(f"Welcome, **{st.session_state.user_name} ({st.session_state.phone})**
 st.markdown("---")
 
 # =====================================================
-# 🧺 Fetch Lots from Database
+# 📈 Live Bid Summary (served from the in-memory order book)
 # =====================================================
-def fetch_lots():
-    """Retrieve all available fruit lots from the database."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            c = conn.cursor()
-            # ✅ match actual database columns
-            c.execute("""
-                SELECT fruit_name, quantity_kg, base_price
-                FROM lots ORDER BY id DESC
-            """)
-            return c.fetchall()
-    except sqlite3.Error as e:
-        st.error(f"Database error: {e}")
-        return []
-
-# =====================================================
-# 📦 Display Available Lots
-# =====================================================
-
-def fetch_lots():
-    """Retrieve all available fruit lots from the database."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            c = conn.cursor()
-            c.execute("""
-                SELECT item_name, quantity, base_price, date_added
-                FROM lots ORDER BY id DESC
-            """)
-            return c.fetchall()
-    except sqlite3.Error as e:
-        st.error(f"Database error: {e}")
-        return []
+order_book = get_order_book()
+get_auction_scheduler()  # closes lots as their deadlines pass
 
 
-# =====================================================
-# 📦 Show Lots in UI
-# =====================================================
-lots = fetch_lots()
+def render_bid_summary(lot_id):
+    """Show the current high bid and bid depth for a lot without touching SQL."""
+    high = order_book.high_bid(lot_id)
+    if high:
+        bidder, amount, ts = high
+        st.write(f"🔥 **Current Bid:** ₹{amount}/kg by {bidder} · {order_book.depth(lot_id)} bid(s)")
+    else:
+        st.write("🔥 **Current Bid:** no bids yet")
 
-if lots:
-    st.subheader("📦 Available Fruit Lots")
 
-    for idx, (fruit, quantity, base_price, date_added) in enumerate(lots, start=1):
-        with st.container():
-            st.markdown(f"### 🍎 {fruit}")
-            st.write(f"📦 **Quantity:** {quantity} kg")
-            st.write(f"💰 **Base Price:** ₹{base_price}/kg")
-            st.write(f"📅 **Date Added:** {date_added}")
+def render_auction_status(status, closes_at, winner, amount):
+    """Time left for open lots; the result for settled ones."""
+    if status == "closed":
+        if winner:
+            st.write(f"🏆 **Closed** — won by {winner} at ₹{amount}/kg")
+        else:
+            st.write("🏁 **Closed** — no bids")
+    elif closes_at:
+        left = from_epoch(closes_at) - datetime.now()
+        if left.total_seconds() > 0:
+            hours, rem = divmod(int(left.total_seconds()), 3600)
+            st.write(f"⏳ **Closes in:** {hours}h {rem // 60}m")
+        else:
+            st.write("⏳ **Closing…**")
 
-            # Placeholder for bidding action
-            st.button(f"💰 Place Bid on {fruit}", key=f"bid_{idx}")
-            st.markdown("---")
-else:
-    st.info("No fruit lots available yet. Please add some from the ⚙️ Admin Add Lot page.")
 
 # =====================================================
 # 📦 Seed Sample Data (Auto-populate)
@@ -115,64 +98,100 @@ else:
 def seed_sample_lots():
     """Insert a few fruit lots if the database is empty."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            c = conn.cursor()
-            c.execute("SELECT COUNT(*) FROM lots")
-            count = c.fetchone()[0]
-            if count == 0:
-                sample_data = [
-                    ("Apples", 100, 120.0, "2025-10-08"),
-                    ("Bananas", 200, 40.0, "2025-10-08"),
-                    ("Mangoes", 150, 90.0, "2025-10-08"),
-                    ("Oranges", 180, 75.0, "2025-10-08"),
-                    ("Grapes", 250, 110.0, "2025-10-08")
-                ]
-                c.executemany(
-                    "INSERT INTO lots (item_name, quantity, base_price, date_added) VALUES (?, ?, ?, ?)",
-                    sample_data
-                )
-                conn.commit()
-                st.success("🍉 Sample fruit lots added automatically!")
+        if not has_lots(cached=False):
+            closes_at = datetime.now() + timedelta(hours=DEFAULT_AUCTION_HOURS)
+            sample_data = [
+                ("Apples", 100, 120.0, "2025-10-08", closes_at),
+                ("Bananas", 200, 40.0, "2025-10-08", closes_at),
+                ("Mangoes", 150, 90.0, "2025-10-08", closes_at),
+                ("Oranges", 180, 75.0, "2025-10-08", closes_at),
+                ("Grapes", 250, 110.0, "2025-10-08", closes_at)
+            ]
+            for row in sample_data:
+                insert_lot(*row)
+            st.success("🍉 Sample fruit lots added automatically!")
     except sqlite3.Error as e:
         st.error(f"Error populating sample lots: {e}")
 
 
 # =====================================================
-# 📦 Fetch Lots
+# 🔎 Filters & Paging
 # =====================================================
-def fetch_lots():
-    """Retrieve all available fruit lots from the database."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            c = conn.cursor()
-            c.execute("""
-                SELECT item_name, quantity, base_price, date_added
-                FROM lots ORDER BY id DESC
-            """)
-            return c.fetchall()
-    except sqlite3.Error as e:
-        st.error(f"Database error: {e}")
-        return []
+PAGE_SIZES = [10, 20, 50]
+DEFAULT_PAGE_SIZE = int(os.getenv("FRUITBID_LOTS_PAGE_SIZE", "20"))
+
+if "lots_cursors" not in st.session_state:
+    # Stack of `before_id` cursors, one per page visited; None = first page.
+    st.session_state.lots_cursors = [None]
+
+
+def reset_paging():
+    st.session_state.lots_cursors = [None]
+
+
+with st.expander("🔎 Filter lots"):
+    f1, f2, f3, f4, f5 = st.columns([3, 2, 2, 2, 2])
+    item_filter = f1.text_input("Fruit", key="lots_item", on_change=reset_paging).strip()
+    min_price = f2.number_input("Min ₹/kg", min_value=0.0, value=0.0, step=5.0, key="lots_min", on_change=reset_paging)
+    max_price = f3.number_input("Max ₹/kg (0 = any)", min_value=0.0, value=0.0, step=5.0, key="lots_max", on_change=reset_paging)
+    min_kg = f4.number_input("Min kg", min_value=0.0, value=0.0, step=10.0, key="lots_min_kg", on_change=reset_paging)
+    page_size = f5.selectbox(
+        "Per page",
+        PAGE_SIZES,
+        index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE) if DEFAULT_PAGE_SIZE in PAGE_SIZES else 1,
+        key="lots_page_size",
+        on_change=reset_paging,
+    )
 
 
 # =====================================================
-# 📦 Show Lots in UI
+# 📦 Show Lots in UI (one page at a time)
 # =====================================================
-seed_sample_lots()
-lots = fetch_lots()
-import time
+run_once("marketplace_sample_lots", seed_sample_lots)  # one emptiness check per process
+
+try:
+    lots, next_cursor = lots_page(
+        before_id=st.session_state.lots_cursors[-1],
+        page_size=page_size,
+        item=item_filter or None,
+        min_price=min_price or None,
+        max_price=max_price or None,
+        min_kg=min_kg or None,
+    )
+except sqlite3.Error as e:
+    st.error(f"Database error: {e}")
+    lots, next_cursor = [], None
+
 if lots:
-    st.subheader("📦 Available Fruit Lots")
+    page_no = len(st.session_state.lots_cursors)
+    st.subheader(f"📦 Available Fruit Lots — page {page_no}")
 
-    for idx, (fruit, quantity, base_price, date_added) in enumerate(lots, start=1):
+    # New bids on this page's open lots arrive over one WebSocket — no rerun needed.
+    render_live_bids([(lot.id, lot.item_name) for lot in lots if lot.is_open])
+
+    # Price every visible lot in one batch instead of one lookup per lot.
+    prices = monitor_price_table(tuple(lot.item_name for lot in lots))
+
+    for lot, market, final in zip(lots, prices["market_price"], prices["final_price"]):
         with st.container():
-            st.markdown(f"### 🍎 {fruit}")
-            st.write(f"📦 **Quantity:** {quantity} kg")
-            st.write(f"💰 **Base Price:** ₹{base_price}/kg")
-            st.write(f"📅 **Date Added:** {date_added}")
-            st.button(f"💰 Place Bid on {fruit}", key=f"bid_{idx}_{int(time.time())}")
+            st.markdown(f"### 🍎 {lot.item_name}")
+            st.write(f"📦 **Quantity:** {lot.quantity_label}")
+            st.write(f"💰 **Base Price:** ₹{lot.base_price}/kg")
+            st.write(f"🏷️ **Market Price:** ₹{market:g}/kg · FruitBid price ₹{final:g}/kg")
+            st.write(f"📅 **Date Added:** {format_epoch(lot.date_added, '%Y-%m-%d')}")
+            if lot.is_open:
+                render_bid_summary(lot.id)
+            render_auction_status(lot.status, lot.closes_at, lot.winner_phone, lot.winning_amount)
+            st.button(f"💰 Place Bid on {lot.item_name}", key=f"bid_{lot.id}", disabled=not lot.is_open)
             st.markdown("---")
-            
+
+    prev_col, _, next_col = st.columns([1, 4, 1])
+    if prev_col.button("⬅️ Newer", disabled=page_no == 1, key="lots_prev"):
+        st.session_state.lots_cursors.pop()
+        st.rerun()
+    if next_col.button("Older ➡️", disabled=next_cursor is None, key="lots_next"):
+        st.session_state.lots_cursors.append(next_cursor)
+        st.rerun()
 else:
     st.info("No fruit lots available yet. Please add some from the ⚙️ Admin Add Lot page.")
 
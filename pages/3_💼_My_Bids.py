@@ -3,8 +3,6 @@
 # =====================================================
 
 import streamlit as st
-import sqlite3
-from datetime import datetime
 
 # =====================================================
 # ✅ PAGE CONFIG (must be the first Streamlit command)
@@ -14,22 +12,23 @@ st.set_page_config(page_title="💼 My Bids", page_icon="💼", layout="wide")
 # =====================================================
 # 📂 IMPORTS
 # =====================================================
+from db import bootstrap, format_epoch
+from dal import bids_by_phone, lot_names_by_id, open_lots  # Named queries over every lot shard
+from orderbook import get_order_book
+from auction_scheduler import get_auction_scheduler
+
 try:
     from components.sidebar import render_sidebar
-    from app_web import init_db  # Database setup function
 except ModuleNotFoundError:
-    st.warning("⚠️ Missing imports — using fallback menu and DB init.")
+    st.warning("⚠️ Missing imports — using fallback menu.")
     def render_sidebar():
         with st.sidebar:
             return st.radio("Navigate:", ["🏠 Home", "🏪 Marketplace", "💼 My Bids", "⚙️ Add Lot (Admin)"])
-    def init_db(): pass
-
-DB_PATH = "fruitbid.db"
 
 # =====================================================
 # ⚙️ INITIAL SETUP
 # =====================================================
-init_db()  # Ensure tables exist before proceeding
+bootstrap()  # Schema check runs once per process, not on every rerun
 
 
 # =====================================================
@@ -80,72 +79,46 @@ st.markdown("---")
 # 🧺 DATABASE HELPERS
 # =====================================================
 def get_available_lots():
-    """Fetch all fruit lots."""
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute("""
-            SELECT item_name, base_price 
-            FROM lots ORDER BY id DESC
-        """)
-        return c.fetchall()
-
-
-def create_bids_table():
-    """Ensure bids table exists."""
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS bids (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_phone TEXT,
-                item_name TEXT,
-                bid_price REAL,
-                bid_time TEXT
-            )
-        """)
-        conn.commit()
-
-
-def insert_bid(phone, item_name, bid_price):
-    """Insert a new bid."""
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute("""
-            INSERT INTO bids (user_phone, item_name, bid_price, bid_time)
-            VALUES (?, ?, ?, ?)
-        """, (
-            phone,
-            item_name,
-            bid_price,
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        ))
-        conn.commit()
+    """Fetch lots still open for bidding, soonest closing first."""
+    return open_lots()
+
+
+def insert_bid(phone, lot_id, bid_price):
+    """Insert a new bid (persisted and applied to the order book)."""
+    return order_book.place_bid(lot_id, phone, bid_price, user_name=user_name)
 
 
 def get_user_bids(phone):
-    """Fetch all bids by a user."""
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute("""
-            SELECT item_name, bid_price, bid_time
-            FROM bids WHERE user_phone = ? ORDER BY id DESC
-        """, (phone,))
-        return c.fetchall()
+    """All bids by a user, settled lots included, newest first (indexed, every shard)."""
+    return [(bid.id, bid.lot_id, bid.bid_amount, bid.timestamp) for bid in bids_by_phone(phone)]
 
 
 # =====================================================
 # 💰 PLACE A NEW BID
 # =====================================================
-create_bids_table()
+order_book = get_order_book()
+get_auction_scheduler()  # closes lots as their deadlines pass
 lots = get_available_lots()
+lot_names = lot_names_by_id()
 
 if lots:
     st.subheader("💰 Place a New Bid")
 
-    item_options = [lot[0] for lot in lots]
-    selected_item = st.selectbox("Select Fruit Lot", item_options)
-
-    base_price = next(lot[1] for lot in lots if lot[0] == selected_item)
+    lots_by_id = {lot.id: lot for lot in lots}
+    lot_options = list(lots_by_id)
+    selected_lot = st.selectbox(
+        "Select Fruit Lot",
+        lot_options,
+        format_func=lambda lot_id: f"{lot_names[lot_id]} (Lot #{lot_id})",
+    )
+    selected_item = lot_names[selected_lot]
+
+    base_price, closes_at = lots_by_id[selected_lot].base_price, lots_by_id[selected_lot].closes_at
+    high = order_book.high_bid(selected_lot)
+    if high:
+        st.caption(f"🔥 Current high bid: ₹{high[1]}/kg · {order_book.depth(selected_lot)} bid(s)")
+    if closes_at:
+        st.caption(f"⏳ Bidding closes at {format_epoch(closes_at)}")
     bid_price = st.number_input(
         f"Enter your bid (₹/kg) — Base price ₹{base_price}",
         min_value=1.0,
@@ -153,10 +126,13 @@ if lots:
     )
 
     if st.button("✅ Submit Bid"):
-        insert_bid(user_phone, selected_item, bid_price)
-        st.success(f"🎉 Bid of ₹{bid_price}/kg placed for **{selected_item}** successfully!")
+        try:
+            insert_bid(user_phone, selected_lot, bid_price)
+            st.success(f"🎉 Bid of ₹{bid_price}/kg placed for **{selected_item}** successfully!")
+        except ValueError:
+            st.error(f"⌛ Bidding on **{selected_item}** has closed.")
 else:
-    st.info("No fruit lots available yet. Please add some from the ⚙️ Admin Add Lot page.")
+    st.info("No open fruit lots right now. Please add some from the ⚙️ Admin Add Lot page.")
 
 st.markdown("---")
 
@@ -170,7 +146,10 @@ st.subheader("📋 Your Bids")
 
 if user_bids:
     st.dataframe(
-        [{"Fruit": f, "Bid (₹/kg)": b, "Time": t} for f, b, t in user_bids],
+        [
+            {"Fruit": lot_names.get(lot_id, f"Lot #{lot_id}"), "Bid (₹/kg)": b, "Time": format_epoch(t)}
+            for _, lot_id, b, t in user_bids
+        ],
         use_container_width=True
     )
 else:
@@ -3,11 +3,12 @@
 # =====================================================
 
 import streamlit as st
-import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 from components.sidebar import render_sidebar
-
-DB_PATH = "fruitbid.db"
+from db import DEFAULT_AUCTION_HOURS, bootstrap, insert_lot, format_epoch
+from dal import newest_lots
+from auth import require_admin
+from auction_scheduler import get_auction_scheduler
 
 
 # =====================================================
@@ -30,49 +31,29 @@ render_sidebar()
 # =====================================================
 # 🗃️ DATABASE HELPERS
 # =====================================================
-def init_db():
-    """Create the lots table if it doesn’t exist."""
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS lots (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_name TEXT NOT NULL,
-                quantity TEXT NOT NULL,
-                base_price REAL NOT NULL,
-                date_added TEXT
-            )
-        """)
-        conn.commit()
-
-
-def add_lot(item_name: str, quantity: str, base_price: float):
-    """Insert a new fruit lot into the database."""
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute("""
-            INSERT INTO lots (item_name, quantity, base_price, date_added)
-            VALUES (?, ?, ?, ?)
-        """, (item_name, quantity, base_price, datetime.now().strftime("%Y-%m-%d %H:%M")))
-        conn.commit()
+def add_lot(item_name: str, quantity: str, base_price: float, hours: float = DEFAULT_AUCTION_HOURS):
+    """Insert a new fruit lot; insert_lot queues its auction close with the scheduler."""
+    now = datetime.now()
+    closes_at = now + timedelta(hours=hours)
+    insert_lot(item_name, quantity, base_price, now, closes_at)
+    return closes_at
 
 
 def fetch_lots():
-    """Retrieve all lots from the database."""
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute("SELECT item_name, quantity, base_price, date_added FROM lots ORDER BY id DESC")
-        return c.fetchall()
+    """Retrieve all lots from the database, newest first."""
+    return newest_lots()
 
 
-# Initialize database
-init_db()
+# Initialize database (lots table and deadline columns come from migrations)
+bootstrap()
+get_auction_scheduler()  # closes lots as their deadlines pass
 
 
 # =====================================================
 # 🌟 PAGE CONTENT
 # =====================================================
 st.title("⚙️ Admin — Add a New Fruit Lot")
+require_admin()
 st.write("Add fresh fruit lots for bidding. (Admin use only)")
 st.markdown("---")
 
@@ -84,13 +65,14 @@ with st.form("add_lot_form", clear_on_submit=True):
     item_name = st.text_input("🍎 Fruit Name", placeholder="e.g. Mango (Alphonso)")
     quantity = st.text_input("📦 Quantity", placeholder="e.g. 10 kg, 1 crate")
     base_price = st.number_input("💰 Base Price (₹ per kg)", min_value=1.0, step=0.5)
+    hours = st.number_input("⏳ Auction duration (hours)", min_value=0.25, value=float(DEFAULT_AUCTION_HOURS), step=1.0)
 
     submitted = st.form_submit_button("✅ Add Lot")
 
     if submitted:
         if item_name.strip() and quantity.strip():
-            add_lot(item_name.strip(), quantity.strip(), base_price)
-            st.success(f"✅ New lot added: **{item_name} ({quantity})** at ₹{base_price}/kg")
+            closes_at = add_lot(item_name.strip(), quantity.strip(), base_price, hours)
+            st.success(f"✅ New lot added: **{item_name} ({quantity})** at ₹{base_price}/kg — closes {closes_at:%Y-%m-%d %H:%M}")
             st.balloons()
             st.rerun()
         else:
@@ -101,15 +83,16 @@ with st.form("add_lot_form", clear_on_submit=True):
 # 📦 CURRENT LOTS
 # =====================================================
 st.markdown("---")
-st.subheader("📦 Current Active Lots")
+st.subheader("📦 Current Lots")
 
 rows = fetch_lots()
 
 if rows:
     st.dataframe(
         [
-            {"Fruit": r[0], "Quantity": r[1], "Base Price": f"₹{r[2]}/kg", "Added": r[3]}
-            for r in rows
+            {"Fruit": lot.item_name, "Quantity": lot.quantity_label, "Base Price": f"₹{lot.base_price}/kg",
+             "Added": format_epoch(lot.date_added), "Status": lot.status, "Closes": format_epoch(lot.closes_at)}
+            for lot in rows
         ],
         use_container_width=True,
     )
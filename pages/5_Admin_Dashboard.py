@@ -3,12 +3,15 @@
 # =====================================================
 
 import streamlit as st
-import sqlite3
-from contextlib import closing
 
 # Try importing DB helpers safely
 try:
-    from db import init_db, initialize_items, get_db_connection
+    from db import init_db, initialize_items, reset_database
+    from db_utils import all_settings, refresh_if_stale, set_setting
+    from auth import require_admin, logout_admin
+    from table_stats import get_row_counts, growth_rates, record_sample, table_sizes
+    from table_browser import browse, export_csv, export_parquet, list_tables
+    from event_log import get_event_journal
 except ImportError:
     st.error("⚠️ Missing `db.py` module. Please ensure it exists in your project folder.")
     st.stop()
@@ -18,6 +21,10 @@ except ImportError:
 # =====================================================
 
 st.title("🛠️ FruitBid Admin Dashboard")
+require_admin()  # bcrypt only on login; reruns just verify the session token
+if st.button("🔒 Admin Logout"):
+    logout_admin()
+    st.rerun()
 st.markdown("Manage your database and system configuration safely below.")
 st.markdown("---")
 
@@ -70,50 +77,147 @@ TABLES = [
 summary_data = []
 
 try:
-    with closing(get_db_connection()) as conn:
-        if conn is None:
-            raise RuntimeError("Database connection could not be established.")
-        with closing(conn.cursor()) as c:
-            for table in TABLES:
-                try:
-                    c.execute(f"SELECT COUNT(*) FROM {table}")
-                    count = c.fetchone()[0]
-                    summary_data.append({"Table": table, "Records": count})
-                except sqlite3.OperationalError:
-                    summary_data.append({"Table": table, "Records": "❌ Not Found"})
-                except Exception as e:
-                    summary_data.append({"Table": table, "Records": f"⚠️ {type(e).__name__}"})
+    # Exact counts are maintained by triggers — no COUNT(*) scans here.
+    record_sample()
+    counts = get_row_counts()
+    rates = growth_rates()
+    sizes = st.session_state.get("admin_table_sizes", {})
+
+    for table in TABLES:
+        if table not in counts:
+            summary_data.append({"Table": table, "Records": "❌ Not Found"})
+            continue
+        rate = rates.get(table)
+        row = {
+            "Table": table,
+            "Records": counts[table],
+            "Growth / day": "—" if rate is None else f"{rate:+,.0f}",
+        }
+        if sizes:
+            row["On Disk"] = f"{sizes.get(table, 0) / 1024:,.0f} KiB"
+        summary_data.append(row)
 
     st.write("### Table Summary")
     st.dataframe(summary_data, use_container_width=True)
 
+    if st.button("📏 Measure on-disk size (scans the whole file)"):
+        st.session_state.admin_table_sizes = table_sizes()
+        st.rerun()
+
 except Exception as e:
     st.error(f"⚠️ Database access error: {e}")
 
+# =====================================================
+# 📜 BID EVENT JOURNAL
+# =====================================================
+st.subheader("📜 Bid Event Journal")
+
+try:
+    journal = get_event_journal()
+    journal.refresh()
+    j1, j2, j3, j4 = st.columns(4)
+    j1.metric("Latest seq", journal.seq)
+    j2.metric("Last snapshot", journal.snapshot_seq)
+    j3.metric("Replayed at startup", journal.replayed_at_start)
+    j4.metric("Lots tracked", len(journal.lots()))
+    if st.button("📸 Write snapshot now"):
+        st.success(f"✅ Snapshots written to {', '.join(f'`{path}`' for path in journal.snapshot())}")
+except Exception as e:
+    st.error(f"⚠️ Journal error: {e}")
+
+# =====================================================
+# ⚙️ APP SETTINGS
+# =====================================================
+st.subheader("⚙️ App Settings")
+
+try:
+    refresh_if_stale()
+    settings = all_settings()
+    st.dataframe(
+        [{"Key": k, "Value": v, "Type": type(v).__name__} for k, v in sorted(settings.items())],
+        use_container_width=True,
+    )
+
+    with st.form("settings_form"):
+        discount = st.number_input(
+            "Discount on market price (%)",
+            min_value=0.0,
+            max_value=100.0,
+            value=float(settings.get("discount_pct", 20.0)),
+            step=1.0,
+        )
+        if st.form_submit_button("💾 Save Settings"):
+            set_setting("discount_pct", float(discount))
+            st.success("✅ Settings saved.")
+except Exception as e:
+    st.error(f"⚠️ Settings unavailable: {e}")
+
+st.markdown("---")
+
 # =====================================================
 # 🧾 RAW DB INSPECTION (Optional)
 # =====================================================
+BROWSE_PAGE_ROWS = 50
+
 with st.expander("🧾 Inspect Table Contents"):
-    selected_table = st.selectbox("Select a table to view its records:", TABLES)
-    if st.button("View Table"):
+    try:
+        browsable = list_tables()
+    except Exception as e:
+        browsable = []
+        st.error(f"❌ Could not list tables:\n\n{e}")
+
+    selected_table = st.selectbox("Select a table to view its records:", browsable)
+    browser = st.session_state.setdefault("table_browser", {"table": None, "after": None, "before": None})
+    if browser["table"] != selected_table:
+        browser.update(table=selected_table, after=None, before=None)
+
+    if selected_table:
         try:
-            with closing(get_db_connection()) as conn:
-                if conn:
-                    with closing(conn.cursor()) as c:
-                        c.execute(f"PRAGMA table_info({selected_table})")
-                        columns = [col[1] for col in c.fetchall()]
-                        c.execute(f"SELECT * FROM {selected_table} LIMIT 20")
-                        rows = c.fetchall()
-                        if rows:
-                            st.dataframe(
-                                [dict(zip(columns, row)) for row in rows],
-                                use_container_width=True,
-                            )
-                        else:
-                            st.info("No records found in this table.")
+            columns, rows, first, last, has_previous, has_next = browse(
+                selected_table,
+                after=browser["after"],
+                before=browser["before"],
+                limit=BROWSE_PAGE_ROWS,
+            )
+            if not rows and (browser["after"] is not None or browser["before"] is not None):
+                # The rows around the cursor were deleted meanwhile; start over from the top.
+                browser.update(after=None, before=None)
+                columns, rows, first, last, has_previous, has_next = browse(
+                    selected_table, limit=BROWSE_PAGE_ROWS
+                )
+            if rows:
+                st.dataframe(
+                    [dict(zip(columns, row)) for row in rows],
+                    use_container_width=True,
+                )
+                st.caption(f"Rows with rowid {first[0]} – {last[0]}")
+            else:
+                st.info("No records found in this range.")
+
+            back_col, fwd_col, _ = st.columns([1, 1, 4])
+            if back_col.button("⬅️ Previous", disabled=not has_previous, key="browse_back"):
+                browser.update(after=None, before=first)
+                st.rerun()
+            if fwd_col.button("Next ➡️", disabled=not has_next, key="browse_fwd"):
+                browser.update(after=last, before=None)
+                st.rerun()
         except Exception as e:
             st.error(f"❌ Failed to read table `{selected_table}`:\n\n{e}")
 
+        st.markdown("**📤 Export (streamed in chunks, written on the server)**")
+        csv_col, parquet_col = st.columns(2)
+        for col, label, exporter in (
+            (csv_col, "CSV", export_csv),
+            (parquet_col, "Parquet", export_parquet),
+        ):
+            if col.button(f"Export {label}", key=f"export_{label}"):
+                try:
+                    with st.spinner(f"Exporting `{selected_table}` to {label}..."):
+                        path, count = exporter(selected_table)
+                    st.success(f"✅ Wrote {count:,} rows to `{path}`")
+                except Exception as e:
+                    st.error(f"❌ Export failed:\n\n{e}")
+
 # =====================================================
 # 🧩 FOOTER
 # =====================================================
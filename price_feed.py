@@ -0,0 +1,191 @@
+# =====================================================
+# 💹 price_feed.py — Concurrent Market Price Fetcher
+# =====================================================
+#
+# Prices come from PRICE_API_URL (GET {url}/price?item=<name> -> {"price": 120}).
+# When it is unset, or a request fails, the built-in mock table is used.
+#
+# All HTTP runs on one background event loop that owns a single pooled
+# httpx.AsyncClient, so every Streamlit session shares connections, the
+# concurrency cap and in-flight de-duplication.
+
+import asyncio
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PRICE_API_URL = os.getenv("PRICE_API_URL")
+PRICE_API_TIMEOUT = float(os.getenv("PRICE_API_TIMEOUT", "5"))
+PRICE_API_CONCURRENCY = int(os.getenv("PRICE_API_CONCURRENCY", "10"))
+
+# Fallback mock data
+MARKET_PRICES = {
+    "Apple": 200,
+    "Mosambi": 50,
+    "Banana": 40,
+    "Papaya": 50,
+    "Kiwi": 200,
+    "Dragon Fruit": 250,
+    "Pineapple": 60,
+    "Custard Apple": 100,
+    "Sapota": 60,
+    "Mango": 120,
+    "Spinach": 30,
+    "Honey": 300,
+}
+DEFAULT_PRICE = 100.0
+
+
+def fallback_price(item: str) -> float:
+    return float(MARKET_PRICES.get(item, DEFAULT_PRICE))
+
+
+# =====================================================
+# 🔁 FETCHER
+# =====================================================
+class PriceFetcher:
+    """
+    Batch price lookups over one async client.
+    fetch_prices() is a blocking call safe to use from any Streamlit thread.
+    """
+
+    def __init__(self, base_url=PRICE_API_URL, timeout=PRICE_API_TIMEOUT,
+                 concurrency=PRICE_API_CONCURRENCY, transport=None):
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self._transport = transport  # e.g. httpx.MockTransport in tests
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._in_flight = {}  # item -> asyncio.Future, touched only on the loop thread
+        self._start_lock = threading.Lock()
+        self.errors = 0
+
+    # -------- event loop --------
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                import httpx  # deferred: pages that never price anything skip it
+
+                asyncio.set_event_loop(loop)
+                self._client = httpx.AsyncClient(
+                    base_url=self.base_url,
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.concurrency,
+                        max_keepalive_connections=self.concurrency,
+                    ),
+                    transport=self._transport,
+                )
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+                ready.set()
+                loop.run_forever()
+
+            threading.Thread(target=run, name="price-feed", daemon=True).start()
+            ready.wait()
+            self._loop = loop
+
+    def close(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    # -------- async core --------
+    async def _request(self, item):
+        import httpx
+
+        async with self._semaphore:
+            try:
+                response = await self._client.get("/price", params={"item": item})
+                response.raise_for_status()
+                return float(response.json().get("price", fallback_price(item)))
+            except (httpx.HTTPError, ValueError, TypeError):
+                self.errors += 1
+                return fallback_price(item)
+
+    async def _fetch_one(self, item):
+        # Concurrent callers asking for the same item share one request.
+        future = self._in_flight.get(item)
+        if future is None:
+            future = asyncio.ensure_future(self._request(item))
+            self._in_flight[item] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(item, None))
+        return await asyncio.shield(future)
+
+    async def _fetch_many(self, items):
+        prices = await asyncio.gather(*(self._fetch_one(item) for item in items))
+        return dict(zip(items, prices))
+
+    # -------- public API --------
+    def fetch_prices(self, items):
+        """Return {item: price} for every distinct item, fetched concurrently."""
+        unique = list(dict.fromkeys(items))
+        if not self.base_url:
+            return {item: fallback_price(item) for item in unique}
+        if not unique:
+            return {}
+        self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._fetch_many(unique), self._loop)
+        return future.result(timeout=self.timeout * (len(unique) / self.concurrency + 2))
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_price_fetcher() -> PriceFetcher:
+    """Shared PriceFetcher for this process."""
+    global _fetcher
+    if _fetcher is None:
+        with _fetcher_lock:
+            if _fetcher is None:
+                _fetcher = PriceFetcher()
+    return _fetcher
+
+
+# =====================================================
+# 🧪 LOCAL STUB PRICE SERVER
+# =====================================================
+def run_stub_server(host="127.0.0.1", port=8765, prices=None):
+    """
+    Serve GET /price?item=... from `prices` (default: MARKET_PRICES) for local
+    testing: `python price_feed.py` then PRICE_API_URL=http://127.0.0.1:8765.
+    Returns the server; call serve_forever() or run it in a thread.
+    """
+    table = dict(MARKET_PRICES if prices is None else prices)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            item = parse_qs(url.query).get("item", [""])[0]
+            if url.path != "/price" or item not in table:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = json.dumps({"item": item, "price": table[item]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+if __name__ == "__main__":
+    server = run_stub_server()
+    print(f"💹 Stub price API on http://{server.server_address[0]}:{server.server_address[1]}")
+    server.serve_forever()
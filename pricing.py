@@ -0,0 +1,106 @@
+# =====================================================
+# 🏷️ pricing.py — Vectorized Bulk Pricing
+# =====================================================
+#
+# price_items() prices a whole batch in one NumPy/pandas pass. Both are
+# imported inside it, so importing this module (and cold-starting a page)
+# stays cheap until something is actually priced; price_table() returns the
+# same result as plain lists.
+
+from db_utils import get_setting
+from price_feed import get_price_fetcher, fallback_price
+
+DEFAULT_DISCOUNT_PCT = 20.0
+
+# Item -> category, used to resolve per-category discounts.
+ITEM_CATEGORIES = {
+    "Apple": "Fruit",
+    "Mosambi": "Fruit",
+    "Banana": "Fruit",
+    "Papaya": "Fruit",
+    "Kiwi": "Fruit",
+    "Dragon Fruit": "Fruit",
+    "Pineapple": "Fruit",
+    "Custard Apple": "Fruit",
+    "Sapota": "Fruit",
+    "Mango": "Fruit",
+    "Spinach": "Vegetable",
+    "Honey": "Other",
+}
+
+
+def global_discount_pct() -> float:
+    """Store-wide discount from settings, falling back to the default."""
+    try:
+        return float(get_setting("discount_pct", DEFAULT_DISCOUNT_PCT))
+    except (TypeError, ValueError):
+        return DEFAULT_DISCOUNT_PCT
+
+
+def market_prices(items) -> dict:
+    """{item: market price} for the distinct items, fetched in one batch."""
+    try:
+        return get_price_fetcher().fetch_prices(items)
+    except Exception:
+        return {item: fallback_price(item) for item in items}
+
+
+# =====================================================
+# 🧮 BULK PRICING
+# =====================================================
+def price_items(items, item_discounts=None, category_discounts=None,
+                categories=None, default_discount=None):
+    """
+    Price a list/Series of item names in one pass.
+
+    Discount precedence per row: item_discounts[item], then
+    category_discounts[categories[item]], then default_discount
+    (the `discount_pct` setting when not given).
+
+    Returns a DataFrame aligned with `items` with columns
+    item, category, market_price, discount_pct, final_price.
+    """
+    import numpy as np
+    import pandas as pd
+
+    items = pd.Series(items, dtype="object").reset_index(drop=True)
+    distinct = items.dropna().unique().tolist()
+    if default_discount is None:
+        default_discount = global_discount_pct()
+
+    market = items.map(market_prices(distinct)).astype("float64")
+    category = items.map(categories or ITEM_CATEGORIES)
+
+    discount = pd.Series(np.nan, index=items.index)
+    if item_discounts:
+        discount = items.map(item_discounts).astype("float64")
+    if category_discounts:
+        discount = discount.fillna(category.map(category_discounts).astype("float64"))
+    discount = discount.fillna(float(default_discount))
+
+    final = np.round(market.to_numpy() * (1.0 - discount.to_numpy() / 100.0), 2)
+    return pd.DataFrame({
+        "item": items,
+        "category": category,
+        "market_price": market,
+        "discount_pct": discount,
+        "final_price": final,
+    })
+
+
+def price_table(items, item_discounts=None, category_discounts=None,
+                categories=None, default_discount=None) -> dict:
+    """price_items() as {column: [values]} of plain Python values (picklable, cache-friendly)."""
+    priced = price_items(items, item_discounts, category_discounts, categories, default_discount)
+    table = {column: priced[column].tolist() for column in priced.columns}
+    table["category"] = [c if isinstance(c, str) else None for c in table["category"]]
+    return table
+
+
+def price_lots(lots, item_col="item_name", **discounts):
+    """Return a copy of `lots` with market_price, discount_pct and final_price columns added."""
+    priced = price_items(lots[item_col], **discounts)
+    out = lots.copy()
+    for col in ("market_price", "discount_pct", "final_price"):
+        out[col] = priced[col].to_numpy()
+    return out
@@ -0,0 +1,343 @@
+# =====================================================
+# 📤 sms_queue.py — Outbound SMS Queue & Worker Pool
+# =====================================================
+#
+# enqueue_sms() writes a row to `outbound_messages` and returns immediately
+# with a MessageHandle. A small pool of worker threads claims due messages in
+# batches, sends them through one shared HTTP client (Twilio's Messages API by
+# default; SMS_API_URL points it at a local stand-in) and retries failures with
+# exponential backoff. A claim is a lease: rows left 'sending' past
+# SMS_LEASE_SECONDS (worker died mid-batch) are claimed again.
+
+import json
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from db import fetch_one, on_reset, write_connection
+
+TWILIO_SID = os.getenv("TWILIO_SID")
+TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+TWILIO_PHONE = os.getenv("TWILIO_PHONE")
+SMS_API_URL = os.getenv("SMS_API_URL", "https://api.twilio.com")
+
+SMS_WORKERS = int(os.getenv("SMS_WORKERS", "2"))
+SMS_BATCH_SIZE = int(os.getenv("SMS_BATCH_SIZE", "20"))
+SMS_MAX_ATTEMPTS = int(os.getenv("SMS_MAX_ATTEMPTS", "5"))
+SMS_BACKOFF_SECONDS = float(os.getenv("SMS_BACKOFF_SECONDS", "2"))
+SMS_TIMEOUT = float(os.getenv("SMS_TIMEOUT", "10"))
+SMS_LEASE_SECONDS = float(os.getenv("SMS_LEASE_SECONDS", "300"))
+
+QUEUED, SENDING, SENT, FAILED = "queued", "sending", "sent", "failed"
+
+
+def _now():
+    return datetime.now()
+
+
+def _ts(moment):
+    return moment.isoformat(timespec="seconds")
+
+
+# =====================================================
+# 🎫 DELIVERY HANDLE
+# =====================================================
+class MessageHandle:
+    """Returned by enqueue_sms(); lets a page poll delivery status without blocking."""
+
+    __slots__ = ("id", "_queue")
+
+    def __init__(self, message_id, queue):
+        self.id = message_id
+        self._queue = queue
+
+    def status(self):
+        """'queued', 'sending', 'sent' or 'failed'."""
+        return self._queue.status(self.id)
+
+    def wait(self, timeout=None):
+        """Block until the message is sent or has failed for good. Returns the final status."""
+        return self._queue.wait(self.id, timeout)
+
+    def __repr__(self):
+        return f"MessageHandle(id={self.id}, status={self.status()!r})"
+
+
+# =====================================================
+# 📬 QUEUE + WORKERS
+# =====================================================
+class SmsQueue:
+    def __init__(self, account_sid=TWILIO_SID, auth_token=TWILIO_AUTH_TOKEN,
+                 from_number=TWILIO_PHONE, base_url=SMS_API_URL, workers=SMS_WORKERS,
+                 batch_size=SMS_BATCH_SIZE, max_attempts=SMS_MAX_ATTEMPTS,
+                 backoff=SMS_BACKOFF_SECONDS, lease=SMS_LEASE_SECONDS, transport=None):
+        self.account_sid = account_sid
+        self.from_number = from_number
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lease = lease
+        import httpx  # deferred until a queue is actually built
+
+        self._http_errors = (httpx.HTTPError, ValueError)
+        self._client = httpx.Client(
+            base_url=base_url,
+            auth=(account_sid or "", auth_token or ""),
+            timeout=SMS_TIMEOUT,
+            limits=httpx.Limits(max_connections=self.workers, max_keepalive_connections=self.workers),
+            transport=transport,
+        )
+        self._status = {}  # message id -> status, kept current by the workers
+        self._wakeup = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+
+    # -------- producer side --------
+    def enqueue(self, to_number, body) -> MessageHandle:
+        now = _ts(_now())
+        with write_connection() as conn:
+            message_id = conn.execute(
+                """
+                INSERT INTO outbound_messages (to_number, body, status, next_attempt_at, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (to_number, body, QUEUED, now, now),
+            ).lastrowid
+        with self._wakeup:
+            self._status[message_id] = QUEUED
+            self._wakeup.notify_all()
+        return MessageHandle(message_id, self)
+
+    def status(self, message_id):
+        status = self._status.get(message_id)
+        if status is None:
+            row = fetch_one("SELECT status FROM outbound_messages WHERE id = ?", (message_id,), cached=False)
+            status = row[0] if row else None
+        return status
+
+    def forget(self):
+        """Drop cached statuses; ids from a reset database start over."""
+        with self._wakeup:
+            self._status.clear()
+
+    def wait(self, message_id, timeout=None):
+        deadline = None if timeout is None else _now() + timedelta(seconds=timeout)
+        with self._wakeup:
+            while self.status(message_id) not in (SENT, FAILED):
+                remaining = None if deadline is None else (deadline - _now()).total_seconds()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._wakeup.wait(remaining if remaining is not None else 1.0)
+        return self.status(message_id)
+
+    # -------- worker side --------
+    def _claim_batch(self):
+        """
+        Atomically move up to batch_size due messages to sending. Queued rows
+        are due at next_attempt_at; sending rows once their lease runs out.
+        """
+        now = _now()
+        with write_connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT id, to_number, body, attempts FROM outbound_messages
+                WHERE status IN (?, ?) AND next_attempt_at <= ?
+                ORDER BY next_attempt_at LIMIT ?
+                """,
+                (QUEUED, SENDING, _ts(now), self.batch_size),
+            ).fetchall()
+            if rows:
+                lease_until = _ts(now + timedelta(seconds=self.lease))
+                conn.executemany(
+                    """
+                    UPDATE outbound_messages
+                    SET status = ?, attempts = attempts + 1, next_attempt_at = ?
+                    WHERE id = ?
+                    """,
+                    [(SENDING, lease_until, row[0]) for row in rows],
+                )
+        for row in rows:
+            self._status[row[0]] = SENDING
+        return rows
+
+    def _send(self, to_number, body):
+        response = self._client.post(
+            f"/2010-04-01/Accounts/{self.account_sid}/Messages.json",
+            data={"To": to_number, "From": self.from_number, "Body": body},
+        )
+        response.raise_for_status()
+        return response.json().get("sid")
+
+    def _process(self, batch):
+        results = []
+        for message_id, to_number, body, attempts in batch:
+            try:
+                results.append((message_id, SENT, self._send(to_number, body), None, attempts + 1))
+            except self._http_errors as e:
+                results.append((message_id, None, None, str(e)[:500], attempts + 1))
+
+        self._record(results)
+
+    def _retry(self, batch, error):
+        """Put a claimed batch back in the queue (with backoff) after an unexpected error."""
+        self._record([(message_id, None, None, error[:500], attempts + 1)
+                      for message_id, _, _, attempts in batch])
+
+    def _record(self, results):
+        now = _now()
+        updates = []
+        for message_id, status, provider_id, error, attempts in results:
+            if status is None:
+                if attempts >= self.max_attempts:
+                    status, retry_at = FAILED, now
+                else:
+                    # Exponential backoff with jitter so retries from a burst spread out.
+                    delay = self.backoff * (2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+                    status, retry_at = QUEUED, now + timedelta(seconds=delay)
+            else:
+                retry_at = now
+            updates.append((status, provider_id, error, _ts(retry_at), _ts(now), message_id))
+
+        with write_connection() as conn:
+            conn.executemany(
+                """
+                UPDATE outbound_messages
+                SET status = ?, provider_id = COALESCE(?, provider_id), last_error = ?,
+                    next_attempt_at = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                updates,
+            )
+        with self._wakeup:
+            for status, _, _, _, _, message_id in updates:
+                if status in (SENT, FAILED):
+                    self._status.pop(message_id, None)  # final state now lives in SQLite
+                else:
+                    self._status[message_id] = status
+            self._wakeup.notify_all()
+
+    def _next_due_in(self):
+        row = fetch_one(
+            "SELECT MIN(next_attempt_at) FROM outbound_messages WHERE status IN (?, ?)",
+            (QUEUED, SENDING),
+            cached=False,
+        )
+        if not row or row[0] is None:
+            return None
+        return max(0.0, (datetime.fromisoformat(row[0]) - _now()).total_seconds())
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                batch = self._claim_batch()
+            except Exception:
+                batch = []
+            if batch:
+                try:
+                    self._process(batch)
+                except Exception as e:
+                    try:
+                        self._retry(batch, repr(e))
+                    except Exception:
+                        pass  # rows stay 'sending' until their lease runs out
+                continue
+            try:
+                idle = self._next_due_in()
+            except Exception:
+                idle = None
+            with self._wakeup:
+                self._wakeup.wait(min(idle, 30.0) if idle is not None else 30.0)
+
+    def start(self):
+        if self._threads:
+            return
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"sms-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        self._client.close()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_sms_queue() -> SmsQueue:
+    """Shared, started SmsQueue for this process."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                queue = SmsQueue()
+                queue.start()
+                _queue = queue
+    return _queue
+
+
+@on_reset
+def _forget_statuses():
+    if _queue is not None:
+        _queue.forget()
+
+
+def enqueue_sms(to_number, body) -> MessageHandle:
+    """✅ Queue an SMS and return at once with a delivery-status handle."""
+    return get_sms_queue().enqueue(to_number, body)
+
+
+# =====================================================
+# 🧪 LOCAL SMS PROVIDER STAND-IN
+# =====================================================
+def run_stub_provider(host="127.0.0.1", port=8766, fail_rate=0.0):
+    """
+    Accept Twilio-style POST .../Messages.json and answer 201 {"sid": ...};
+    a fraction `fail_rate` of requests get a 503 to exercise retries.
+    `python sms_queue.py` then SMS_API_URL=http://127.0.0.1:8766.
+    """
+    sent = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            form = parse_qs(self.rfile.read(length).decode())
+            if not self.path.endswith("/Messages.json"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            if random.random() < fail_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+            sid = f"SM{len(sent):032d}"
+            sent.append({"sid": sid, "to": form.get("To", [""])[0], "body": form.get("Body", [""])[0]})
+            payload = json.dumps({"sid": sid, "status": "queued"}).encode()
+            self.send_response(201)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.sent = sent
+    return server
+
+
+if __name__ == "__main__":
+    server = run_stub_provider()
+    print(f"📤 Stub SMS provider on http://{server.server_address[0]}:{server.server_address[1]}")
+    server.serve_forever()
@@ -0,0 +1,645 @@
+# =====================================================
+# 🗄️ storage.py — Repository Interface & Storage Backends
+# =====================================================
+#
+# One interface for lots, bids, users, OTPs and settings, with three
+# interchangeable backends:
+#
+#   SqliteRepository     the pooled/sharded SQLite store in db.py
+#   MemoryRepository     plain dicts, for tests and demos
+#   PostgrestRepository  Supabase/PostgREST over one shared HTTP/2 client;
+#                        reads for many ids are one `in.(...)` request and
+#                        bulk writes are one POST with a JSON array
+#
+# Rows go in and come out as dicts keyed by the column names below.
+# get_repository() picks the backend from FRUITBID_STORAGE.
+
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+STORAGE_BACKEND = os.getenv("FRUITBID_STORAGE", "sqlite")
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+POSTGREST_TIMEOUT = float(os.getenv("POSTGREST_TIMEOUT", "10"))
+POSTGREST_CONNECTIONS = int(os.getenv("POSTGREST_CONNECTIONS", "10"))
+
+LOT_FIELDS = ("id", "item_name", "quantity", "base_price", "date_added", "closes_at", "status")
+BID_FIELDS = ("id", "lot_id", "user_phone", "user_name", "bid_amount", "timestamp")
+USER_FIELDS = ("id", "name", "phone", "verified")
+OTP_FIELDS = ("id", "mobile_email", "otp", "expiration")
+
+
+def _now():
+    """Epoch seconds, the stored form of every lot/bid/OTP time."""
+    return int(time.time())
+
+
+def _bid_row(lot_id, user_phone, amount, user_name=None):
+    return {"lot_id": lot_id, "user_phone": user_phone, "user_name": user_name,
+            "bid_amount": float(amount), "timestamp": _now()}
+
+
+# =====================================================
+# 📐 INTERFACE
+# =====================================================
+class Repository:
+    """
+    Batch methods are the primitives each backend implements; the singular
+    helpers are built on them so every backend batches the same way.
+    """
+
+    # -------- lots --------
+    def add_lots(self, rows):
+        """Insert lot dicts; returns their ids in order."""
+        raise NotImplementedError
+
+    def get_lots(self, lot_ids):
+        """{lot_id: lot dict} for the ids that exist."""
+        raise NotImplementedError
+
+    def list_lots(self, limit=50, before_id=None):
+        """Newest lots first, keyset-paged on id."""
+        raise NotImplementedError
+
+    # -------- bids --------
+    def add_bids(self, rows):
+        raise NotImplementedError
+
+    def bids_for_lots(self, lot_ids):
+        """{lot_id: [bid dict, best first]} for many lots at once."""
+        raise NotImplementedError
+
+    def bids_by(self, user_phone):
+        """A bidder's bids, newest first."""
+        raise NotImplementedError
+
+    def bids_by_name(self, user_name):
+        """Bids placed under a name, newest first (the phone-less flow)."""
+        raise NotImplementedError
+
+    # -------- users --------
+    def add_users(self, rows):
+        """Register users by phone; a phone that is already registered keeps its existing row."""
+        raise NotImplementedError
+
+    def get_user(self, phone):
+        raise NotImplementedError
+
+    # -------- otps --------
+    def save_otp(self, mobile_email, otp, expiration):
+        raise NotImplementedError
+
+    def get_otps(self, mobile_email):
+        """OTP rows for a contact, newest first."""
+        raise NotImplementedError
+
+    def delete_otps(self, mobile_email):
+        raise NotImplementedError
+
+    # -------- settings --------
+    def get_settings(self):
+        raise NotImplementedError
+
+    def set_settings(self, values):
+        """Write many settings at once."""
+        raise NotImplementedError
+
+    # -------- conveniences --------
+    def add_lot(self, item_name, quantity, base_price, closes_at=None):
+        from db import DEFAULT_AUCTION_HOURS, to_epoch
+
+        now = _now()
+        closes_at = to_epoch(closes_at) or now + DEFAULT_AUCTION_HOURS * 3600
+        return self.add_lots([{"item_name": item_name, "quantity": quantity, "base_price": base_price,
+                               "date_added": now, "closes_at": closes_at}])[0]
+
+    def get_lot(self, lot_id):
+        return self.get_lots([lot_id]).get(lot_id)
+
+    def place_bid(self, lot_id, user_phone, amount, user_name=None):
+        return self.add_bids([_bid_row(lot_id, user_phone, amount, user_name)])[0]
+
+    def bids_for_lot(self, lot_id):
+        return self.bids_for_lots([lot_id]).get(lot_id, [])
+
+    def add_user(self, name, phone, verified=0):
+        self.add_users([{"name": name, "phone": phone, "verified": verified}])
+
+
+# =====================================================
+# 🪨 SQLITE
+# =====================================================
+class SqliteRepository(Repository):
+    """The app's own store: lot shards, the order book and the typed settings table."""
+
+    def add_lots(self, rows):
+        from db import insert_lot
+
+        return [insert_lot(r["item_name"], r.get("quantity"), r["base_price"],
+                           r.get("date_added") or _now(),
+                           r.get("closes_at"), r.get("market")) for r in rows]
+
+    def get_lots(self, lot_ids):
+        from dal import lots_by_ids
+
+        return {lot_id: dict(zip(LOT_FIELDS, lot)) for lot_id, lot in lots_by_ids(lot_ids).items()}
+
+    def list_lots(self, limit=50, before_id=None):
+        from dal import newest_lots
+
+        return [dict(zip(LOT_FIELDS, lot)) for lot in newest_lots(limit, before_id)]
+
+    def add_bids(self, rows):
+        # Through the order book so deadlines, aggregates and live pushes apply.
+        from orderbook import get_order_book
+
+        book = get_order_book()
+        return [book.place_bid(r["lot_id"], r.get("user_phone"), r["bid_amount"], r.get("user_name"))
+                for r in rows]
+
+    def bids_for_lots(self, lot_ids):
+        from dal import bids_for_lots
+
+        return {lot_id: [dict(zip(BID_FIELDS, bid)) for bid in bids]
+                for lot_id, bids in bids_for_lots(lot_ids).items()}
+
+    def bids_by(self, user_phone):
+        from dal import bids_by_phone
+
+        return [dict(zip(BID_FIELDS, bid)) for bid in bids_by_phone(user_phone)]
+
+    def bids_by_name(self, user_name):
+        from dal import bids_by_name
+
+        return [dict(zip(BID_FIELDS, bid)) for bid in bids_by_name(user_name)]
+
+    def add_users(self, rows):
+        from dal import add_users
+
+        add_users([(r["name"], r["phone"], r.get("verified", 0)) for r in rows])
+
+    def get_user(self, phone):
+        from dal import get_user
+
+        user = get_user(phone)
+        return dict(zip(USER_FIELDS, user)) if user else None
+
+    def save_otp(self, mobile_email, otp, expiration):
+        from db import execute_query, to_epoch
+
+        return execute_query(
+            "INSERT INTO otps (mobile_email, otp, expiration) VALUES (?, ?, ?)",
+            (mobile_email, otp, to_epoch(expiration)),
+        )
+
+    def get_otps(self, mobile_email):
+        from db import fetch_all
+
+        rows = fetch_all(
+            f"SELECT {', '.join(OTP_FIELDS)} FROM otps WHERE mobile_email = ? ORDER BY id DESC",
+            (mobile_email,), cached=False,
+        )
+        return [dict(zip(OTP_FIELDS, row)) for row in rows]
+
+    def delete_otps(self, mobile_email):
+        from db import execute_query
+
+        execute_query("DELETE FROM otps WHERE mobile_email = ?", (mobile_email,))
+
+    def get_settings(self):
+        from db_utils import all_settings
+
+        return all_settings()
+
+    def set_settings(self, values):
+        from db_utils import set_setting
+
+        for key, value in values.items():
+            set_setting(key, value)
+
+
+# =====================================================
+# 🧪 IN-MEMORY
+# =====================================================
+class MemoryRepository(Repository):
+    """Dict-backed store with the same semantics; nothing touches disk."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = {name: itertools.count(1) for name in ("lots", "bids", "users", "otps")}
+        self.lots, self.bids, self.users, self.otps, self.settings = {}, {}, {}, {}, {}
+
+    def _insert(self, table, store, rows, fields):
+        with self._lock:
+            ids = []
+            for row in rows:
+                record = {field: row.get(field) for field in fields}
+                record["id"] = next(self._ids[table])
+                store[record["id"]] = record
+                ids.append(record["id"])
+            return ids
+
+    def add_lots(self, rows):
+        return self._insert("lots", self.lots, [{"status": "open", **r} for r in rows], LOT_FIELDS)
+
+    def get_lots(self, lot_ids):
+        return {i: dict(self.lots[i]) for i in lot_ids if i in self.lots}
+
+    def list_lots(self, limit=50, before_id=None):
+        ids = sorted((i for i in self.lots if before_id is None or i < before_id), reverse=True)
+        return [dict(self.lots[i]) for i in ids[:limit]]
+
+    def add_bids(self, rows):
+        return self._insert("bids", self.bids, rows, BID_FIELDS)
+
+    def bids_for_lots(self, lot_ids):
+        wanted = set(lot_ids)
+        grouped = {}
+        for bid in sorted(self.bids.values(), key=lambda b: (-b["bid_amount"], b["id"])):
+            if bid["lot_id"] in wanted:
+                grouped.setdefault(bid["lot_id"], []).append(dict(bid))
+        return grouped
+
+    def bids_by(self, user_phone):
+        return [dict(b) for b in self._newest_bids() if b["user_phone"] == user_phone]
+
+    def bids_by_name(self, user_name):
+        return [dict(b) for b in self._newest_bids() if b["user_name"] == user_name]
+
+    def _newest_bids(self):
+        return sorted(self.bids.values(), key=lambda b: (b["timestamp"] or 0, b["id"]), reverse=True)
+
+    def add_users(self, rows):
+        with self._lock:
+            for row in rows:
+                if row["phone"] not in self.users:
+                    self.users[row["phone"]] = {"id": next(self._ids["users"]), "name": row["name"],
+                                                "phone": row["phone"], "verified": row.get("verified", 0)}
+
+    def get_user(self, phone):
+        user = self.users.get(phone)
+        return dict(user) if user else None
+
+    def save_otp(self, mobile_email, otp, expiration):
+        return self._insert("otps", self.otps, [{"mobile_email": mobile_email, "otp": otp,
+                                                 "expiration": expiration}], OTP_FIELDS)[0]
+
+    def get_otps(self, mobile_email):
+        return [dict(o) for o in sorted(self.otps.values(), key=lambda o: -o["id"])
+                if o["mobile_email"] == mobile_email]
+
+    def delete_otps(self, mobile_email):
+        with self._lock:
+            for otp_id in [i for i, o in self.otps.items() if o["mobile_email"] == mobile_email]:
+                del self.otps[otp_id]
+
+    def get_settings(self):
+        return dict(self.settings)
+
+    def set_settings(self, values):
+        with self._lock:
+            self.settings.update(values)
+
+
+# =====================================================
+# 🌐 SUPABASE / POSTGREST
+# =====================================================
+_NEEDS_QUOTES = re.compile(r'[,.:()"\s]')
+
+
+def _literal(value):
+    """PostgREST filter literal; reserved characters need double quotes."""
+    text = str(value)
+    if _NEEDS_QUOTES.search(text):
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return text
+
+
+def _in(values):
+    return f"in.({','.join(_literal(v) for v in values)})"
+
+
+class PostgrestRepository(Repository):
+    """
+    Supabase's REST interface over one pooled HTTP/2 client (connections and
+    TLS sessions are reused across every session in the process).
+    Bid deadlines are not enforced here; that belongs in a database policy or RPC.
+    """
+
+    def __init__(self, url=None, api_key=None, timeout=POSTGREST_TIMEOUT,
+                 connections=POSTGREST_CONNECTIONS, transport=None):
+        url = (url or SUPABASE_URL or "").rstrip("/")
+        api_key = api_key or SUPABASE_KEY or ""
+        if not url:
+            raise ValueError("PostgREST backend needs a Supabase URL (SUPABASE_URL)")
+        import httpx  # only the PostgREST backend needs an HTTP stack
+
+        self._client = httpx.Client(
+            base_url=f"{url}/rest/v1",
+            headers={"apikey": api_key, "Authorization": f"Bearer {api_key}"},
+            http2=True,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+            transport=transport,
+        )
+
+    # -------- transport helpers --------
+    def _get(self, table, params):
+        response = self._client.get(f"/{table}", params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def _post(self, table, rows, on_conflict=None, resolution="merge-duplicates"):
+        prefer = ["return=representation"]
+        params = {}
+        if on_conflict:
+            prefer.append(f"resolution={resolution}")
+            params["on_conflict"] = on_conflict
+        response = self._client.post(f"/{table}", params=params, json=list(rows),
+                                     headers={"Prefer": ",".join(prefer)})
+        response.raise_for_status()
+        return response.json()
+
+    def _delete(self, table, params):
+        self._client.delete(f"/{table}", params=params).raise_for_status()
+
+    def close(self):
+        self._client.close()
+
+    # -------- lots --------
+    def add_lots(self, rows):
+        payload = [{k: v for k, v in r.items() if k in LOT_FIELDS and k != "id"} for r in rows]
+        return [row["id"] for row in self._post("lots", payload)] if payload else []
+
+    def get_lots(self, lot_ids):
+        ids = list(dict.fromkeys(lot_ids))
+        if not ids:
+            return {}
+        rows = self._get("lots", {"select": ",".join(LOT_FIELDS), "id": _in(ids)})
+        return {row["id"]: row for row in rows}
+
+    def list_lots(self, limit=50, before_id=None):
+        params = {"select": ",".join(LOT_FIELDS), "order": "id.desc", "limit": str(limit)}
+        if before_id is not None:
+            params["id"] = f"lt.{int(before_id)}"
+        return self._get("lots", params)
+
+    # -------- bids --------
+    def add_bids(self, rows):
+        payload = [{k: v for k, v in r.items() if k in BID_FIELDS and k != "id"} for r in rows]
+        return [row["id"] for row in self._post("bids", payload)] if payload else []
+
+    def bids_for_lots(self, lot_ids):
+        ids = list(dict.fromkeys(lot_ids))
+        if not ids:
+            return {}
+        rows = self._get("bids", {"select": ",".join(BID_FIELDS), "lot_id": _in(ids),
+                                  "order": "bid_amount.desc,id.asc"})
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row["lot_id"], []).append(row)
+        return grouped
+
+    def bids_by(self, user_phone):
+        return self._get("bids", {"select": ",".join(BID_FIELDS), "user_phone": f"eq.{_literal(user_phone)}",
+                                  "order": "timestamp.desc,id.desc"})
+
+    def bids_by_name(self, user_name):
+        return self._get("bids", {"select": ",".join(BID_FIELDS), "user_name": f"eq.{_literal(user_name)}",
+                                  "order": "timestamp.desc,id.desc"})
+
+    # -------- users --------
+    def add_users(self, rows):
+        payload = [{"name": r["name"], "phone": r["phone"], "verified": r.get("verified", 0)} for r in rows]
+        if payload:
+            self._post("users", payload, on_conflict="phone", resolution="ignore-duplicates")
+
+    def get_user(self, phone):
+        rows = self._get("users", {"select": ",".join(USER_FIELDS), "phone": f"eq.{_literal(phone)}", "limit": "1"})
+        return rows[0] if rows else None
+
+    # -------- otps --------
+    def save_otp(self, mobile_email, otp, expiration):
+        return self._post("otps", [{"mobile_email": mobile_email, "otp": otp, "expiration": expiration}])[0]["id"]
+
+    def get_otps(self, mobile_email):
+        return self._get("otps", {"select": ",".join(OTP_FIELDS),
+                                  "mobile_email": f"eq.{_literal(mobile_email)}", "order": "id.desc"})
+
+    def delete_otps(self, mobile_email):
+        self._delete("otps", {"mobile_email": f"eq.{_literal(mobile_email)}"})
+
+    # -------- settings --------
+    def get_settings(self):
+        return {row["key"]: json.loads(row["value"]) for row in self._get("settings", {"select": "key,value"})}
+
+    def set_settings(self, values):
+        if values:
+            self._post("settings", [{"key": k, "value": json.dumps(v)} for k, v in values.items()], on_conflict="key")
+
+
+# =====================================================
+# 🔌 BACKEND SELECTION
+# =====================================================
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def make_repository(backend=None, **options) -> Repository:
+    """Build a backend; `options` (url, api_key, ...) only apply to PostgREST."""
+    backend = backend or STORAGE_BACKEND
+    if backend == "sqlite":
+        return SqliteRepository()
+    if backend == "memory":
+        return MemoryRepository()
+    if backend in ("postgrest", "supabase"):
+        return PostgrestRepository(**options)
+    raise ValueError(f"Unknown storage backend '{backend}'. Choose sqlite, memory or postgrest")
+
+
+def get_repository(**options) -> Repository:
+    """Shared repository for this process (backend from FRUITBID_STORAGE)."""
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                _repository = make_repository(**options)
+    return _repository
+
+
+# =====================================================
+# 🧪 LOCAL POSTGREST STAND-IN
+# =====================================================
+_OPS = {
+    "eq": lambda a, b: a == b, "neq": lambda a, b: a != b,
+    "lt": lambda a, b: a < b, "lte": lambda a, b: a <= b,
+    "gt": lambda a, b: a > b, "gte": lambda a, b: a >= b,
+}
+
+
+def _coerce(text, like):
+    if isinstance(like, bool) or like is None:
+        return text
+    if isinstance(like, (int, float)):
+        try:
+            return type(like)(text)
+        except ValueError:
+            return text
+    return text
+
+
+def _split_list(text):
+    """Values inside in.(...), honouring double quotes."""
+    values, current, quoted, escaped = [], "", False, False
+    for ch in text:
+        if escaped:
+            current, escaped = current + ch, False
+        elif ch == "\\":
+            escaped = True
+        elif ch == '"':
+            quoted = not quoted
+        elif ch == "," and not quoted:
+            values.append(current)
+            current = ""
+        else:
+            current += ch
+    values.append(current)
+    return values
+
+
+def _unquote(text):
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        return text[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return text
+
+
+def _matches(row, column, spec):
+    op, _, raw = spec.partition(".")
+    value = row.get(column)
+    if op == "in":
+        wanted = [_unquote(v) for v in _split_list(raw.strip("()"))]
+        return any(value == _coerce(w, value) for w in wanted)
+    if op == "is":
+        return value is None if raw == "null" else str(value).lower() == raw
+    compare = _OPS.get(op)
+    if compare is None or value is None:
+        return False
+    return compare(value, _coerce(_unquote(raw), value))
+
+
+def run_stub_server(host="127.0.0.1", port=8768, tables=None):
+    """
+    A PostgREST-compatible subset over in-memory tables: GET with eq/neq/lt/
+    lte/gt/gte/in/is filters, order, limit and select; POST of one object or
+    an array (Prefer: resolution=merge-duplicates or ignore-duplicates +
+    on_conflict for upserts);
+    DELETE with filters. `server.requests` counts requests per method, to
+    check batching. `python storage.py`, then SUPABASE_URL=http://127.0.0.1:8768.
+    """
+    tables = tables if tables is not None else {}
+    counters = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _route(self):
+            url = urlparse(self.path)
+            if not url.path.startswith("/rest/v1/"):
+                return None, []
+            return url.path[len("/rest/v1/"):], parse_qsl(url.query, keep_blank_values=True)
+
+        def _reply(self, status, payload=None):
+            body = b"" if payload is None else json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _filtered(self, table, query):
+            control = {"select", "order", "limit", "offset", "on_conflict"}
+            rows = tables.setdefault(table, [])
+            return [r for r in rows if all(_matches(r, c, spec) for c, spec in query if c not in control)]
+
+        def _count(self):
+            with lock:
+                counters[self.command] = counters.get(self.command, 0) + 1
+
+        def do_GET(self):
+            self._count()
+            table, query = self._route()
+            if table is None:
+                return self._reply(404)
+            params = dict(query)
+            with lock:
+                rows = [dict(r) for r in self._filtered(table, query)]
+            for term in reversed(params.get("order", "").split(",") if params.get("order") else []):
+                column, _, direction = term.partition(".")
+                rows.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=direction.startswith("desc"))
+            if "limit" in params:
+                rows = rows[: int(params["limit"])]
+            if params.get("select", "*") != "*":
+                columns = params["select"].split(",")
+                rows = [{c: r.get(c) for c in columns} for r in rows]
+            self._reply(200, rows)
+
+        def do_POST(self):
+            self._count()
+            table, query = self._route()
+            if table is None:
+                return self._reply(404)
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"[]")
+            payload = payload if isinstance(payload, list) else [payload]
+            conflict = dict(query).get("on_conflict")
+            prefer = self.headers.get("Prefer") or ""
+            merge = "merge-duplicates" in prefer
+            ignore = "ignore-duplicates" in prefer
+            written = []
+            with lock:
+                rows = tables.setdefault(table, [])
+                for item in payload:
+                    existing = None
+                    if (merge or ignore) and conflict:
+                        existing = next((r for r in rows if r.get(conflict) == item.get(conflict)), None)
+                    if existing is not None and ignore:
+                        continue
+                    if existing is not None:
+                        existing.update(item)
+                        written.append(dict(existing))
+                        continue
+                    if "id" not in item:
+                        item = {"id": max((r.get("id") or 0 for r in rows), default=0) + 1, **item}
+                    rows.append(dict(item))
+                    written.append(dict(item))
+            self._reply(201, written)
+
+        def do_DELETE(self):
+            self._count()
+            table, query = self._route()
+            if table is None:
+                return self._reply(404)
+            with lock:
+                doomed = self._filtered(table, query)
+                tables[table] = [r for r in tables.get(table, []) if r not in doomed]
+            self._reply(204)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.tables = tables
+    server.requests = counters
+    return server
+
+
+if __name__ == "__main__":
+    server = run_stub_server()
+    print(f"🗄️ Stub PostgREST on http://{server.server_address[0]}:{server.server_address[1]}/rest/v1")
+    server.serve_forever()
@@ -0,0 +1,207 @@
+# =====================================================
+# 🧾 table_browser.py — Rowid Paging & Streaming Export
+# =====================================================
+#
+# browse() seeks on rowid in either direction, so every page costs the same
+# however deep into the table it is. The exporters stream one SELECT through
+# cursor.fetchmany() and write fixed-size chunks, so memory stays flat no
+# matter how many rows the table has. Lot-sharded tables (db.SHARDED_TABLES)
+# are read from every shard and merged, so no view silently shows shard 0 only.
+
+import csv
+import heapq
+import itertools
+import os
+from contextlib import ExitStack
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from db import SHARDED_TABLES, fetch_all, get_manager, get_router
+
+EXPORT_DIR = os.getenv("FRUITBID_EXPORT_DIR", "exports")
+EXPORT_CHUNK_ROWS = 10_000
+
+
+def list_tables():
+    return [row[0] for row in fetch_all(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )]
+
+
+def _checked(table):
+    """Only names that exist in sqlite_master may be spliced into SQL."""
+    if table not in list_tables():
+        raise ValueError(f"Unknown table '{table}'")
+    return table
+
+
+def table_columns(table):
+    """[(name, declared_type)] for a table."""
+    return [(row[1], row[2]) for row in fetch_all(f"PRAGMA table_info({_checked(table)})")]
+
+
+# =====================================================
+# 🔀 SHARDS
+# =====================================================
+# Lot-sharded tables are read from every shard file and merged on
+# (rowid, shard index), so a position in the table is that pair.
+def _shards(table):
+    """Managers holding rows of `table`: every shard for lot-sharded tables, else the main file."""
+    return get_router().managers if table in SHARDED_TABLES else [get_manager()]
+
+
+def _seek(table, cursor, forward, limit):
+    """
+    Up to `limit` ((rowid, shard), row) pairs strictly past `cursor` in
+    (rowid, shard) order, or from the start/end when cursor is None.
+    Each shard is one rowid seek; the results are merged.
+    """
+    parts = []
+    for index, manager in enumerate(_shards(table)):
+        where, params = "", ()
+        if cursor is not None:
+            rowid, shard = cursor
+            # Equal rowids are ordered by shard index.
+            if forward:
+                where, params = f"WHERE rowid {'>' if index <= shard else '>='} ?", (rowid,)
+            else:
+                where, params = f"WHERE rowid {'<' if index >= shard else '<='} ?", (rowid,)
+        with manager.reader() as conn:
+            rows = conn.execute(
+                f"SELECT rowid, * FROM {table} {where} ORDER BY rowid {'ASC' if forward else 'DESC'} LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        parts.append([((row[0], index), row[1:]) for row in rows])
+    merged = heapq.merge(*parts, key=lambda pair: pair[0], reverse=not forward)
+    return list(itertools.islice(merged, limit))
+
+
+# =====================================================
+# 🔎 BROWSER
+# =====================================================
+def browse(table, after=None, before=None, limit=50):
+    """
+    One page of rows in rowid order (merged across shards for sharded tables).
+    Pass `after` to seek forward, `before` to seek back; both are cursors as
+    returned here, (rowid, shard).
+    Returns (columns, rows, first, last, has_previous, has_next); rows exclude
+    the rowid. The has_* flags come from probing one row past each end, so a
+    Previous/Next that they enable never lands on an empty page.
+    """
+    table = _checked(table)
+    columns = [name for name, _ in table_columns(table)]
+    if before is not None:
+        rows = _seek(table, before, False, limit + 1)
+        has_previous = len(rows) > limit
+        rows = rows[:limit]
+        rows.reverse()
+    else:
+        rows = _seek(table, after, True, limit + 1)
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+    if not rows:
+        return columns, [], None, None, False, False
+    first, last = rows[0][0], rows[-1][0]
+    if before is not None:
+        has_next = bool(_seek(table, last, True, 1))
+    else:
+        has_previous = after is not None and bool(_seek(table, first, False, 1))
+    return columns, [row for _, row in rows], first, last, has_previous, has_next
+
+
+# =====================================================
+# 📤 STREAMING EXPORT
+# =====================================================
+def _tagged(cursor, index, chunk_size):
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        for row in rows:
+            yield (row[0], index), row[1:]
+
+
+def iter_chunks(table, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Yield lists of up to chunk_size rows in rowid order, from one consistent
+    read per shard; sharded tables stream every shard and merge on the fly.
+    """
+    table = _checked(table)
+    with ExitStack() as stack:
+        streams = []
+        for index, manager in enumerate(_shards(table)):
+            conn = stack.enter_context(manager.reader())
+            conn.execute("BEGIN")  # one snapshot for the whole export
+            stack.callback(conn.execute, "COMMIT")
+            cursor = conn.execute(f"SELECT rowid, * FROM {table} ORDER BY rowid")
+            streams.append(_tagged(cursor, index, chunk_size))
+        merged = heapq.merge(*streams, key=lambda pair: pair[0])
+        while True:
+            rows = [row for _, row in itertools.islice(merged, chunk_size)]
+            if not rows:
+                break
+            yield rows
+
+
+def _export_path(table, extension, path):
+    if path:
+        return path
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(EXPORT_DIR, f"{table}-{stamp}.{extension}")
+
+
+def export_csv(table, path=None, chunk_size=EXPORT_CHUNK_ROWS):
+    """Stream a table to CSV. Returns (path, rows_written)."""
+    path = _export_path(table, "csv", path)
+    header = [name for name, _ in table_columns(table)]
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for rows in iter_chunks(table, chunk_size):
+            writer.writerows(rows)
+            written += len(rows)
+    return path, written
+
+
+def _arrow_type(declared):
+    """SQLite type-affinity rules, mapped onto Arrow types."""
+    declared = (declared or "").upper()
+    if "INT" in declared:
+        return pa.int64()
+    if any(t in declared for t in ("CHAR", "CLOB", "TEXT")):
+        return pa.string()
+    if any(t in declared for t in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    return pa.string()
+
+
+def _to_array(values, arrow_type):
+    if arrow_type == pa.string():
+        # SQLite is dynamically typed; text columns may hold numbers.
+        values = [None if v is None else str(v) for v in values]
+    return pa.array(values, type=arrow_type)
+
+
+def export_parquet(table, path=None, chunk_size=EXPORT_CHUNK_ROWS):
+    """Stream a table to Parquet, one row group per chunk. Returns (path, rows_written)."""
+    path = _export_path(table, "parquet", path)
+    columns = table_columns(table)
+    schema = pa.schema([(name, _arrow_type(declared)) for name, declared in columns])
+    written = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in iter_chunks(table, chunk_size):
+            arrays = []
+            for i, field in enumerate(schema):
+                try:
+                    arrays.append(_to_array([row[i] for row in rows], field.type))
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    raise ValueError(
+                        f"Column '{field.name}' holds values that are not {field.type}; export as CSV instead"
+                    )
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            written += len(rows)
+    return path, written
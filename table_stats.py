@@ -0,0 +1,112 @@
+# =====================================================
+# 📊 table_stats.py — Row Counts, Growth & On-Disk Size
+# =====================================================
+#
+# Row counts come from `table_stats`, kept exact by insert/delete triggers
+# (see migrations.install_row_counter), so reading them is O(#tables) instead
+# of a COUNT(*) B-tree walk per table. Growth rates are derived from periodic
+# samples in `table_stats_samples`.
+
+from datetime import datetime, timedelta
+
+from db import SHARDED_TABLES, fetch_all, fetch_one, get_router, write_connection
+from migrations import COUNTED_TABLES, install_row_counter
+
+SAMPLE_INTERVAL = timedelta(hours=1)
+GROWTH_WINDOW = timedelta(days=1)
+
+
+def get_row_counts() -> dict:
+    """{table: exact row count} for every counted table; lot-sharded tables are summed over shards."""
+    main, *others = get_router().fetch_each("SELECT table_name, row_count FROM table_stats")
+    counts = dict(main)
+    for rows in others:
+        for table, count in rows:
+            if table in SHARDED_TABLES:
+                counts[table] = counts.get(table, 0) + count
+    _count_new_tables(counts)
+    return counts
+
+
+def _count_new_tables(counts):
+    """
+    Migration 8 only installed counters on the COUNTED_TABLES that existed
+    then; one created later gets its counter here, on first sight (a single
+    COUNT(*) to seed it), instead of showing as missing.
+    """
+    existing = {row[0] for row in fetch_all("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    missing = [table for table in COUNTED_TABLES if table in existing and table not in counts]
+    if not missing:
+        return
+    with write_connection() as conn:
+        for table in missing:
+            install_row_counter(conn, table)
+            counts[table] = conn.execute(
+                "SELECT row_count FROM table_stats WHERE table_name = ?", (table,)
+            ).fetchone()[0]
+
+
+def record_sample(now=None, interval=SAMPLE_INTERVAL):
+    """
+    Append a snapshot of every counter, at most once per `interval`.
+    Returns True if a sample was written.
+    """
+    now = now or datetime.now()
+    last = fetch_one("SELECT MAX(sampled_at) FROM table_stats_samples")
+    if last and last[0] and datetime.fromisoformat(last[0]) > now - interval:
+        return False
+    stamp = now.isoformat(timespec="seconds")
+    with write_connection() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO table_stats_samples (table_name, sampled_at, row_count) VALUES (?, ?, ?)",
+            [(table, stamp, count) for table, count in get_row_counts().items()],
+        )
+    return True
+
+
+def growth_rates(window=GROWTH_WINDOW, now=None) -> dict:
+    """
+    {table: rows per day}, comparing the current count with the oldest sample
+    inside `window`. Tables without a usable sample map to None.
+    """
+    now = now or datetime.now()
+    since = (now - window).isoformat(timespec="seconds")
+    baseline = fetch_all(
+        """
+        SELECT s.table_name, s.sampled_at, s.row_count
+        FROM table_stats_samples s
+        JOIN (
+            SELECT table_name, MIN(sampled_at) AS first_at
+            FROM table_stats_samples WHERE sampled_at >= ?
+            GROUP BY table_name
+        ) f ON f.table_name = s.table_name AND f.first_at = s.sampled_at
+        """,
+        (since,),
+    )
+    counts = get_row_counts()
+    rates = {table: None for table in counts}
+    for table, sampled_at, then in baseline:
+        elapsed = (now - datetime.fromisoformat(sampled_at)).total_seconds()
+        if table in counts and elapsed > 0:
+            rates[table] = (counts[table] - then) * 86400 / elapsed
+    return rates
+
+
+def table_sizes() -> dict:
+    """
+    {table: bytes on disk, including its indexes} from the dbstat virtual table,
+    summed over every shard file.
+    dbstat walks every page of the file, so call it on demand, not per render.
+    """
+    sizes = {}
+    for rows in get_router().fetch_each(
+        """
+        SELECT m.tbl_name, SUM(s.pgsize)
+        FROM dbstat AS s JOIN sqlite_master AS m ON m.name = s.name
+        GROUP BY m.tbl_name
+        """,
+        cached=False,
+    ):
+        for table, size in rows:
+            sizes[table] = sizes.get(table, 0) + size
+    return sizes
@@ -4,10 +4,10 @@
 
 import streamlit as st
 import re
-import os
-import bcrypt
-import requests
-from db_utils import get_setting  # ✅ assuming you renamed db.py → db_utils.py
+from auth import verify_admin_password
+from price_feed import get_price_fetcher, fallback_price
+from pricing import price_table
+from db_utils import subscribe  # ✅ cached settings store
 
 
 # =====================================================
@@ -29,55 +29,33 @@ def validate_email(val: str) -> bool:
 def check_admin_password(password: str) -> bool:
     """
     ✅ Compare entered admin password with the stored hash.
-    Note: Hash should be stored in environment or DB, not re-generated each time.
+    The hash is loaded once at startup (see auth.py); use auth.login_admin()
+    to get a session token so later reruns skip bcrypt entirely.
     """
-    stored_hash = os.getenv("ADMIN_PASSWORD_HASH")
-
-    # If no pre-stored hash exists, create one temporarily (development fallback)
-    if not stored_hash:
-        temp_hash = bcrypt.hashpw("admin123".encode(), bcrypt.gensalt())
-        os.environ["ADMIN_PASSWORD_HASH"] = temp_hash.decode()
-        stored_hash = temp_hash.decode()
-
-    try:
-        return bcrypt.checkpw(password.encode(), stored_hash.encode())
-    except Exception:
-        return False
+    return verify_admin_password(password)
 
 
 # =====================================================
-# 💰 PRICE FETCHING (MOCKED REAL-TIME)
+# 💰 PRICE FETCHING (REAL-TIME, BATCHED)
 # =====================================================
-def fetch_real_time_price(item: str) -> float:
+def fetch_real_time_prices(items) -> dict:
     """
-    ✅ Fetch real-time market price.
-    Replace with actual API integration later.
+    ✅ Fetch market prices for many items in one concurrent batch.
+    Uses PRICE_API_URL when set, otherwise the mock price table (see price_feed.py).
     """
     try:
-        # Example placeholder for API request
-        # response = requests.get(f"https://api.example.com/price?item={item}", timeout=5)
-        # if response.status_code == 200:
-        #     return float(response.json().get("price", 100))
-
-        # Fallback mock data
-        MARKET_PRICES = {
-            "Apple": 200,
-            "Mosambi": 50,
-            "Banana": 40,
-            "Papaya": 50,
-            "Kiwi": 200,
-            "Dragon Fruit": 250,
-            "Pineapple": 60,
-            "Custard Apple": 100,
-            "Sapota": 60,
-            "Mango": 120,
-            "Spinach": 30,
-            "Honey": 300,
-        }
-        return float(MARKET_PRICES.get(item, 100))
+        return get_price_fetcher().fetch_prices(items)
     except Exception as e:
-        st.warning(f"⚠️ Price API error: {e}. Using fallback ₹100.")
-        return 100.0
+        st.warning(f"⚠️ Price API error: {e}. Using fallback prices.")
+        return {item: fallback_price(item) for item in items}
+
+
+def fetch_real_time_price(item: str) -> float:
+    """
+    ✅ Fetch real-time market price for a single item.
+    Prefer fetch_real_time_prices() when pricing more than one item.
+    """
+    return fetch_real_time_prices([item])[item]
 
 
 # =====================================================
@@ -88,12 +66,23 @@ def monitor_prices(item: str) -> float:
     """
     ✅ Calculate item price after applying discount.
     Cached for 1 minute (60s) for performance.
+    For many items at once, use monitor_price_table() instead.
     """
-    market_price = fetch_real_time_price(item)
-    try:
-        discount = float(get_setting("discount_pct", 20))
-    except Exception:
-        discount = 20.0
+    return price_table([item])["final_price"][0]
+
+
+@st.cache_data(ttl=60)
+def monitor_price_table(items: tuple) -> dict:
+    """
+    ✅ pricing.price_table() for a page of items, fetched as one batch.
+    Cached for 1 minute (60s), so reruns don't hit the price feed again.
+    """
+    return price_table(list(items))
+
 
-    final_price = market_price * (1 - discount / 100)
-    return round(final_price, 2)
+@subscribe
+def _on_setting_change(key, value):
+    """Drop cached prices as soon as the discount changes."""
+    if key == "discount_pct":
+        monitor_prices.clear()
+        monitor_price_table.clear()